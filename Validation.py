@@ -1,29 +1,59 @@
+import os
+import time
+import pickle
+import tempfile
+import datetime
 import pandas as pd
-from sklearn.model_selection import train_test_split
-from sklearn.linear_model import LogisticRegression
-from sklearn.metrics import accuracy_score, classification_report
-from sklearn.preprocessing import LabelEncoder
+from concurrent.futures import ProcessPoolExecutor
 import numpy as np
 from pathlib import Path
+from artifacts import artifact_path, BRANCH_ENV
+from feature_store import feature_artifact, is_store, FeatureStore, feature_arrays
+from partitions import partition_sizes, read_partitioned, UNKNOWN_MONTH
+from instrumentation import instrumented, span, record_read, record_write
 
 #  Constants & Configuration 
-INPUT_FILE = "selected_features.csv" 
+INPUT_FILE = artifact_path(feature_artifact("selected_features"))
+PARTITIONS_DIR = artifact_path("preprocessed_partitions")   # Section/month partitions (time mode: split date)
+ROWS_FILE = artifact_path("segmented_rows.npy")   # Article of every feature row (time mode: joins rows to partitions)
 TEST_SIZE_RATIO = 0.20  # 20% validation set 
 SEED = 42               # For reproducibility
+VALIDATION_MODE = "kfold"   # "holdout" (80/20 split), "kfold" (stratified k-fold), "streaming" (out-of-core SGD), "time" (train on older, test on newer articles) or "retrain" (refresh the saved classifier)
+N_SPLITS = 5            # Folds per repetition
+N_REPEATS = 1           # > 1 runs repeated stratified k-fold
+# Worker processes training folds in parallel: at most one per fold, within the CPU share the
+# pipeline gives the stage (PIPELINE_STAGE_CPUS, as validation_kb and validation_tfidf run side by side)
+N_JOBS = min(N_SPLITS * N_REPEATS, int(os.environ.get("PIPELINE_STAGE_CPUS") or os.cpu_count() or 1))
+STREAM_CHUNK_SIZE = 5000   # Rows per chunk in streaming mode
+STREAM_EPOCHS = 5          # Passes over the training stream (chunk order reshuffled each epoch)
+TIME_SPLIT_DATE = None     # Time mode: test on articles from this date (YYYY-MM-DD); None = newest ~TEST_SIZE_RATIO of the data
+TIME_WINDOW = (None, None) # Time mode: (from, to) dates of the experiment; rows outside are left out
 
-def perform_validation(df):
+# Retrain mode: the classifier is kept in models/ and refreshed from its previous state
+CLASSIFIER_VERSION = 2    # Bump when the saved layout changes
+CLASSIFIER_FILE = Path("models") / f"classifier_{os.environ.get(BRANCH_ENV) or 'features'}_v{CLASSIFIER_VERSION}.pkl"
+DOCUMENTS_FILE = artifact_path("segmented_data.csv")   # Rows of the feature table -> document keys
+DOCUMENTS_SPEC = artifact_path("segment_spec.json")
+RETRAIN_STRATEGY = "warm_start"   # "warm_start" (LogisticRegression from the previous coefficients, all training rows) or "partial_fit" (SGD on the new rows only)
+RETRAIN_EPOCHS = 5        # partial_fit: passes over the new rows
+RETRAIN_TOLERANCE = 0.0   # The new model replaces the saved one unless its holdout accuracy is lower by more than this
+
+def perform_validation(X, labels):
     """
     Implements Holdout Validation, trains a Logistic Regression model, and evaluates performance.
+    X is the feature matrix (e.g. the memory-mapped matrix of a feature store), labels the class names.
     """
+    from sklearn.model_selection import train_test_split
+    from sklearn.linear_model import LogisticRegression
+    from sklearn.metrics import accuracy_score, classification_report
+    from sklearn.preprocessing import LabelEncoder
+
     print(f"Starting Holdout Validation (Train/Test Split: {1 - TEST_SIZE_RATIO}/{TEST_SIZE_RATIO})...")
     
     # 1. Prepare Data
     # Encode the categorical 'Label' into numerical format for the model
     le = LabelEncoder()
-    df['Label_Encoded'] = le.fit_transform(df['Label'])
-    
-    X = df.drop(columns=['Label', 'Label_Encoded']).values
-    y = df['Label_Encoded'].values
+    y = le.fit_transform(labels)
     
     # 2. Split Data (Holdout Validation)
     X_train, X_validation, y_train, y_validation = train_test_split(
@@ -57,20 +87,494 @@ def perform_validation(df):
     
     return accuracy
 
+def share_arrays(work_dir, X, y):
+    """
+    Writes X and y as .npy files in work_dir and returns their paths.
+    Workers open them with mmap_mode='r', so every process reads the same pages
+    instead of receiving a pickled copy of the feature matrix.
+    """
+    X_path = Path(work_dir) / "X.npy"
+    y_path = Path(work_dir) / "y.npy"
+    np.save(X_path, X)
+    np.save(y_path, y)
+    return X_path, y_path
+
+def open_shared(path):
+    """Memory-maps a matrix shared with the workers: a feature store or an .npy file."""
+    if is_store(path):
+        return FeatureStore(path).X
+    return np.load(path, mmap_mode='r')
+
+def train_fold(task):
+    """
+    Trains and evaluates one fold inside a worker process.
+    The shared matrices are memory-mapped; only the fold's rows are materialized.
+    """
+    from sklearn.linear_model import LogisticRegression
+    from sklearn.metrics import accuracy_score, f1_score
+
+    X_path, y_path, repeat, fold, train_idx, test_idx = task
+    start = time.perf_counter()
+    
+    X = open_shared(X_path)
+    y = open_shared(y_path)
+    
+    model = LogisticRegression(max_iter=1000, random_state=SEED)
+    model.fit(X[train_idx], y[train_idx])
+    y_pred = model.predict(X[test_idx])
+    
+    return {
+        "Repeat": repeat,
+        "Fold": fold,
+        "TrainSize": len(train_idx),
+        "TestSize": len(test_idx),
+        "Accuracy": accuracy_score(y[test_idx], y_pred),
+        "F1_Macro": f1_score(y[test_idx], y_pred, average='macro'),
+        "WallTime_s": time.perf_counter() - start,
+    }
+
+def perform_cross_validation(X, labels, n_splits=N_SPLITS, n_repeats=N_REPEATS, n_jobs=N_JOBS, store_path=None):
+    """
+    Implements Stratified K-Fold Validation (optionally repeated), training the
+    folds in parallel worker processes that share the feature matrix via memory-mapping.
+    When X comes from a feature store (store_path), the workers map the store's
+    own matrix file; otherwise X is first written to a temporary .npy file.
+    Returns a DataFrame with the metrics and wall-time of every fold.
+    """
+    from sklearn.model_selection import StratifiedKFold, RepeatedStratifiedKFold
+    from sklearn.preprocessing import LabelEncoder
+
+    print(f"Starting Stratified {n_splits}-Fold Validation "
+          f"({n_repeats} repeat(s), {n_jobs} worker process(es))...")
+    
+    # 1. Prepare Data
+    le = LabelEncoder()
+    y = le.fit_transform(labels)
+    
+    # 2. Build the folds (stratified, so every fold keeps the class balance)
+    if n_repeats > 1:
+        splitter = RepeatedStratifiedKFold(n_splits=n_splits, n_repeats=n_repeats, random_state=SEED)
+    else:
+        splitter = StratifiedKFold(n_splits=n_splits, shuffle=True, random_state=SEED)
+    splits = list(splitter.split(X, y))
+    
+    # 3. Train the folds in parallel on the shared, memory-mapped matrix
+    with tempfile.TemporaryDirectory() as work_dir:
+        if store_path is not None:
+            X_path = Path(store_path)
+            y_path = Path(work_dir) / "y.npy"
+            np.save(y_path, y)
+        else:
+            X_path, y_path = share_arrays(work_dir, X, y)
+        del X
+        
+        tasks = [
+            (X_path, y_path, i // n_splits + 1, i % n_splits + 1, train_idx, test_idx)
+            for i, (train_idx, test_idx) in enumerate(splits)
+        ]
+        with ProcessPoolExecutor(max_workers=n_jobs) as executor:
+            results = list(executor.map(train_fold, tasks))
+    
+    results_df = pd.DataFrame(results)
+    
+    # 4. Report per-fold metrics and their spread
+    print("\n Per-Fold Results ")
+    print(results_df.to_string(index=False, float_format=lambda v: f"{v:.4f}"))
+    
+    print("\n Validation Results ")
+    print(f"Chosen Metric: Accuracy")
+    for metric in ["Accuracy", "F1_Macro", "WallTime_s"]:
+        print(f"{metric}: {results_df[metric].mean():.4f} ± {results_df[metric].std():.4f}")
+    
+    return results_df
+
+def index_chunks(input_path, chunk_size=STREAM_CHUNK_SIZE):
+    """
+    One pass over the CSV that records the byte offset where every chunk starts,
+    the column names, the row count and the set of labels. With the offsets,
+    chunks can later be read in any order with a single seek.
+    Only the offsets are kept in memory (one integer per chunk).
+    """
+    offsets = []
+    labels = set()
+    n_rows = 0
+    with open(input_path, 'rb') as f:
+        columns = f.readline().decode('utf-8').strip().split(',')
+        label_pos = columns.index('Label')
+        position = f.tell()
+        for line in iter(f.readline, b''):
+            if n_rows % chunk_size == 0:
+                offsets.append(position)
+            labels.add(line.decode('utf-8').rstrip('\r\n').split(',')[label_pos].strip('"'))
+            position += len(line)
+            n_rows += 1
+    return offsets, columns, n_rows, sorted(labels)
+
+def read_chunk(input_path, offset, columns, chunk_size=STREAM_CHUNK_SIZE):
+    """Reads the chunk that starts at the given byte offset."""
+    with open(input_path, 'rb') as f:
+        f.seek(offset)
+        return pd.read_csv(f, header=None, names=columns, nrows=chunk_size)
+
+def open_chunks(input_path, chunk_size=STREAM_CHUNK_SIZE):
+    """
+    Returns (number of chunks, row count, sorted classes, read) where read(chunk_id)
+    gives the (features, labels) arrays of a chunk. A feature store is chunked by
+    slicing its memory-mapped matrix; a CSV is indexed once (index_chunks) and
+    every chunk is read with a single seek.
+    """
+    if is_store(input_path):
+        store = FeatureStore(input_path)
+
+        def read(chunk_id):
+            rows = slice(chunk_id * chunk_size, (chunk_id + 1) * chunk_size)
+            return np.asarray(store.X[rows]), store.labels[rows]
+
+        return -(-len(store) // chunk_size), len(store), sorted(set(store.labels)), read
+
+    offsets, columns, n_rows, classes = index_chunks(input_path, chunk_size)
+
+    def read(chunk_id):
+        chunk = read_chunk(input_path, offsets[chunk_id], columns, chunk_size)
+        return chunk.drop(columns=['Label']).to_numpy(), chunk['Label'].to_numpy()
+
+    return len(offsets), n_rows, classes, read
+
+def split_chunk(chunk, chunk_id, label_codes, chunk_size=STREAM_CHUNK_SIZE):
+    """
+    Splits a chunk (features, labels) into (train, holdout) feature/label arrays.
+    The holdout stream is every k-th row of the file (k = 1 / TEST_SIZE_RATIO),
+    decided by the global row number, so it is the same in every epoch.
+    """
+    holdout_every = int(round(1 / TEST_SIZE_RATIO))
+    X, labels = chunk
+    row_ids = chunk_id * chunk_size + np.arange(len(labels))
+    is_holdout = row_ids % holdout_every == 0
+    
+    y = np.array([label_codes[label] for label in labels], dtype=np.int64)
+    return (X[~is_holdout], y[~is_holdout]), (X[is_holdout], y[is_holdout])
+
+def evaluate_stream(model, n_chunks, read, label_codes, chunk_size=STREAM_CHUNK_SIZE):
+    """
+    Evaluates the model on the held-out stream, chunk by chunk.
+    Only a (classes x classes) confusion matrix is accumulated.
+    """
+    n_classes = len(label_codes)
+    confusion = np.zeros((n_classes, n_classes), dtype=np.int64)
+    for chunk_id in range(n_chunks):
+        _, (X_hold, y_hold) = split_chunk(read(chunk_id), chunk_id, label_codes, chunk_size)
+        if len(y_hold):
+            np.add.at(confusion, (y_hold, model.predict(X_hold)), 1)
+    return confusion
+
+def perform_streaming_validation(input_path, chunk_size=STREAM_CHUNK_SIZE, epochs=STREAM_EPOCHS):
+    """
+    Out-of-core training: streams the feature file in chunks into an SGD
+    linear classifier (partial_fit) for several epochs, with a new random chunk
+    order every epoch, and evaluates on a held-out stream.
+    Memory depends on chunk_size, not on the size of the dataset.
+    """
+    from sklearn.linear_model import SGDClassifier
+
+    print(f"Starting Streaming Validation (chunks of {chunk_size} rows, {epochs} epochs)...")
+    
+    # 1. Index the file once (chunk offsets and classes)
+    n_chunks, n_rows, classes, read = open_chunks(input_path, chunk_size)
+    label_codes = {label: code for code, label in enumerate(classes)}
+    class_ids = np.arange(len(classes))
+    print(f"Indexed {n_rows} rows in {n_chunks} chunks, {len(classes)} classes.")
+    
+    # 2. Incremental training
+    model = SGDClassifier(loss='log_loss', random_state=SEED)
+    rng = np.random.default_rng(SEED)
+    for epoch in range(1, epochs + 1):
+        for chunk_id in rng.permutation(n_chunks):
+            (X_train, y_train), _ = split_chunk(read(chunk_id), chunk_id, label_codes, chunk_size)
+            order = rng.permutation(len(y_train))
+            model.partial_fit(X_train[order], y_train[order], classes=class_ids)
+        
+        confusion = evaluate_stream(model, n_chunks, read, label_codes, chunk_size)
+        accuracy = np.trace(confusion) / confusion.sum()
+        print(f"Epoch {epoch}/{epochs}: held-out accuracy {accuracy:.4f}")
+    
+    # 3. Report
+    print("\n Validation Results ")
+    print(f"Chosen Metric: Accuracy")
+    print(f"Overall Accuracy: {accuracy:.4f} ({confusion.sum()} held-out samples)")
+    print("\nConfusion Matrix (rows: true, columns: predicted):")
+    print(pd.DataFrame(confusion, index=classes, columns=classes))
+    
+    return accuracy
+
+def choose_split_date(partitions_root, window=TIME_WINDOW, test_ratio=TEST_SIZE_RATIO):
+    """
+    First day of the month from which the newest ~test_ratio of the data is kept for
+    testing. Partition file sizes stand in for row counts, so nothing is read.
+    Undated articles have no place on the time line and are not counted.
+    """
+    sizes = partition_sizes(partitions_root, date_from=window[0], date_to=window[1])
+    sizes.pop(UNKNOWN_MONTH, None)
+    months = list(sizes)
+    assert len(months) >= 2, "A time-based split needs dated articles from at least two months."
+
+    total, newest = sum(sizes.values()), 0
+    for month in reversed(months[1:]):
+        newest += sizes[month]
+        if newest >= test_ratio * total:
+            break
+    return f"{month}-01"
+
+
+def feature_dates(partitions_root, rows_path, n_rows, window=TIME_WINDOW):
+    """
+    Publication date (YYYY-MM-DD) of every row of the feature table, "" for rows
+    outside the window or without a date. Only the partitions the window can match
+    are opened, and only their 'Article' and 'Date' columns are parsed; rows_path
+    (segmentation) gives the article of every feature row.
+    """
+    articles = np.load(rows_path)
+    assert len(articles) == n_rows, \
+        f"Error: {rows_path} has {len(articles)} rows but the feature table has {n_rows}. Re-run the pipeline."
+
+    dated = read_partitioned(partitions_root, date_from=window[0], date_to=window[1], columns=['Article'])
+    dates = pd.Series(dated['Date'].fillna("").astype(str).to_numpy(), index=dated['Article'].astype(np.int64))
+    return dates.reindex(articles, fill_value="").to_numpy(), len(dated)
+
+def perform_time_validation(X, labels, dates, partitions_root, split_date=TIME_SPLIT_DATE, window=TIME_WINDOW):
+    """
+    Time-based validation on the branch's own features: trains on the rows of
+    articles published before split_date and tests on the ones published from
+    split_date on, like a deployed model meeting newer articles.
+    dates holds the publication date of every row (feature_dates); rows outside
+    the window or without a date are left out.
+    """
+    from sklearn.linear_model import LogisticRegression
+    from sklearn.metrics import accuracy_score, classification_report, f1_score
+
+    date_from, date_to = window
+    if split_date is None:
+        split_date = choose_split_date(partitions_root, window)
+    train_to = (datetime.date.fromisoformat(split_date) - datetime.timedelta(days=1)).isoformat()
+    print(f"Starting Time-Based Validation (train: {date_from or 'first'} .. {train_to}, "
+          f"test: {split_date} .. {date_to or 'last'})...")
+
+    # 1. Select the rows of the window by publication date
+    dates = np.asarray(dates, dtype=str)
+    in_window = (dates != "") & (dates >= (date_from or "")) & ((dates <= date_to) if date_to else True)
+    train_idx = np.flatnonzero(in_window & (dates < split_date))
+    test_idx = np.flatnonzero(in_window & (dates >= split_date))
+    assert len(train_idx) > 0 and len(test_idx) > 0, "Error: The time split left an empty train or test set."
+    print(f"Train: {len(train_idx)} rows, Test: {len(test_idx)} rows ({len(labels) - in_window.sum()} outside the window).")
+
+    # 2. Train on the past, predict the future
+    model = LogisticRegression(max_iter=1000, random_state=SEED)
+    model.fit(X[train_idx], labels[train_idx])
+    y_test = labels[test_idx]
+    y_pred = model.predict(X[test_idx])
+
+    # 3. Report
+    accuracy = accuracy_score(y_test, y_pred)
+    print("\n Validation Results ")
+    print(f"Chosen Metric: Accuracy")
+    print(f"Overall Accuracy: {accuracy:.4f}")
+    print(f"F1 Macro: {f1_score(y_test, y_pred, average='macro'):.4f}")
+    print("\nDetailed Classification Report:")
+    print(classification_report(y_test, y_pred))
+
+    return accuracy
+
+def document_keys(documents_path, spec_path, n_rows):
+    """
+    Key of every row of the feature table (incremental_tfidf.content_keys of its fields),
+    read from the segmented documents the table was built from (same rows, same order).
+    Passages of one article share the article's key.
+    """
+    from incremental_tfidf import content_keys
+    from segmentation import document_fields, load_segment_spec
+
+    df = pd.read_csv(documents_path)
+    assert len(df) == n_rows, \
+        f"Error: {documents_path} has {len(df)} rows but the feature table {n_rows}. Re-run the pipeline."
+    columns = [column for column, _ in document_fields(df, load_segment_spec(spec_path))]
+    texts = df[columns].fillna("").astype(str)
+    if 'Document' in df.columns:
+        texts = texts.groupby(df['Document']).transform(" ".join)
+    return content_keys(texts)
+
+def holdout_mask(keys, test_ratio=TEST_SIZE_RATIO):
+    """
+    Fixed holdout: an article is held out when its key falls in the first test_ratio
+    of the hash range. Membership depends on the article only, so it never changes
+    as the corpus grows and no saved model has ever trained on a holdout article.
+    """
+    return (keys >> np.uint64(32)) < int(test_ratio * 2 ** 32)
+
+def load_classifier(path=CLASSIFIER_FILE):
+    """The saved classifier (dict, see perform_retraining), or None. Fails fast on a layout change."""
+    path = Path(path)
+    if not path.exists():
+        return None
+    with open(path, 'rb') as f:
+        saved = pickle.load(f)
+    assert saved["version"] == CLASSIFIER_VERSION, \
+        f"Classifier version {saved['version']} does not match the code (v{CLASSIFIER_VERSION}). Delete {path}."
+    return saved
+
+def save_classifier(saved, path=CLASSIFIER_FILE):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'wb') as f:
+        pickle.dump(saved, f, protocol=pickle.HIGHEST_PROTOCOL)
+    return path
+
+def align_model(model, model_columns, columns):
+    """
+    Copy of a fitted linear model whose coefficients follow `columns`: matched by
+    feature name, 0 for the features the model has never seen.
+    """
+    import copy
+
+    position = {name: i for i, name in enumerate(model_columns)}
+    known = [(j, position[name]) for j, name in enumerate(columns) if name in position]
+    coef = np.zeros((model.coef_.shape[0], len(columns)), dtype=model.coef_.dtype)
+    if known:
+        new, old = map(list, zip(*known))
+        coef[:, new] = model.coef_[:, old]
+
+    aligned = copy.deepcopy(model)
+    aligned.coef_ = coef
+    aligned.n_features_in_ = len(columns)
+    return aligned
+
+def perform_retraining(X, labels, columns, keys, strategy=RETRAIN_STRATEGY, path=CLASSIFIER_FILE):
+    """
+    Refreshes the saved classifier instead of training from random initialization:
+    "warm_start" refits LogisticRegression on all training rows starting from the
+    previous coefficients (a few iterations when the data changed little);
+    "partial_fit" runs SGD epochs on the rows the previous model has not seen only.
+    The new and the previous model are scored on the fixed holdout (holdout_mask)
+    and the new one replaces the saved file only if it is not worse (RETRAIN_TOLERANCE).
+    Without a usable previous model (none saved, other strategy or other classes)
+    the model is trained from scratch.
+    Returns the holdout accuracy of the model kept.
+    """
+    from sklearn.linear_model import LogisticRegression, SGDClassifier
+    from sklearn.metrics import accuracy_score
+
+    print(f"Starting Retraining ({strategy}, model file {path})...")
+
+    # 1. Fixed holdout / training rows
+    is_holdout = holdout_mask(keys)
+    train_idx, holdout_idx = np.flatnonzero(~is_holdout), np.flatnonzero(is_holdout)
+    assert len(train_idx) > 0 and len(holdout_idx) > 0, "Error: The holdout split left an empty train or holdout set."
+    X_holdout, y_holdout = np.asarray(X[holdout_idx]), labels[holdout_idx]
+    classes = np.unique(labels[train_idx])
+
+    previous = load_classifier(path)
+    warm = (previous is not None and previous["strategy"] == strategy
+            and list(previous["classes"]) == list(classes))
+    if previous is not None and not warm:
+        print("The saved model cannot be continued (other strategy or classes): training from scratch.")
+    seen = previous["trained_keys"] if warm else np.zeros(0, dtype=np.uint64)
+    new_rows = train_idx[~np.isin(keys[train_idx], seen)]
+    print(f"Training rows: {len(train_idx)} ({len(new_rows)} new), holdout rows: {len(holdout_idx)}.")
+
+    # 2. Train from the previous state
+    start = time.perf_counter()
+    if strategy == "warm_start":
+        model = LogisticRegression(max_iter=1000, random_state=SEED, warm_start=warm)
+        if warm:
+            init = align_model(previous["model"], previous["columns"], columns)
+            model.coef_, model.intercept_ = init.coef_, init.intercept_
+        model.fit(X[train_idx], labels[train_idx])
+        detail = f"{int(np.max(model.n_iter_))} iterations"
+    elif strategy == "partial_fit":
+        if warm:
+            model = align_model(previous["model"], previous["columns"], columns)
+        else:
+            model = SGDClassifier(loss='log_loss', random_state=SEED)
+        rng = np.random.default_rng(SEED)
+        for _ in range(RETRAIN_EPOCHS if len(new_rows) else 0):
+            order = rng.permutation(new_rows)
+            for batch in range(0, len(order), STREAM_CHUNK_SIZE):
+                rows = np.sort(order[batch:batch + STREAM_CHUNK_SIZE])
+                model.partial_fit(X[rows], labels[rows], classes=classes)
+        detail = f"{RETRAIN_EPOCHS if len(new_rows) else 0} epochs over {len(new_rows)} rows"
+    else:
+        raise ValueError(f"Unknown RETRAIN_STRATEGY '{strategy}'.")
+    fit_time = time.perf_counter() - start
+
+    # 3. Compare with the previous model on the same holdout
+    accuracy = accuracy_score(y_holdout, model.predict(X_holdout))
+    print("\n Validation Results ")
+    print(f"Chosen Metric: Accuracy")
+    print(f"New model:      holdout accuracy {accuracy:.4f} ({detail}, {fit_time:.2f}s)")
+    if previous is not None:
+        previous_model = align_model(previous["model"], previous["columns"], columns)
+        previous_accuracy = accuracy_score(y_holdout, previous_model.predict(X_holdout))
+        print(f"Previous model: holdout accuracy {previous_accuracy:.4f} (saved {previous['saved_at']})")
+        if accuracy < previous_accuracy - RETRAIN_TOLERANCE:
+            print(f"The new model is worse: keeping {path}.")
+            return previous_accuracy
+
+    # 4. Replace the saved model
+    save_classifier({
+        "version": CLASSIFIER_VERSION,
+        "strategy": strategy,
+        "model": model,
+        "columns": list(columns),
+        "classes": list(classes),
+        "trained_keys": np.union1d(seen, keys[train_idx]),
+        "holdout_accuracy": accuracy,
+        "saved_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+    }, path)
+    record_write(path)
+    print(f"Saved the new model to {path}")
+    return accuracy
+
+@instrumented("validation")
 def main():
     # Ensure reproducibility
     np.random.seed(SEED)
     
     input_path = Path(INPUT_FILE)
+    
+    # Streaming mode never loads the whole feature file
+    if VALIDATION_MODE == "streaming":
+        with span("streaming_validation"):
+            perform_streaming_validation(input_path, STREAM_CHUNK_SIZE, STREAM_EPOCHS)
+        record_read(input_path)
+        return
 
-    df = pd.read_csv(input_path)
+    # A feature store is memory-mapped (no parsing, no copy); a CSV is parsed once
+    with span("load_features"):
+        X, labels, columns = feature_arrays(input_path)
+    record_read(input_path, rows=len(labels))
     
-    # Check if the dataframe is empty after all filtering steps
-    if df.empty:
+    # Check if the dataset is empty after all filtering steps
+    if len(labels) == 0:
         print("Error: Dataset is empty after feature selection.")
         return
 
-    perform_validation(df)
+    if VALIDATION_MODE == "time":
+        with span("feature_dates"):
+            dates, n_dated = feature_dates(Path(PARTITIONS_DIR), ROWS_FILE, len(labels), TIME_WINDOW)
+        record_read(PARTITIONS_DIR, rows=n_dated)
+        with span("time_validation"):
+            perform_time_validation(X, labels, dates, Path(PARTITIONS_DIR), TIME_SPLIT_DATE, TIME_WINDOW)
+    elif VALIDATION_MODE == "retrain":
+        with span("document_keys"):
+            keys = document_keys(DOCUMENTS_FILE, DOCUMENTS_SPEC, len(labels))
+        record_read(DOCUMENTS_FILE, rows=len(keys))
+        with span("retraining"):
+            perform_retraining(X, labels, columns, keys, RETRAIN_STRATEGY)
+    elif VALIDATION_MODE == "kfold":
+        with span("cross_validation"):
+            perform_cross_validation(X, labels, N_SPLITS, N_REPEATS, N_JOBS,
+                                     store_path=input_path if is_store(input_path) else None)
+    else:
+        with span("holdout_validation"):
+            perform_validation(X, labels)
 
 if __name__ == "__main__":
     main()
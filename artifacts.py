@@ -0,0 +1,50 @@
+import os
+import json
+import time
+from pathlib import Path
+
+# --- Configuration ---
+# pipeline.py sets these variables for every stage it runs. When they are unset
+# (a stage script run by hand), artifacts are plain file names in the working
+# directory, exactly as before.
+RUN_DIR_ENV = "PIPELINE_RUN_DIR"
+BRANCH_ENV = "PIPELINE_BRANCH"
+
+# Artifacts produced before the KB / TF-IDF split are shared by both branches
+SHARED_ARTIFACTS = {"sensed_data.csv", "preprocessed_data.csv", "segmented_data.csv",
+                    "sensed_partitions", "preprocessed_partitions", "token_ids.npz", "segmented_ids.npz",
+                    "segmented_rows.npy", "segment_spec.json"}
+SHARED_NAMESPACE = "shared"
+MANIFEST_FILE = "manifest.json"
+
+
+def resolve_artifact(name, run_dir=None, branch=None):
+    """
+    Physical location of an artifact:
+    <run_dir>/shared/<name> for shared artifacts, <run_dir>/<branch>/<name> otherwise.
+    Without a run directory the bare name is returned.
+    """
+    if not run_dir:
+        return name
+    namespace = SHARED_NAMESPACE if name in SHARED_ARTIFACTS or not branch else branch
+    return str(Path(run_dir) / namespace / name)
+
+
+def artifact_path(name):
+    """Location of an artifact for the stage currently running (see resolve_artifact)."""
+    return resolve_artifact(name, os.environ.get(RUN_DIR_ENV), os.environ.get(BRANCH_ENV))
+
+
+def load_manifest(run_dir):
+    path = Path(run_dir) / MANIFEST_FILE
+    if not path.exists():
+        return {"artifacts": {}, "stages": {}}
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def write_manifest(run_dir, manifest):
+    """Writes the run manifest (which stage produced which artifact, with fingerprints)."""
+    manifest["updated_at"] = time.strftime("%Y-%m-%d %H:%M:%S")
+    path = Path(run_dir) / MANIFEST_FILE
+    path.write_text(json.dumps(manifest, indent=1, sort_keys=True), encoding="utf-8")
+    return path
@@ -0,0 +1,308 @@
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import datetime
+import subprocess
+import numpy as np
+from pathlib import Path
+from data_collection import ArticleWriter, SECTIONS_TO_FETCH
+from feature_extraction import SPORT_KEYWORDS, POLITICS_KEYWORDS, CULTURE_KEYWORDS, NEWS_KEYWORDS
+from pipeline import build_dag, branch_stages, stage_command, stage_env, SHARED_STAGES, BRANCHES, CODE_DIR
+from instrumentation import path_size
+
+# --- Configuration ---
+SIZES = [1_000, 10_000, 100_000, 1_000_000]   # Corpus sizes (articles)
+DEFAULT_SIZES = [1_000, 10_000]
+WORK_DIR = Path("bench")                       # Generated corpora and stage artifacts
+RESULTS_FILE = Path("benchmark_results.json")  # One entry per benchmark run
+SEED = 42
+IMPORT_REPEATS = 5     # Fresh interpreters per module in the import-time benchmark
+CORPUS_VERSION = 1     # Bump when the generator changes its output
+
+# Synthetic text model
+VOCAB_SIZE = 20_000    # Pseudo-words shared by all sections (Zipf distributed)
+TOPIC_WORDS = 300      # Extra words specific to each section
+TOPIC_FRACTION = 0.12  # Share of an article's words drawn from its section's topic words
+MIN_BODY_WORDS, MAX_BODY_WORDS = 200, 1200
+SYLLABLES = ["ba", "ce", "di", "fo", "gu", "ha", "je", "ki", "lo", "mu", "na", "pe",
+             "ri", "so", "tu", "va", "we", "xi", "yo", "za", "bre", "cla", "dro", "fli",
+             "gra", "ple", "sto", "tri", "ent", "ion", "ous", "ing"]
+BYLINES = ["Jane Smith", "Ahmed Khan", "Maria Garcia", "Tom Brown", "Yuki Tanaka",
+           "Chloe Martin", "David Cohen", "Priya Patel", "Unknown Author"]
+SECTION_KEYWORDS = {
+    "news": NEWS_KEYWORDS,
+    "sport": SPORT_KEYWORDS,
+    "culture": CULTURE_KEYWORDS,
+    "opinion": POLITICS_KEYWORDS,
+}
+
+
+def make_vocabulary(rng, size):
+    """Deterministic pseudo-words built from syllables (unique, alphabetic, > 2 letters)."""
+    words = set()
+    while len(words) < size:
+        n_syllables = rng.integers(2, 5)
+        words.add("".join(rng.choice(SYLLABLES, n_syllables)))
+    return sorted(words)
+
+
+def zipf_probabilities(n, exponent=1.1):
+    weights = 1.0 / np.arange(1, n + 1) ** exponent
+    return weights / weights.sum()
+
+
+def generate_corpus(root, n_articles, seed=SEED):
+    """
+    Writes n_articles synthetic Guardian-like articles to <root>/data/<section>/*.txt,
+    through data_collection.ArticleWriter, so the files have exactly the header
+    format of the real collectors. The output depends only on (n_articles, seed).
+    Returns the number of corpus bytes.
+    """
+    root = Path(root)
+    marker = root / "corpus.json"
+    expected = {"n_articles": n_articles, "seed": seed, "version": CORPUS_VERSION}
+    if marker.exists() and json.loads(marker.read_text(encoding="utf-8")).get("spec") == expected:
+        print(f"Reusing synthetic corpus of {n_articles} articles in {root}")
+        return json.loads(marker.read_text(encoding="utf-8"))["bytes"]
+
+    if (root / "data").exists():
+        shutil.rmtree(root / "data")
+
+    rng = np.random.default_rng(seed)
+    vocabulary = np.array(make_vocabulary(rng, VOCAB_SIZE))
+    general_p = zipf_probabilities(len(vocabulary))
+
+    # Every section: its knowledge-base keywords plus its own slice of pseudo-words
+    topics = {}
+    for config in SECTIONS_TO_FETCH:
+        folder = config["folder"]
+        own_words = vocabulary[rng.permutation(len(vocabulary))[:TOPIC_WORDS]]
+        words = np.array(sorted(SECTION_KEYWORDS[folder])) if folder in SECTION_KEYWORDS else np.array([], dtype=str)
+        topics[folder] = np.concatenate([words, own_words])
+
+    start_date = datetime.date(2023, 1, 1)
+    print(f"Generating {n_articles} synthetic articles in {root / 'data'}...")
+    with ArticleWriter(root / "data") as writer:
+        for i in range(n_articles):
+            config = SECTIONS_TO_FETCH[rng.integers(len(SECTIONS_TO_FETCH))]
+            folder = config["folder"]
+            topic = topics[folder]
+
+            n_words = rng.integers(MIN_BODY_WORDS, MAX_BODY_WORDS)
+            n_topic = int(n_words * TOPIC_FRACTION)
+            body_words = np.concatenate([
+                rng.choice(vocabulary, n_words - n_topic, p=general_p),
+                rng.choice(topic, n_topic),
+            ])[rng.permutation(n_words)]
+            title_words = rng.choice(topic, rng.integers(3, 7)).tolist() + rng.choice(vocabulary, 4, p=general_p).tolist()
+
+            date = start_date + datetime.timedelta(days=int(rng.integers(0, 730)))
+            slug = "-".join(title_words[:4])
+            article_id = f"{config['api_section']}/{date:%Y/%b/%d}/{slug}-{i}".lower()
+            article = {
+                "id": article_id,
+                "sectionName": folder.title(),
+                "webPublicationDate": f"{date.isoformat()}T{rng.integers(0, 24):02d}:00:00Z",
+                "webUrl": f"https://www.theguardian.com/{article_id}",
+                "webTitle": " ".join(title_words).capitalize(),
+                "fields": {
+                    "headline": " ".join(title_words).capitalize(),
+                    "byline": BYLINES[rng.integers(len(BYLINES))],
+                    "bodyText": " ".join(body_words).capitalize() + ".",
+                },
+            }
+            writer.submit(article, folder)
+
+    n_bytes = sum(path.stat().st_size for path in (root / "data").rglob("*.txt"))
+    marker.write_text(json.dumps({"spec": expected, "bytes": n_bytes}), encoding="utf-8")
+    return n_bytes
+
+
+def run_timed(command, cwd, env, log_path):
+    """
+    Runs a stage process and returns (exit code, wall seconds, CPU seconds, peak RSS in MB).
+    os.wait4 gives the resource usage of this one child, not of all children.
+    """
+    start = time.perf_counter()
+    with open(log_path, "w", encoding="utf-8") as log:
+        process = subprocess.Popen(command, cwd=cwd, env=env, stdout=log, stderr=subprocess.STDOUT)
+        _, status, usage = os.wait4(process.pid, 0)
+    wall = time.perf_counter() - start
+    process.returncode = os.waitstatus_to_exitcode(status)
+
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    rss_mb = usage.ru_maxrss / (2 ** 20 if sys.platform == "darwin" else 1024)
+    return process.returncode, wall, usage.ru_utime + usage.ru_stime, rss_mb
+
+
+def benchmark_size(n_articles, work_dir=WORK_DIR):
+    """
+    Generates (or reuses) a corpus of n_articles and times every pipeline stage on it,
+    one stage at a time, so each measurement is isolated.
+    """
+    root = (Path(work_dir) / f"corpus_{n_articles}").resolve()
+    root.mkdir(parents=True, exist_ok=True)
+
+    start = time.perf_counter()
+    corpus_bytes = generate_corpus(root, n_articles)
+    generation_s = time.perf_counter() - start
+
+    run_dir = root / "run"
+    if run_dir.exists():
+        shutil.rmtree(run_dir)
+    (run_dir / "logs").mkdir(parents=True)
+
+    stages, _ = build_dag(run_dir=run_dir)
+    results = []
+    for stage in stages:
+        for path in stage["outputs"]:
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+
+        env = stage_env(stage, run_dir, max_parallel=1)   # Stages are timed one at a time
+        env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(CODE_DIR), env.get("PYTHONPATH")]))
+        code, wall, cpu, rss_mb = run_timed(stage_command(stage), root, env, run_dir / "logs" / f"{stage['name']}.log")
+
+        # Directory outputs (feature stores, partitions) count every file under them
+        output_bytes = sum(path_size(path) for path in stage["outputs"] if Path(path).exists())
+        report_path = Path(env["INSTRUMENT_DIR"]) / f"{stage['name']}.json"
+        report = json.loads(report_path.read_text(encoding="utf-8")) if report_path.exists() else {}
+        results.append({
+            "stage": stage["name"],
+            "ok": code == 0,
+            "wall_s": round(wall, 3),
+            "cpu_s": round(cpu, 3),
+            "peak_rss_mb": round(rss_mb, 1),
+            "docs_per_s": round(n_articles / wall, 1) if wall > 0 else None,
+            "output_bytes": output_bytes,
+            "spans": report.get("spans", {}),   # Per-step breakdown from instrumentation.py
+        })
+        print(f"  {stage['name']:30s} {'ok' if code == 0 else 'FAILED':6s} {wall:8.2f}s "
+              f"{rss_mb:8.1f} MB {n_articles / wall:10.1f} docs/s")
+
+    return {
+        "n_articles": n_articles,
+        "corpus_bytes": corpus_bytes,
+        "generation_s": round(generation_s, 3),
+        "stages": results,
+    }
+
+
+def import_time_ms(module):
+    """
+    Cumulative import time of a module in a fresh interpreter, from python -X importtime
+    (median of IMPORT_REPEATS runs). Also returns its heaviest direct imports.
+    """
+    totals, packages = [], {}
+    for _ in range(IMPORT_REPEATS):
+        result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                                cwd=CODE_DIR, capture_output=True, text=True, check=True)
+        # import time: self [us] | cumulative | imported package (indented by nesting depth)
+        rows = []
+        for line in result.stderr.splitlines():
+            fields = line.split("|")
+            if len(fields) == 3 and fields[1].strip().isdigit():
+                name = fields[2].rstrip()
+                rows.append((len(name) - len(name.lstrip()), name.strip(), int(fields[1]) / 1000))
+
+        # A module's imports are listed right before it, one nesting level deeper
+        position = next(i for i, row in enumerate(rows) if row[1] == module)
+        depth = rows[position][0]
+        totals.append(rows[position][2])
+        for child_depth, name, cumulative in reversed(rows[:position]):
+            if child_depth <= depth:
+                break
+            if child_depth == depth + 2:
+                packages.setdefault(name, []).append(cumulative)
+
+    heaviest = sorted(((name, float(np.median(times))) for name, times in packages.items()),
+                      key=lambda item: item[1], reverse=True)[:5]
+    return float(np.median(totals)), heaviest
+
+
+def benchmark_imports():
+    """Import time of every stage module (what a short run or an importing service pays)."""
+    stages = SHARED_STAGES + [stage for branch in BRANCHES for stage in branch_stages(branch)]
+    modules = sorted({stage["module"] for stage in stages} | {"inference", "prediction_server"})
+    results = {}
+    for module in modules:
+        total_ms, heaviest = import_time_ms(module)
+        results[module] = round(total_ms, 1)
+        print(f"  {module:30s} {total_ms:8.1f} ms   "
+              + ", ".join(f"{name} {ms:.0f}" for name, ms in heaviest))
+    return results
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=CODE_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def load_results(path=RESULTS_FILE):
+    path = Path(path)
+    return json.loads(path.read_text(encoding="utf-8")) if path.exists() else []
+
+
+def compare_runs(runs, baseline=-2, candidate=-1):
+    """Prints per-stage wall-time ratios between two recorded runs (candidate / baseline)."""
+    base, new = runs[baseline], runs[candidate]
+    print(f"Comparing {base.get('commit')} ({base['timestamp']}) -> {new.get('commit')} ({new['timestamp']})")
+    for module, ms in new.get("imports", {}).items():
+        if base.get("imports", {}).get(module):
+            print(f"{'import':>9} {module:30s} {base['imports'][module]:8.1f}ms -> {ms:8.1f}ms "
+                  f"(x{ms / base['imports'][module]:.2f})")
+
+    base_times = {(r["n_articles"], s["stage"]): s["wall_s"] for r in base["results"] for s in r["stages"]}
+    for result in new["results"]:
+        for stage in result["stages"]:
+            key = (result["n_articles"], stage["stage"])
+            if key in base_times and base_times[key] > 0:
+                print(f"{key[0]:>9} {key[1]:30s} {base_times[key]:8.2f}s -> {stage['wall_s']:8.2f}s "
+                      f"(x{stage['wall_s'] / base_times[key]:.2f})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="End-to-end pipeline benchmark on synthetic corpora.")
+    parser.add_argument("--sizes", nargs="+", type=int, default=DEFAULT_SIZES,
+                        help=f"Corpus sizes in articles (standard sizes: {SIZES})")
+    parser.add_argument("--work-dir", type=Path, default=WORK_DIR)
+    parser.add_argument("--results", type=Path, default=RESULTS_FILE)
+    parser.add_argument("--compare", action="store_true", help="Compare the last two recorded runs and exit")
+    parser.add_argument("--imports", action="store_true", help="Only measure the import time of the stage modules")
+    args = parser.parse_args()
+
+    runs = load_results(args.results)
+    if args.compare:
+        if len(runs) < 2:
+            print("Need at least two recorded runs to compare.")
+            return
+        compare_runs(runs)
+        return
+
+    run = {
+        "commit": git_commit(),
+        "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "results": [],
+    }
+    print("\n Import times (python -X importtime) ")
+    run["imports"] = benchmark_imports()
+
+    for n_articles in ([] if args.imports else args.sizes):
+        print(f"\n Benchmark: {n_articles} articles ")
+        run["results"].append(benchmark_size(n_articles, args.work_dir))
+
+    runs.append(run)
+    args.results.write_text(json.dumps(runs, indent=1), encoding="utf-8")
+    print(f"\nSuccessfully saved benchmark results to {args.results}")
+
+if __name__ == "__main__":
+    main()
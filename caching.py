@@ -0,0 +1,68 @@
+import hashlib
+from pathlib import Path
+
+# --- Configuration ---
+CACHE_DIR = Path(".cache")
+READ_BLOCK_SIZE = 1 << 20   # 1 MB blocks when hashing files
+
+
+def file_fingerprint(path):
+    """
+    Returns a content fingerprint (SHA-256 hex digest) of a file.
+    The file is hashed in fixed-size blocks, so memory use does not depend on its size.
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(READ_BLOCK_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def directory_fingerprint(path, pattern="**/*"):
+    """
+    Returns a fingerprint of a directory tree from the relative path, size and
+    modification time of every file. Unlike file_fingerprint it does not read
+    file contents, so it stays cheap for corpora of many small files.
+    """
+    digest = hashlib.sha256()
+    root = Path(path)
+    for file_path in sorted(p for p in root.glob(pattern) if p.is_file()):
+        stat = file_path.stat()
+        digest.update(f"{file_path.relative_to(root).as_posix()}|{stat.st_size}|{stat.st_mtime_ns}\n".encode("utf-8"))
+    return digest.hexdigest()
+
+
+def directory_content_fingerprint(path, pattern="**/*"):
+    """
+    Returns a fingerprint of a directory tree from the relative path and content
+    (file_fingerprint) of every file. A directory rewritten with identical bytes
+    keeps its fingerprint.
+    """
+    digest = hashlib.sha256()
+    root = Path(path)
+    for file_path in sorted(p for p in root.glob(pattern) if p.is_file()):
+        digest.update(f"{file_path.relative_to(root).as_posix()}|{file_fingerprint(file_path)}\n".encode("utf-8"))
+    return digest.hexdigest()
+
+
+def path_fingerprint(path, content=False):
+    """
+    Fingerprint of a file (content) or a directory (listing, or every file's content
+    with content=True), None if it does not exist.
+    """
+    path = Path(path)
+    if path.is_dir():
+        return directory_content_fingerprint(path) if content else directory_fingerprint(path)
+    if path.is_file():
+        return file_fingerprint(path)
+    return None
+
+
+def cache_path(namespace, key, suffix):
+    """
+    Builds the path of a cache entry: .cache/<namespace>/<key><suffix>.
+    The namespace directory is created on first use.
+    """
+    out_dir = CACHE_DIR / namespace
+    out_dir.mkdir(parents=True, exist_ok=True)
+    return out_dir / f"{key}{suffix}"
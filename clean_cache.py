@@ -0,0 +1,122 @@
+import json
+import time
+import sqlite3
+import hashlib
+import pandas as pd
+from caching import cache_path
+
+# --- Configuration ---
+CACHE_NAMESPACE = "clean_text"
+MAX_CACHE_BYTES = 512 * 2 ** 20   # Cleaned text kept on disk; least recently used entries are evicted beyond this
+LOOKUP_BATCH = 500                # Keys per SELECT ... IN (...) (below SQLite's variable limit)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS cleaned (
+    key       BLOB PRIMARY KEY,   -- SHA-256 of (clean_text config, raw text)
+    text      TEXT NOT NULL,      -- clean_text output
+    size      INTEGER NOT NULL,   -- bytes of the cleaned text
+    last_used REAL NOT NULL       -- for least-recently-used eviction
+);
+CREATE INDEX IF NOT EXISTS cleaned_last_used ON cleaned (last_used);
+"""
+
+
+class CleanTextCache:
+    """
+    Persistent, content-addressed cache of clean_text results.
+    The key covers the text and the whole cleaning config (including its version),
+    so editing an article or bumping CLEAN_TEXT_VERSION both miss the cache.
+    Usage:
+        with CleanTextCache(CLEAN_TEXT_CONFIG) as cache:
+            df['CleanedBody'] = cache.clean_series(df['BodyText'], clean_text)
+        print(cache.hit_rate)
+    """
+
+    def __init__(self, config, path=None, max_bytes=MAX_CACHE_BYTES):
+        self.path = path or cache_path(CACHE_NAMESPACE, "cache", ".sqlite")
+        self.max_bytes = max_bytes
+        self.prefix = hashlib.sha256(json.dumps(config, sort_keys=True).encode("utf-8")).digest()
+        self.conn = sqlite3.connect(self.path)
+        self.conn.executescript(SCHEMA)
+        self.hits = 0
+        self.misses = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    @property
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def key(self, text):
+        return hashlib.sha256(self.prefix + text.encode("utf-8")).digest()
+
+    def lookup(self, keys):
+        """Returns {key: cleaned text} for the keys present in the cache."""
+        found = {}
+        for start in range(0, len(keys), LOOKUP_BATCH):
+            batch = keys[start:start + LOOKUP_BATCH]
+            sql = f"SELECT key, text FROM cleaned WHERE key IN ({', '.join('?' * len(batch))})"
+            found.update(self.conn.execute(sql, batch).fetchall())
+        return found
+
+    def clean_series(self, texts, clean_fn):
+        """
+        Applies clean_fn to a Series of texts, calling it only for texts not in the cache
+        (each distinct text once). Non-string values are passed to clean_fn unchanged.
+        """
+        is_text = texts.map(lambda value: isinstance(value, str))
+        keys = texts[is_text].map(self.key)
+        unique_keys = list(dict.fromkeys(keys))
+        found = self.lookup(unique_keys)
+
+        # Clean the missing texts (first occurrence of each key)
+        now = time.time()
+        new_entries = []
+        first_text = dict(zip(keys, texts[is_text])) if len(found) < len(unique_keys) else {}
+        for key in unique_keys:
+            if key not in found:
+                cleaned = clean_fn(first_text[key])
+                found[key] = cleaned
+                new_entries.append((key, cleaned, len(cleaned.encode("utf-8")), now))
+
+        self.misses += len(new_entries)
+        self.hits += len(keys) - len(new_entries)
+
+        with self.conn:
+            self.conn.executemany("INSERT OR REPLACE INTO cleaned VALUES (?, ?, ?, ?)", new_entries)
+            self.conn.executemany("UPDATE cleaned SET last_used = ? WHERE key = ?",
+                                  [(now, key) for key in unique_keys])
+
+        result = pd.Series(index=texts.index, dtype=object)
+        result[is_text] = [found[key] for key in keys]
+        if not is_text.all():
+            result[~is_text] = texts[~is_text].map(clean_fn)
+        return result
+
+    def evict(self):
+        """Drops least recently used entries until the cache fits in max_bytes. Returns the number dropped."""
+        total = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM cleaned").fetchone()[0]
+        if total <= self.max_bytes:
+            return 0
+
+        dropped, excess = [], total - self.max_bytes
+        for key, size in self.conn.execute("SELECT key, size FROM cleaned ORDER BY last_used"):
+            if excess <= 0:
+                break
+            dropped.append((key,))
+            excess -= size
+        with self.conn:
+            self.conn.executemany("DELETE FROM cleaned WHERE key = ?", dropped)
+        self.conn.execute("VACUUM")
+        return len(dropped)
+
+    def close(self):
+        if self.conn is not None:
+            self.evict()
+            self.conn.close()
+            self.conn = None
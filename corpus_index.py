@@ -0,0 +1,201 @@
+import os
+import sqlite3
+import hashlib
+import pandas as pd
+from pathlib import Path
+
+# --- Configuration ---
+DATA_DIR = Path("data")
+INDEX_FILE = Path("corpus_index.sqlite")   # Kept outside DATA_DIR, so indexing does not change the corpus fingerprint
+HEADER_SEPARATOR = "-" * 60                 # Same separator as data_collection
+METADATA_COLUMNS = ["id", "section", "section_name", "date", "byline", "title", "url"]
+
+# Usage:
+#   python corpus_index.py                      -> update the index, print per-section and per-month counts
+#   query_articles(conn, sections=["sport"], date_from="2024-03-01", date_to="2024-03-31")
+#   load_bodies(rows)                            -> only the selected bodies are read from disk
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS articles (
+    id           TEXT PRIMARY KEY,   -- file name without .txt (the API ID with '/' -> '_')
+    path         TEXT NOT NULL,      -- relative to the data directory
+    section      TEXT NOT NULL,      -- folder name, used as the Label
+    section_name TEXT,               -- section name from the header
+    date         TEXT,               -- publication date, YYYY-MM-DD
+    byline       TEXT,
+    title        TEXT,
+    url          TEXT,
+    body_offset  INTEGER,            -- byte range of the (stripped) body; NULL if the file is malformed
+    body_length  INTEGER,
+    body_hash    TEXT,               -- SHA-256 of the body bytes
+    mtime_ns     INTEGER NOT NULL,   -- file stat at indexing time, to detect changes
+    size         INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS articles_section_date ON articles (section, date);
+CREATE INDEX IF NOT EXISTS articles_date ON articles (date);
+"""
+
+
+def open_index(index_file=INDEX_FILE):
+    """Opens (and creates if needed) the index database."""
+    conn = sqlite3.connect(index_file)
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def parse_article(raw):
+    """
+    Parses the bytes of an article file into its metadata and the byte range of its body.
+    The body range matches what sensing extracts: the text after the separator, stripped.
+    Returns None if the header separator is missing.
+    """
+    separator = HEADER_SEPARATOR.encode("utf-8")
+    position = raw.find(separator)
+    if position < 0:
+        return None
+
+    body_start = position + len(separator)
+    for newline in (b"\r\n", b"\n"):
+        if raw.startswith(newline, body_start):
+            body_start += len(newline)
+            break
+
+    # Header lines: "The Guardian | <section> | <date>", "By <byline>", url, "", title
+    header_lines = raw[:position].decode("utf-8").strip().splitlines()
+    first = header_lines[0].split(" | ") if header_lines else []
+    metadata = {
+        "section_name": first[1].strip() if len(first) > 1 else None,
+        "date": first[2].strip() if len(first) > 2 else None,
+        "byline": header_lines[1].replace('By ', '').strip() if len(header_lines) > 1 else 'Unknown Author',
+        "url": header_lines[2].strip() if len(header_lines) > 2 else 'N/A',
+        "title": header_lines[4].strip() if len(header_lines) > 4 else 'Untitled',
+    }
+
+    body = raw[body_start:].decode("utf-8")
+    stripped = body.strip()
+    leading = len(body[:len(body) - len(body.lstrip())].encode("utf-8"))
+    body_bytes = stripped.encode("utf-8")
+    metadata.update({
+        "body_offset": body_start + leading,
+        "body_length": len(body_bytes),
+        "body_hash": hashlib.sha256(body_bytes).hexdigest(),
+    })
+    return metadata
+
+
+def scan_corpus(data_dir=DATA_DIR):
+    """Yields (id, relative path, section, stat) for every article file, without reading it."""
+    data_dir = Path(data_dir)
+    for section_entry in os.scandir(data_dir):
+        if not section_entry.is_dir():
+            continue
+        for entry in os.scandir(section_entry.path):
+            if entry.is_file() and entry.name.endswith(".txt"):
+                yield entry.name[:-4], f"{section_entry.name}/{entry.name}", section_entry.name, entry.stat()
+
+
+def update_index(conn, data_dir=DATA_DIR):
+    """
+    Brings the index up to date with the corpus. Only new or modified files
+    (by size and mtime) are read; rows of deleted files are removed.
+    Returns the number of added, updated and removed articles.
+    """
+    data_dir = Path(data_dir)
+    known = {row[0]: (row[1], row[2]) for row in conn.execute("SELECT id, mtime_ns, size FROM articles")}
+
+    rows, seen = [], set()
+    added = updated = 0
+    for article_id, rel_path, section, stat in scan_corpus(data_dir):
+        seen.add(article_id)
+        if known.get(article_id) == (stat.st_mtime_ns, stat.st_size):
+            continue
+
+        try:
+            metadata = parse_article((data_dir / rel_path).read_bytes()) or {}
+        except (OSError, UnicodeDecodeError) as e:
+            # Indexed without a body range, like a file without separator (see skipped_articles)
+            print(f"Error reading {rel_path}: {e}")
+            metadata = {}
+        rows.append((
+            article_id, rel_path, section, metadata.get("section_name"), metadata.get("date"),
+            metadata.get("byline"), metadata.get("title"), metadata.get("url"),
+            metadata.get("body_offset"), metadata.get("body_length"), metadata.get("body_hash"),
+            stat.st_mtime_ns, stat.st_size,
+        ))
+        if article_id in known:
+            updated += 1
+        else:
+            added += 1
+
+    removed = [(article_id,) for article_id in known.keys() - seen]
+    with conn:
+        conn.executemany("INSERT OR REPLACE INTO articles VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+        conn.executemany("DELETE FROM articles WHERE id = ?", removed)
+
+    return added, updated, len(removed)
+
+
+def skipped_articles(conn):
+    """Relative paths of the indexed files that are not well-formed articles (no body range)."""
+    return [row[0] for row in conn.execute("SELECT path FROM articles WHERE body_length IS NULL ORDER BY path")]
+
+
+def query_articles(conn, sections=None, date_from=None, date_to=None, columns=METADATA_COLUMNS):
+    """
+    Selects well-formed articles by section and publication date (inclusive, YYYY-MM-DD).
+    Returns a DataFrame of the requested metadata columns plus path/body_offset/body_length,
+    ordered by path, so load_bodies can read just these articles.
+    """
+    conditions, params = ["body_length IS NOT NULL"], []
+    if sections:
+        conditions.append(f"section IN ({', '.join('?' * len(sections))})")
+        params.extend(sections)
+    if date_from:
+        conditions.append("date >= ?")
+        params.append(date_from)
+    if date_to:
+        conditions.append("date <= ?")
+        params.append(date_to)
+
+    selected = ", ".join(list(columns) + ["path", "body_offset", "body_length"])
+    sql = f"SELECT {selected} FROM articles WHERE {' AND '.join(conditions)} ORDER BY path"
+    return pd.read_sql_query(sql, conn, params=params)
+
+
+def section_counts(conn, by_month=False):
+    """Article counts per section (and per month) straight from the index."""
+    group = "section, substr(date, 1, 7) AS month" if by_month else "section"
+    keys = "section, month" if by_month else "section"
+    sql = f"SELECT {group}, COUNT(*) AS articles FROM articles WHERE body_length IS NOT NULL GROUP BY {keys} ORDER BY {keys}"
+    return pd.read_sql_query(sql, conn)
+
+
+def load_bodies(rows, data_dir=DATA_DIR):
+    """
+    Reads the bodies of the selected rows (from query_articles) by seeking to their
+    byte range; nothing else of the file is read. Newlines are normalized as in
+    Path.read_text, so the text equals what sensing extracts from the whole file.
+    """
+    data_dir = Path(data_dir)
+    bodies = []
+    for rel_path, offset, length in zip(rows["path"], rows["body_offset"], rows["body_length"]):
+        with open(data_dir / rel_path, "rb") as f:
+            f.seek(int(offset))
+            body = f.read(int(length)).decode("utf-8")
+        bodies.append(body.replace("\r\n", "\n").replace("\r", "\n"))
+    return bodies
+
+
+def main():
+    conn = open_index()
+    added, updated, removed = update_index(conn)
+    print(f"Index {INDEX_FILE}: {added} added, {updated} updated, {removed} removed.")
+
+    print("\n Articles per section ")
+    print(section_counts(conn).to_string(index=False))
+    print("\n Articles per section and month ")
+    print(section_counts(conn, by_month=True).to_string(index=False))
+    conn.close()
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,7 @@
+import json
+import queue
+import threading
+import collections
 import requests
 from pathlib import Path
 
@@ -6,6 +10,22 @@ API_KEY = "924e9425-113e-4278-ba12-b656edcc21fe"
 BASE_URL = "https://content.guardianapis.com/search"
 MAX_PAGES = 100   # Maximum number of pages to pull per section
 PAGE_SIZE = 50    # Number of articles per page
+DATA_DIR = Path("data")   # Root folder of the saved articles
+
+# Collection mode:
+#   "full"      - every page is requested with its bodies (headline, byline, bodyText)
+#   "two_phase" - 1. page through a lightweight ID/date listing (no fields)
+#                 2. fetch the fields only for articles not yet on disk, in bulk with the 'ids' filter
+# Both cover the same window: the newest MAX_PAGES * PAGE_SIZE articles of each section.
+COLLECTION_MODE = "two_phase"
+LIST_PAGE_SIZE = 200    # Listing results per request (the API maximum)
+IDS_PER_REQUEST = 50    # Article IDs per bulk fetch (keeps the URL short)
+ARTICLE_FIELDS = "headline,byline,bodyText"
+SKIPPED_FILE = Path("collection_skipped.json")   # Listed IDs without body text, per section (outside DATA_DIR, like the corpus index)
+
+# Disk writer (runs next to the network loop)
+WRITE_QUEUE_SIZE = 500   # Articles waiting to be written; when full, the fetcher waits (back-pressure)
+WRITE_BATCH_SIZE = 100   # Articles the writer takes off the queue at once
 
 # Configuration List: Maps the API section name to the local folder name
 SECTIONS_TO_FETCH = [
@@ -15,16 +35,17 @@ SECTIONS_TO_FETCH = [
     {"api_section": "commentisfree", "folder": "opinion"} 
 ]
 
-def save_article(article, folder_name):
+def format_article(article, folder_name):
     """
-    Saves a single article to a text file in the specified folder.
+    Builds the text file of an article (header + body).
+    Returns (file name, content), or None for an article without body text.
     """
     fields = article.get("fields", {})
     body = (fields.get("bodyText") or "").strip()
     
     # Skip empty articles
     if not body:
-        return False
+        return None
 
     # Construct the file header
     # use the actual section name from the API for the header text
@@ -42,78 +63,291 @@ def save_article(article, folder_name):
         f"{'-' * 60}\n"
     )
 
-    # Define output directory based on the 'folder' parameter
-    out_dir = Path("data") / folder_name
-    out_dir.mkdir(parents=True, exist_ok=True)
-    
     # Create a safe filename from the article ID
-    article_id = article["id"].replace("/", "_")
-    out_path = out_dir / f"{article_id}.txt"
-    
-    # check if file exists
-    if not out_path.exists():
-        out_path.write_text(f"{header}{body}\n", encoding="utf-8")
+    return article_filename(article["id"]), f"{header}{body}\n"
+
+
+def write_article_file(out_path, content):
+    """
+    Writes an article file unless it already exists. The exclusive-create mode
+    checks and creates in one step. Returns True if the file was written.
+    """
+    try:
+        with open(out_path, "x", encoding="utf-8") as f:
+            f.write(content)
         return True
-    
-    return False
+    except FileExistsError:
+        return False
+
+
+class ArticleWriter:
+    """
+    Writes articles on a background thread, so the fetch loop never waits for the disk
+    and the disk never waits for the network.
+    - submit() puts the raw article on a bounded queue and returns immediately;
+      when WRITE_QUEUE_SIZE articles are pending it blocks (back-pressure).
+    - The writer takes up to WRITE_BATCH_SIZE articles at a time, formats them and
+      writes them; each section directory is created once.
+    - close() (or leaving the 'with' block) waits until everything is written.
+    - An error on the writer thread (disk or malformed article) is kept and raised
+      by the next submit() or by close().
+    saved[folder] counts the new files per folder; skipped[folder] holds the IDs of
+    the articles that were not written because they have no body text.
+    """
+
+    _STOP = object()
+
+    def __init__(self, data_dir=DATA_DIR, queue_size=WRITE_QUEUE_SIZE, batch_size=WRITE_BATCH_SIZE):
+        self.data_dir = Path(data_dir)
+        self.batch_size = batch_size
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.saved = collections.Counter()
+        self.skipped = collections.defaultdict(set)
+        self.error = None
+        self._ready_dirs = set()
+        self._thread = threading.Thread(target=self._run, name="article-writer", daemon=True)
+        self._thread.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def submit(self, article, folder_name):
+        if self.error is not None:
+            raise self.error
+        self.queue.put((article, folder_name))
+
+    def close(self):
+        if self._thread.is_alive():
+            self.queue.put(self._STOP)
+            self._thread.join()
+        if self.error is not None:
+            raise self.error
+
+    def _out_dir(self, folder_name):
+        out_dir = self.data_dir / folder_name
+        if folder_name not in self._ready_dirs:
+            out_dir.mkdir(parents=True, exist_ok=True)
+            self._ready_dirs.add(folder_name)
+        return out_dir
+
+    def _write_batch(self, batch):
+        for article, folder_name in batch:
+            formatted = format_article(article, folder_name)
+            if formatted is None:
+                self.skipped[folder_name].add(article["id"])
+                continue
+            file_name, content = formatted
+            if write_article_file(self._out_dir(folder_name) / file_name, content):
+                self.saved[folder_name] += 1
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            batch = [self.queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            if self._STOP in batch:
+                stopping = True
+                batch = [item for item in batch if item is not self._STOP]
+
+            # After an error keep draining the queue, so the fetcher is never blocked
+            if self.error is None:
+                try:
+                    self._write_batch(batch)
+                except Exception as e:
+                    self.error = e
+
+
+def article_filename(article_id):
+    """File name of a saved article: its API ID with '/' replaced by '_'."""
+    return f"{article_id.replace('/', '_')}.txt"
+
+
+def known_article_files(folder_name, data_dir=DATA_DIR):
+    """File names of the articles of a section that are already on disk."""
+    out_dir = Path(data_dir) / folder_name
+    if not out_dir.exists():
+        return set()
+    return {path.name for path in out_dir.glob("*.txt")}
+
+
+def load_skipped(path=SKIPPED_FILE):
+    """{folder: set of article IDs} that were fetched once and had no body text."""
+    path = Path(path)
+    if not path.exists():
+        return {}
+    return {folder: set(ids) for folder, ids in json.loads(path.read_text(encoding="utf-8")).items()}
+
+
+def save_skipped(skipped, path=SKIPPED_FILE):
+    Path(path).write_text(json.dumps({folder: sorted(ids) for folder, ids in skipped.items()}, indent=1),
+                          encoding="utf-8")
+
+
+def list_section_ids(session, api_section, max_items=MAX_PAGES * PAGE_SIZE):
+    """
+    Phase 1: pages through the section's newest articles without any fields.
+    Returns [(id, publication date)] and the number of bytes downloaded.
+    """
+    listing = []
+    n_bytes = 0
+    max_pages = -(-max_items // LIST_PAGE_SIZE)
+
+    for page_num in range(1, max_pages + 1):
+        params = {
+            "api-key": API_KEY,
+            "page-size": LIST_PAGE_SIZE,
+            "section": api_section,
+            "order-by": "newest",
+            "page": page_num
+        }
+        resp = session.get(BASE_URL, params=params)
+        resp.raise_for_status()
+        n_bytes += len(resp.content)
+        data = resp.json()["response"]
+
+        # On the first page, adjust the total pages based on actual availability
+        if page_num == 1:
+            max_pages = min(max_pages, data.get("pages", 1))
+            print(f"Found {data.get('total', 0)} items available. Listing {max_pages} pages.")
+
+        results = data.get("results", [])
+        listing.extend((article["id"], article.get("webPublicationDate", "")) for article in results)
+        if not results or page_num >= max_pages:
+            break
+
+    return listing[:max_items], n_bytes
+
+
+def fetch_articles_by_ids(session, article_ids):
+    """
+    Phase 2: fetches the full fields of the given articles, IDS_PER_REQUEST per request.
+    Yields (list of articles, bytes downloaded) per request.
+    """
+    for start in range(0, len(article_ids), IDS_PER_REQUEST):
+        batch = article_ids[start:start + IDS_PER_REQUEST]
+        params = {
+            "api-key": API_KEY,
+            "ids": ",".join(batch),
+            "page-size": len(batch),
+            "show-fields": ARTICLE_FIELDS
+        }
+        resp = session.get(BASE_URL, params=params)
+        resp.raise_for_status()
+        yield resp.json()["response"].get("results", []), len(resp.content)
+
+
+def fetch_section_two_phase(config):
+    """
+    Collects a section by listing its IDs first and downloading bodies only for
+    the articles that are not on disk yet. On a refresh run most articles are
+    known, so almost no body text is transferred or parsed.
+    Articles fetched once without body text are remembered in SKIPPED_FILE and
+    not requested again (only IDs still in the listing are kept there).
+    """
+    api_section = config["api_section"]
+    folder_name = config["folder"]
+
+    print(f"\n Starting two-phase collection for: {folder_name.upper()} (API Section: {api_section})...")
+
+    known = known_article_files(folder_name)
+    all_skipped = load_skipped()
+    skipped = all_skipped.get(folder_name, set())
+    listing = []
+    with requests.Session() as session, ArticleWriter() as writer:
+        try:
+            listing, listed_bytes = list_section_ids(session, api_section)
+            unseen = [article_id for article_id, _ in listing
+                      if article_filename(article_id) not in known and article_id not in skipped]
+            n_skipped = sum(article_id in skipped for article_id, _ in listing)
+            print(f"Listed {len(listing)} articles ({listed_bytes / 1024:.0f} KB), {len(unseen)} not on disk yet "
+                  f"({n_skipped} known to have no body text).")
+
+            fetched_bytes = 0
+            for articles, n_bytes in fetch_articles_by_ids(session, unseen):
+                fetched_bytes += n_bytes
+                for article in articles:
+                    writer.submit(article, folder_name)
+            if unseen:
+                print(f"Fetched {len(unseen)} articles in bulk ({fetched_bytes / 1024:.0f} KB).")
+
+        except requests.exceptions.RequestException as e:
+            print(f"API request error: {e}")
+
+    # Remember the articles without body text (IDs that left the listing are dropped)
+    if listing:
+        listed = {article_id for article_id, _ in listing}
+        all_skipped[folder_name] = (skipped & listed) | writer.skipped[folder_name]
+        save_skipped(all_skipped)
+
+    print(f"Finished {folder_name.upper()}. Total saved: {writer.saved[folder_name]}, "
+          f"without body text: {len(writer.skipped[folder_name])}.")
 
 
 def fetch_section_data(config):
     """
     Orchestrates the download process for a specific section based on config.
     """
+    if COLLECTION_MODE == "two_phase":
+        return fetch_section_two_phase(config)
+
     api_section = config["api_section"]
     folder_name = config["folder"]
     
     print(f"\n Starting collection for: {folder_name.upper()} (API Section: {api_section})...")
     
-    total_articles_saved = 0
     current_max_pages = MAX_PAGES
     
-    for page_num in range(1, current_max_pages + 1):
-        params = {
-            "api-key": API_KEY,
-            "page-size": PAGE_SIZE,
-            "section": api_section, 
-            "order-by": "newest",
-            "show-fields": "headline,byline,bodyText",
-            "page": page_num
-        }
-        
-        try:
-            resp = requests.get(BASE_URL, params=params)
-            resp.raise_for_status()
-            data = resp.json()["response"]
-            
-            # On the first page, adjust the total pages based on actual availability
-            if page_num == 1:
-                actual_pages = data.get("pages", 1)
-                current_max_pages = min(MAX_PAGES, actual_pages)
-                print(f"Found {data.get('total', 0)} items available. Pulling {current_max_pages} pages.")
-
-            results = data.get("results", [])
-            if not results:
-                print(" No more results returned from API.")
-                break
+    # Articles are written by the writer thread while the next page downloads
+    with ArticleWriter() as writer:
+        for page_num in range(1, current_max_pages + 1):
+            params = {
+                "api-key": API_KEY,
+                "page-size": PAGE_SIZE,
+                "section": api_section, 
+                "order-by": "newest",
+                "show-fields": ARTICLE_FIELDS,
+                "page": page_num
+            }
             
-            # Process and save articles
-            saved_in_this_page = 0
-            for article in results:
-                if save_article(article, folder_name):
-                    total_articles_saved += 1
-                    saved_in_this_page += 1
-
-            print(f"Page {page_num}/{current_max_pages}: Saved {saved_in_this_page} new articles.")
-            
-            # Stop if we reached the limit
-            if page_num >= current_max_pages:
-                break
+            try:
+                resp = requests.get(BASE_URL, params=params)
+                resp.raise_for_status()
+                data = resp.json()["response"]
+                
+                # On the first page, adjust the total pages based on actual availability
+                if page_num == 1:
+                    actual_pages = data.get("pages", 1)
+                    current_max_pages = min(MAX_PAGES, actual_pages)
+                    print(f"Found {data.get('total', 0)} items available. Pulling {current_max_pages} pages.")
 
-        except requests.exceptions.RequestException as e:
-            print(f"API request error on page {page_num}: {e}")
-            break
+                results = data.get("results", [])
+                if not results:
+                    print(" No more results returned from API.")
+                    break
+                
+                # Hand the articles to the writer
+                for article in results:
+                    writer.submit(article, folder_name)
+
+                print(f"Page {page_num}/{current_max_pages}: Queued {len(results)} articles.")
+                
+                # Stop if we reached the limit
+                if page_num >= current_max_pages:
+                    break
+
+            except requests.exceptions.RequestException as e:
+                print(f"API request error on page {page_num}: {e}")
+                break
 
-    print(f"Finished {folder_name.upper()}. Total saved: {total_articles_saved}.")
+    print(f"Finished {folder_name.upper()}. Total saved: {writer.saved[folder_name]}.")
 
 
 def main():
@@ -1,10 +1,18 @@
 import pandas as pd
 import numpy as np
 from pathlib import Path
+from artifacts import artifact_path
+from segmentation import segment_spec, load_segment_spec, document_fields
+from token_ids import load_token_ids, lengths, doc_index
+from feature_store import feature_artifact, save_features
+from instrumentation import instrumented, span, record_read, record_write
 
 # --- Configuration ---
-INPUT_FILE = "segmented_data.csv"
-OUTPUT_FILE = "features_kb.csv"
+INPUT_FILE = artifact_path("segmented_data.csv")
+OUTPUT_FILE = artifact_path(feature_artifact("features_kb"))
+INPUT_SPEC = artifact_path("segment_spec.json")
+INPUT_TOKEN_IDS = artifact_path("segmented_ids.npz")
+USE_TOKEN_IDS = True   # Count on the token id arrays of segmentation (when present) instead of the text
 
 # --- Domain Knowledge Definitions ---
 # Ref: Lecture 2, Slide 21 ("Humans usually define the set of features...")
@@ -17,61 +25,133 @@ POLITICS_KEYWORDS = {'government', 'minister', 'law', 'parliament', 'election',
 CULTURE_KEYWORDS = {'film', 'movie', 'music', 'art', 'book', 'show', 'performance', 'star', 'festival', 'theatre', 'album'}
 NEWS_KEYWORDS = {'breaking', 'report', 'update', 'police', 'investigation', 'accident', 'local', 'global', 'world', 'official', 'statement', 'daily'}
 
-def count_keywords(text, keyword_set):
-    """Counts how many words from the keyword_set appear in the text."""
+# Output column -> keyword set (in output order)
+KEYWORD_FEATURES = {
+    'KB_Sport_Count': SPORT_KEYWORDS,
+    'KB_Politics_Count': POLITICS_KEYWORDS,
+    'KB_Culture_Count': CULTURE_KEYWORDS,
+    'KB_News_Count': NEWS_KEYWORDS,
+}
+
+def count_keywords(words, keyword_set):
+    """Counts how many of the (already split) words are in the keyword_set."""
 
-    words = text.split()
     count = sum(1 for word in words if word in keyword_set)
     return count
 
-def extract_features(df):
+def is_integral(fields):
+    """Counts stay integers when every field weight is an integer."""
+    return all(isinstance(weight, (int, np.integer)) for _, weight in fields)
+
+def extract_features(df, spec=None):
     """
     Extracts Knowledge-Based Features (Specific Features).
     Ref: Lecture 2, Slide 20 (Specific/Knowledge Based taxonomy)
+
+    A document is made of the fields of the segment spec (see segmentation.py):
+    every field is processed on its own and its counts are added with the
+    field's weight, so no concatenated text is built.
     """
+    fields = document_fields(df, spec)
+
     # Fail Fast: Ensure input data is valid
-    assert 'Segmented_Content' in df.columns, "Missing 'Segmented_Content' column."
+    for column, _ in fields:
+        assert column in df.columns, f"Missing '{column}' column."
     
     print("Extracting Knowledge-Based Features...")
-    
-    # 1. Structural Feature: Document Length (Number of Words)
-    # Ref: Lecture 2, Slide 21 (Example: "# of pages")
-    df['KB_WordCount'] = df['Segmented_Content'].apply(lambda x: len(str(x).split()))
+
+    word_count = 0
+    total_word_len = 0
+    keyword_counts = dict.fromkeys(KEYWORD_FEATURES, 0)
+    for column, weight in fields:
+        words = df[column].fillna("").astype(str).str.split()
+
+        # 1. Structural Feature: Document Length (Number of Words)
+        # Ref: Lecture 2, Slide 21 (Example: "# of pages")
+        word_count = word_count + weight * words.str.len()
+        total_word_len = total_word_len + weight * words.map(lambda ws: sum(len(w) for w in ws))
+
+        # 3. Content Features: Domain Specific Keyword Counts
+        # Ref: Lecture 2, Slide 21 (Example: "# 'love' word", "# 'past' word")
+        # We count occurrences of words from our knowledge bases
+        for feature, keyword_set in KEYWORD_FEATURES.items():
+            keyword_counts[feature] = keyword_counts[feature] + weight * words.map(
+                lambda ws: count_keywords(ws, keyword_set))
 
     # 2. Structural Feature: Average Word Length
     # Ref: Lecture 2, Slide 22 (Example: "Size", "Shape")
-    def get_avg_word_len(text):
-        words = str(text).split()
-        if not words: return 0
-        return sum(len(w) for w in words) / len(words)
-    
-    df['KB_AvgWordLen'] = df['Segmented_Content'].apply(get_avg_word_len)
-
-    # 3. Content Features: Domain Specific Keyword Counts
-    # Ref: Lecture 2, Slide 21 (Example: "# 'love' word", "# 'past' word")
-    # We count occurrences of words from our knowledge bases
-    df['KB_Sport_Count'] = df['Segmented_Content'].apply(lambda x: count_keywords(x, SPORT_KEYWORDS))
-    df['KB_Politics_Count'] = df['Segmented_Content'].apply(lambda x: count_keywords(x, POLITICS_KEYWORDS))
-    df['KB_Culture_Count'] = df['Segmented_Content'].apply(lambda x: count_keywords(x, CULTURE_KEYWORDS))
-    df['KB_News_Count'] = df['Segmented_Content'].apply(lambda x: count_keywords(x, NEWS_KEYWORDS))
-
-    # Drop the raw text column (we now have numerical representations)
-    # We keep 'Label' for the next steps.
-    output_df = df[['Label', 'KB_WordCount', 'KB_AvgWordLen', 
-                    'KB_Sport_Count', 'KB_Politics_Count', 'KB_Culture_Count', 'KB_News_Count']]
+    avg_word_len = np.divide(total_word_len.to_numpy(dtype=np.float64), word_count.to_numpy(dtype=np.float64),
+                             out=np.zeros(len(df)), where=word_count.to_numpy() > 0)
+
+    # Only numerical representations (and the 'Label' for the next steps) are kept
+    output_df = pd.DataFrame({'Label': df['Label'], 'KB_WordCount': word_count,
+                              'KB_AvgWordLen': avg_word_len, **keyword_counts}, index=df.index)
     
     return output_df
 
+def extract_features_from_ids(vocab, fields, labels, spec=None):
+    """
+    extract_features on token id arrays (same columns, same values).
+    Per-token properties (length, keyword membership) are computed once per
+    vocabulary entry, then summed per document with np.bincount.
+    """
+    print("Extracting Knowledge-Based Features (token ids)...")
+    spec = spec or segment_spec()
+    weights = [(field["column"], field["weight"]) for field in spec["fields"]]
+    n_docs = len(fields[weights[0][0]][1]) - 1
+
+    token_length = np.array([len(token) for token in vocab], dtype=np.float64)
+    keyword_masks = {feature: np.isin(vocab.astype(str), list(keyword_set)).astype(np.float64)
+                     for feature, keyword_set in KEYWORD_FEATURES.items()}
+
+    word_count = np.zeros(n_docs)
+    total_word_len = np.zeros(n_docs)
+    keyword_counts = {feature: np.zeros(n_docs) for feature in KEYWORD_FEATURES}
+    for column, weight in weights:
+        ids, offsets = fields[column]
+        docs = doc_index(offsets)
+
+        def per_document(token_values):
+            return np.bincount(docs, weights=token_values[ids], minlength=n_docs)
+
+        word_count += weight * lengths(offsets)
+        total_word_len += weight * per_document(token_length)
+        for feature, mask in keyword_masks.items():
+            keyword_counts[feature] += weight * per_document(mask)
+
+    avg_word_len = np.divide(total_word_len, word_count, out=np.zeros(n_docs), where=word_count > 0)
+    if is_integral(weights):
+        word_count = word_count.astype(np.int64)
+        keyword_counts = {feature: counts.astype(np.int64) for feature, counts in keyword_counts.items()}
+
+    return pd.DataFrame({'Label': labels, 'KB_WordCount': word_count,
+                         'KB_AvgWordLen': avg_word_len, **keyword_counts})
+
+@instrumented("feature_extraction")
 def main():
     input_path = Path(INPUT_FILE)
+    ids_path = Path(INPUT_TOKEN_IDS)
+    spec = load_segment_spec(INPUT_SPEC)
 
-    df = pd.read_csv(input_path)
-    
-    # Extract features
-    kb_features_df = extract_features(df)
+    if USE_TOKEN_IDS and ids_path.exists():
+        with span("load_token_ids"):
+            vocab, fields, labels = load_token_ids(ids_path)
+        record_read(ids_path, rows=len(labels))
+        with span("extract_features"):
+            kb_features_df = extract_features_from_ids(vocab, fields, labels, spec)
+    else:
+        with span("read_csv"):
+            df = pd.read_csv(input_path)
+        record_read(input_path, rows=len(df))
+
+        # Extract features
+        with span("extract_features"):
+            kb_features_df = extract_features(df, spec)
     
     # Save
-    kb_features_df.to_csv(OUTPUT_FILE, index=False)
+    with span("save_features"):
+        save_features(kb_features_df, OUTPUT_FILE)
+    record_write(OUTPUT_FILE, rows=len(kb_features_df))
     print(f"\nSuccessfully saved Knowledge-Based features to {OUTPUT_FILE}")
     print(f"Features created: {list(kb_features_df.columns)}")
 
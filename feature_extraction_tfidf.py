@@ -1,48 +1,181 @@
 import pandas as pd
-from sklearn.feature_extraction.text import TfidfVectorizer
+import numpy as np
 from pathlib import Path
+from artifacts import artifact_path
+from segmentation import segment_spec, load_segment_spec, document_fields
+from token_ids import load_token_ids, doc_index
+from feature_store import feature_artifact, is_store, write_store
+from instrumentation import instrumented, span, record_read, record_write
 
 # --- Configuration ---
-INPUT_FILE = "segmented_data.csv"
-OUTPUT_FILE = "features_tfidf.csv"
+INPUT_FILE = artifact_path("segmented_data.csv")
+OUTPUT_FILE = artifact_path(feature_artifact("features_tfidf"))
+MAX_FEATURES = 1000
+INPUT_SPEC = artifact_path("segment_spec.json")
+INPUT_TOKEN_IDS = artifact_path("segmented_ids.npz")
+USE_TOKEN_IDS = True   # Build the counts from the token id arrays of segmentation (when present)
 
-def extract_features(df):
+# TF-IDF mode:
+#   "batch"       - refit TfidfVectorizer-equivalent counts and idf on the whole corpus every run
+#   "incremental" - update the persisted model of incremental_tfidf.py with the articles it has
+#                   not seen yet, then export the features of the current corpus from it
+TFIDF_MODE = "batch"
+
+def tfidf_from_counts(counts, vocab):
+    """
+    The steps of TfidfVectorizer after counting, on a (documents x vocab) count matrix
+    whose vocab is sorted: stop word removal, the MAX_FEATURES most frequent terms,
+    TF-IDF weighting. Returns (tfidf matrix, feature names).
+    """
+    from sklearn.feature_extraction.text import TfidfTransformer, ENGLISH_STOP_WORDS
+
+    # Vocabulary as TfidfVectorizer sees it: terms that occur, minus stop words (alphabetical = column order)
+    term_freq = np.asarray(counts.sum(axis=0)).ravel()
+    terms = np.flatnonzero((term_freq > 0) & ~np.isin(vocab.astype(str), list(ENGLISH_STOP_WORDS)))
+    if len(terms) > MAX_FEATURES:
+        # Same selection expression as TfidfVectorizer, so ties are broken identically
+        terms = np.sort(terms[(-term_freq[terms]).argsort()[:MAX_FEATURES]])
+
+    tfidf_matrix = TfidfTransformer().fit_transform(counts[:, terms])
+    return tfidf_matrix, vocab[terms].astype(str)
+
+def to_feature_frame(tfidf_matrix, feature_names, labels):
+    with span("toarray"):
+        tfidf_df = pd.DataFrame(tfidf_matrix.toarray(), columns=feature_names)
+
+    print(f"Created {len(feature_names)} features.")
+
+    # Attach Label
+    return pd.concat([pd.Series(np.asarray(labels), name='Label'), tfidf_df], axis=1)
+
+def extract_features(df, spec=None):
     """
     Extracts Features using ONLY the Generic Method (TF-IDF).
     Ref: Lecture 2, Slide 35 (Term Frequency - Inverse Document Frequency)
+    Returns a DataFrame with 'Label' and one column per term.
+    """
+    return to_feature_frame(*tfidf_features(df, spec))
+
+def tfidf_features(df, spec=None):
+    """
+    The TF-IDF matrix of extract_features, kept sparse: returns (matrix, feature names, labels).
+    The fields of the segment spec (see segmentation.py) are counted one by one
+    with a shared vocabulary and added with their weights, so the concatenated
+    text is never built.
     """
+    from sklearn.feature_extraction.text import TfidfVectorizer, CountVectorizer
+
     print("Extracting Generic Features (TF-IDF)...")
-    
-    # 1. Initialize TF-IDF
-    # max_features=1000: We take the top 1000 most distinguishing words.
-    # stop_words='english': Removes "the", "is", "at", etc.
-    tfidf = TfidfVectorizer(max_features=1000, stop_words='english')
-    
-    # 2. Fit and Transform
-    # We use the segmented content (Title + Body)
-    tfidf_matrix = tfidf.fit_transform(df['Segmented_Content'].fillna(""))
-    
-    # 3. Convert to DataFrame
-    feature_names = tfidf.get_feature_names_out()
-    tfidf_df = pd.DataFrame(tfidf_matrix.toarray(), columns=feature_names)
-    
-    print(f"Created {len(feature_names)} features.")
-    
-    # 4. Attach Label
-    final_df = pd.concat([df['Label'], tfidf_df], axis=1)
-    
-    return final_df
+    fields = document_fields(df, spec)
+    texts = {column: df[column].fillna("").astype(str) for column, _ in fields}
+
+    if len(fields) == 1:
+        # 1. Initialize TF-IDF
+        # max_features=1000: We take the top 1000 most distinguishing words.
+        # stop_words='english': Removes "the", "is", "at", etc.
+        tfidf = TfidfVectorizer(max_features=MAX_FEATURES, stop_words='english')
+
+        # 2. Fit and Transform
+        # We use the segmented content (Title + Body)
+        with span("fit_transform"):
+            tfidf_matrix = tfidf.fit_transform(texts[fields[0][0]])
+        feature_names = tfidf.get_feature_names_out()
+    else:
+        # Same tokenization and stop words as TfidfVectorizer, one field at a time
+        counter = CountVectorizer(stop_words='english', dtype=np.float64)
+        with span("fit_transform"):
+            counter.fit(text for column_texts in texts.values() for text in column_texts)
+            counts = sum(weight * counter.transform(texts[column]) for column, weight in fields)
+            tfidf_matrix, feature_names = tfidf_from_counts(counts, counter.get_feature_names_out())
 
+    return tfidf_matrix, feature_names, df['Label'].to_numpy()
+
+def tfidf_features_incremental(df, spec=None):
+    """
+    tfidf_features from the persisted IncrementalTfidf model (incremental_tfidf.py):
+    only the articles the model has not seen are tokenized and counted, then the
+    rows of df are exported with the model's idf and MAX_FEATURES most frequent terms.
+    """
+    from incremental_tfidf import load_model
+
+    print("Extracting Generic Features (TF-IDF, incremental)...")
+    model = load_model()
+    with span("partial_fit"):
+        keys = model.update_from_frame(df, document_fields(df, spec))
+    update = model.last_update
+    print(f"Model update: {update['new_documents']} new articles, {update['new_terms']} new terms "
+          f"({update['seconds']:.2f}s). Model size: {model.n_docs} articles, {len(model.terms)} terms.")
+    with span("save_model"):
+        model.save()
+
+    with span("export"):
+        tfidf_matrix, feature_names = model.features(model.rows_of(keys), MAX_FEATURES)
+    return tfidf_matrix, feature_names, df['Label'].to_numpy()
+
+def extract_features_from_ids(vocab, fields, labels, spec=None):
+    """extract_features on token id arrays (see tfidf_features_from_ids)."""
+    return to_feature_frame(*tfidf_features_from_ids(vocab, fields, labels, spec))
+
+def tfidf_features_from_ids(vocab, fields, labels, spec=None):
+    """
+    tfidf_features on token id arrays, without tokenizing any text: the count
+    matrix of every field is built directly from its (ids, offsets), then the
+    weighted sum goes through the same steps as TfidfVectorizer (tfidf_from_counts).
+    """
+    from scipy import sparse
+
+    print("Extracting Generic Features (TF-IDF, token ids)...")
+    spec = spec or segment_spec()
+
+    with span("fit_transform"):
+        counts = None
+        for field in spec["fields"]:
+            ids, offsets = fields[field["column"]]
+            # Row i holds the tokens ids[offsets[i]:offsets[i + 1]]; duplicates are summed into counts.
+            # Built from (document, id) pairs: a CSR matrix on (ids, offsets) would share the caller's
+            # arrays, and summing its duplicates sorts them in place
+            field_counts = sparse.coo_matrix((np.ones(len(ids)), (doc_index(offsets), ids)),
+                                             shape=(len(offsets) - 1, len(vocab))).tocsr()
+            field_counts *= field["weight"]
+            counts = field_counts if counts is None else counts + field_counts
+        tfidf_matrix, feature_names = tfidf_from_counts(counts, vocab)
+
+    return tfidf_matrix, feature_names, labels
+
+@instrumented("feature_extraction_tfidf")
 def main():
     input_path = Path(INPUT_FILE)
-    if not input_path.exists():
-        print(f"Error: {INPUT_FILE} not found.")
-        return
-
-    df = pd.read_csv(input_path)
-    final_df = extract_features(df)
-    
-    final_df.to_csv(OUTPUT_FILE, index=False)
+    ids_path = Path(INPUT_TOKEN_IDS)
+    spec = load_segment_spec(INPUT_SPEC)
+
+    if USE_TOKEN_IDS and ids_path.exists() and TFIDF_MODE == "batch":
+        with span("load_token_ids"):
+            vocab, fields, labels = load_token_ids(ids_path)
+        record_read(ids_path, rows=len(labels))
+        tfidf_matrix, feature_names, labels = tfidf_features_from_ids(vocab, fields, labels, spec)
+    else:
+        if not input_path.exists():
+            print(f"Error: {INPUT_FILE} not found.")
+            return
+
+        with span("read_csv"):
+            df = pd.read_csv(input_path)
+        record_read(input_path, rows=len(df))
+        if TFIDF_MODE == "incremental":
+            tfidf_matrix, feature_names, labels = tfidf_features_incremental(df, spec)
+        else:
+            tfidf_matrix, feature_names, labels = tfidf_features(df, spec)
+
+    if is_store(OUTPUT_FILE):
+        # Sparse rows are densified block by block straight into the float32 store
+        with span("write_store"):
+            write_store(OUTPUT_FILE, tfidf_matrix, labels, feature_names)
+        print(f"Created {len(feature_names)} features.")
+    else:
+        final_df = to_feature_frame(tfidf_matrix, feature_names, labels)
+        with span("to_csv"):
+            final_df.to_csv(OUTPUT_FILE, index=False)
+    record_write(OUTPUT_FILE, rows=len(labels))
     print(f"Successfully saved TF-IDF features to {OUTPUT_FILE}")
 
 if __name__ == "__main__":
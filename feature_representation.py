@@ -1,11 +1,12 @@
 import pandas as pd
-import sklearn
-from sklearn.preprocessing import MinMaxScaler
 from pathlib import Path
+from artifacts import artifact_path
+from feature_store import feature_artifact, is_store, FeatureStore, iter_blocks, write_store, BLOCK_ROWS
+from instrumentation import instrumented, span, record_read, record_write
 
 # --- Configuration ---
-INPUT_FILE = "features_kb.csv"
-OUTPUT_FILE = "represented_data.csv"
+INPUT_FILE = artifact_path(feature_artifact("features_kb"))
+OUTPUT_FILE = artifact_path(feature_artifact("represented_data"))
 
 def perform_feature_representation(df):
     """
@@ -26,6 +27,8 @@ def perform_feature_representation(df):
     # Motivation: As per Lecture 2, Slide 36: "Normalize all features' values... [0,1]"
     # This prevents features with large scales (like WordCount ~500) from dominating 
     # features with small scales (like Keyword Counts ~5) during model training.
+    from sklearn.preprocessing import MinMaxScaler
+
     scaler = MinMaxScaler()
     
     # Fit and transform the features
@@ -39,16 +42,47 @@ def perform_feature_representation(df):
     
     return final_df
 
+def scale_store(input_path, output_path, block_rows=BLOCK_ROWS):
+    """
+    Min-Max scaling of a stored feature table without loading it: the column
+    minima/maxima are accumulated over row blocks (MinMaxScaler.partial_fit),
+    then every block is scaled on its way into the output store.
+    """
+    from sklearn.preprocessing import MinMaxScaler
+
+    store = FeatureStore(input_path)
+    print("Features before normalization (First 5 rows):")
+    print(pd.DataFrame(store.X[:5], columns=store.columns))
+
+    scaler = MinMaxScaler()
+    for block in iter_blocks(store.X, block_rows):
+        scaler.partial_fit(block)
+    write_store(output_path, store.X, store.labels, store.columns, block_rows, transform=scaler.transform)
+    return len(store)
+
+@instrumented("feature_representation")
 def main():
     input_path = Path(INPUT_FILE)
 
-    df = pd.read_csv(input_path)
-    
-    # Apply Representation (Normalization)
-    represented_df = perform_feature_representation(df)
-    
-    # Save
-    represented_df.to_csv(OUTPUT_FILE, index=False)
+    if is_store(input_path):
+        # Apply Representation (Normalization), streamed from store to store
+        with span("min_max_scaling"):
+            n_rows = scale_store(input_path, OUTPUT_FILE)
+        record_read(input_path, rows=n_rows)
+        record_write(OUTPUT_FILE, rows=n_rows)
+    else:
+        with span("read_csv"):
+            df = pd.read_csv(input_path)
+        record_read(input_path, rows=len(df))
+
+        # Apply Representation (Normalization)
+        with span("min_max_scaling"):
+            represented_df = perform_feature_representation(df)
+
+        # Save
+        with span("to_csv"):
+            represented_df.to_csv(OUTPUT_FILE, index=False)
+        record_write(OUTPUT_FILE, rows=len(represented_df))
     print(f"\nSuccessfully saved represented (normalized) data to {OUTPUT_FILE}")
     print("Data values are now scaled between 0 and 1.")
 
@@ -1,11 +1,13 @@
 import pandas as pd
-import sklearn
-from sklearn.preprocessing import MinMaxScaler
 from pathlib import Path
+from artifacts import artifact_path
+from feature_store import feature_artifact, is_store
+from feature_representation import scale_store
+from instrumentation import instrumented, span, record_read, record_write
 
 # --- Configuration ---
-INPUT_FILE = "features_tfidf.csv" 
-OUTPUT_FILE = "represented_data.csv"
+INPUT_FILE = artifact_path(feature_artifact("features_tfidf"))
+OUTPUT_FILE = artifact_path(feature_artifact("represented_data"))
 
 def perform_feature_representation(df):
     """
@@ -19,6 +21,8 @@ def perform_feature_representation(df):
     print(X.head())
 
     # Standard Min-Max Scaling (0 to 1)
+    from sklearn.preprocessing import MinMaxScaler
+
     scaler = MinMaxScaler() 
     X_scaled = scaler.fit_transform(X)
     
@@ -27,15 +31,28 @@ def perform_feature_representation(df):
     
     return final_df
 
+@instrumented("feature_representation_tfidf")
 def main():
     input_path = Path(INPUT_FILE)
     if not input_path.exists():
         print(f"Error: {INPUT_FILE} not found.")
         return
 
-    df = pd.read_csv(input_path)
-    represented_df = perform_feature_representation(df)
-    represented_df.to_csv(OUTPUT_FILE, index=False)
+    if is_store(input_path):
+        # Same Min-Max scaling, streamed from store to store
+        with span("min_max_scaling"):
+            n_rows = scale_store(input_path, OUTPUT_FILE)
+        record_read(input_path, rows=n_rows)
+        record_write(OUTPUT_FILE, rows=n_rows)
+    else:
+        with span("read_csv"):
+            df = pd.read_csv(input_path)
+        record_read(input_path, rows=len(df))
+        with span("min_max_scaling"):
+            represented_df = perform_feature_representation(df)
+        with span("to_csv"):
+            represented_df.to_csv(OUTPUT_FILE, index=False)
+        record_write(OUTPUT_FILE, rows=len(represented_df))
     print(f"\nSuccessfully saved represented data to {OUTPUT_FILE}")
     print("Data values are scaled between 0 and 1.")
 
@@ -0,0 +1,222 @@
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from caching import cache_path
+
+# --- Configuration ---
+CHUNK_SIZE = 5000   # Rows per block in the streaming pass
+SCORE_METHODS = ("f_classif", "chi2", "mutual_info")
+SCORE_CACHE_NAMESPACE = "feature_scores"
+
+
+def iter_row_blocks(X, chunk_size=CHUNK_SIZE, columns=None):
+    """
+    Yields consecutive row blocks of X.
+
+    Sparse matrices are converted to CSR once (cheap row slicing) and stay sparse.
+    DataFrames are sliced with iloc and only the current block (restricted to
+    'columns', if given) is materialized, so the full feature matrix is never
+    copied as a whole.
+    """
+    if sparse.issparse(X):
+        X = sparse.csr_matrix(X)
+
+    n_rows = X.shape[0]
+    for start in range(0, n_rows, chunk_size):
+        stop = min(start + chunk_size, n_rows)
+        if hasattr(X, "iloc"):
+            block = X.iloc[start:stop]
+            if columns is not None:
+                block = block[columns]
+            yield block.to_numpy(dtype=np.float64)
+        else:
+            yield X[start:stop]
+
+
+def accumulate_class_stats(X, y, chunk_size=CHUNK_SIZE, columns=None):
+    """
+    Computes per-class statistics of every feature in ONE streaming pass.
+
+    For each class c and feature f we accumulate:
+    - sums[c, f]:     sum of the feature values
+    - sq_sums[c, f]:  sum of the squared feature values
+    - nnz[c, f]:      number of documents where the feature is non-zero
+
+    The per-class reduction is a sparse one-hot (rows x classes) product, so
+    sparse blocks are never densified. Only the small (classes x features)
+    tables are dense.
+    """
+    classes, y_codes = np.unique(np.asarray(y), return_inverse=True)
+    n_classes = len(classes)
+    n_features = X.shape[1] if columns is None else len(columns)
+
+    sums = np.zeros((n_classes, n_features))
+    sq_sums = np.zeros((n_classes, n_features))
+    nnz = np.zeros((n_classes, n_features))
+    min_value = np.inf
+
+    start = 0
+    for block in iter_row_blocks(X, chunk_size, columns):
+        n_block = block.shape[0]
+        codes = y_codes[start:start + n_block]
+        start += n_block
+
+        # One-hot class membership for the rows of this block
+        membership = sparse.csr_matrix(
+            (np.ones(n_block), (np.arange(n_block), codes)),
+            shape=(n_block, n_classes)
+        ).T
+
+        if sparse.issparse(block):
+            present = block.copy()
+            present.data = np.ones_like(present.data)
+            sums += (membership @ block).toarray()
+            sq_sums += (membership @ block.multiply(block)).toarray()
+            nnz += (membership @ present).toarray()
+            if block.nnz:
+                min_value = min(min_value, block.data.min())
+        else:
+            block = np.asarray(block, dtype=np.float64)
+            sums += membership @ block
+            sq_sums += membership @ (block * block)
+            nnz += membership @ (block != 0).astype(np.float64)
+            if block.size:
+                min_value = min(min_value, block.min())
+
+    class_counts = np.bincount(y_codes, minlength=n_classes).astype(np.float64)
+
+    return {
+        "classes": classes,
+        "class_counts": class_counts,
+        "sums": sums,
+        "sq_sums": sq_sums,
+        "nnz": nnz,
+        "min_value": min_value,
+    }
+
+
+def f_scores(stats):
+    """
+    ANOVA F-value (Fisher Score) from the per-class sums.
+    Between-class variance divided by within-class variance, same as f_classif.
+    """
+    n_c = stats["class_counts"][:, None]
+    n = n_c.sum()
+    n_classes = len(n_c)
+
+    total = stats["sums"].sum(axis=0)
+    ss_total = stats["sq_sums"].sum(axis=0) - total ** 2 / n
+    ss_between = (stats["sums"] ** 2 / n_c).sum(axis=0) - total ** 2 / n
+    ss_within = ss_total - ss_between
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        scores = (ss_between / (n_classes - 1)) / (ss_within / (n - n_classes))
+
+    # Constant features have no discriminative power
+    return np.nan_to_num(scores, nan=0.0)
+
+
+def chi2_scores(stats):
+    """
+    Chi-squared statistic between each (non-negative) feature and the class.
+    Observed = per-class feature sums, Expected = class prior * feature total.
+    """
+    if stats["min_value"] < 0:
+        raise ValueError("chi2 scoring requires non-negative feature values.")
+
+    class_prob = stats["class_counts"] / stats["class_counts"].sum()
+    observed = stats["sums"]
+    expected = np.outer(class_prob, observed.sum(axis=0))
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        terms = (observed - expected) ** 2 / expected
+
+    return np.nan_to_num(terms, nan=0.0).sum(axis=0)
+
+
+def mutual_info_scores(stats):
+    """
+    Mutual information between the presence of each feature and the class.
+    Uses the per-class document frequencies (a term either occurs in an
+    article or not), which is the classic MI criterion for text features.
+    """
+    n_c = stats["class_counts"][:, None]
+    n = n_c.sum()
+
+    p_class = n_c / n
+    joint_present = stats["nnz"] / n
+    joint_absent = (n_c - stats["nnz"]) / n
+    p_present = joint_present.sum(axis=0)
+    p_absent = 1.0 - p_present
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mi_present = joint_present * np.log(joint_present / (p_class * p_present))
+        mi_absent = joint_absent * np.log(joint_absent / (p_class * p_absent))
+
+    mi = np.nan_to_num(mi_present, nan=0.0) + np.nan_to_num(mi_absent, nan=0.0)
+    return mi.sum(axis=0)
+
+
+SCORE_FUNCTIONS = {
+    "f_classif": f_scores,
+    "chi2": chi2_scores,
+    "mutual_info": mutual_info_scores,
+}
+
+
+def score_features(X, y, method="f_classif", chunk_size=CHUNK_SIZE, columns=None):
+    """
+    Scores every column of X against the labels y.
+
+    X can be a scipy sparse matrix, a numpy array or a DataFrame. For a DataFrame,
+    'columns' restricts scoring to the feature columns (e.g. everything but 'Label')
+    without copying the frame. Returns one score per column (higher is better).
+    """
+    assert method in SCORE_FUNCTIONS, f"Unknown scoring method '{method}'. Choose from {SCORE_METHODS}."
+    assert X.shape[0] == len(y), "X and y must have the same number of rows."
+
+    stats = accumulate_class_stats(X, y, chunk_size, columns)
+    return SCORE_FUNCTIONS[method](stats)
+
+
+def top_k_indices(scores, k):
+    """
+    Returns the column indices of the k best scores, in original column order
+    (same convention as SelectKBest.get_support(indices=True)).
+    """
+    scores = np.asarray(scores)
+    if k == "all" or k >= len(scores):
+        return np.arange(len(scores))
+
+    best = np.argpartition(-scores, k - 1)[:k]
+    return np.sort(best)
+
+
+def score_table(df, method="f_classif", chunk_size=CHUNK_SIZE):
+    """
+    Scores all feature columns of a dataset that has a 'Label' column.
+    Returns a DataFrame ('Feature', 'Score') in the original column order.
+    """
+    feature_cols = df.columns.drop('Label')
+    scores = score_features(df, df['Label'], method=method, chunk_size=chunk_size, columns=feature_cols)
+    return pd.DataFrame({'Feature': feature_cols, 'Score': scores})
+
+
+def load_cached_scores(fingerprint, method):
+    """
+    Returns the score table saved for this input fingerprint and method, or None.
+    """
+    path = cache_path(SCORE_CACHE_NAMESPACE, f"{fingerprint}_{method}", ".csv")
+    if not path.exists():
+        return None
+    # Feature names are vocabulary words: never parse 'null'/'nan' as missing
+    return pd.read_csv(path, dtype={'Feature': str}, keep_default_na=False)
+
+
+def save_cached_scores(scores_df, fingerprint, method):
+    """
+    Saves a score table next to the content fingerprint of the data it was computed on.
+    """
+    path = cache_path(SCORE_CACHE_NAMESPACE, f"{fingerprint}_{method}", ".csv")
+    scores_df.to_csv(path, index=False)
+    return path
@@ -1,39 +1,40 @@
-import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
-from sklearn.feature_selection import SelectKBest, f_classif
+from plotting import plotting_enabled, stratified_sample, finish_plot, pyplot
 from pathlib import Path
+from feature_scoring import score_table, load_cached_scores, save_cached_scores
+from artifacts import artifact_path
+from feature_store import feature_artifact, load_features, save_features, feature_fingerprint
+from instrumentation import instrumented, span, record_read, record_write
 
 # --- Configuration ---
-INPUT_FILE = "represented_data.csv"
-OUTPUT_FILE = "selected_features.csv"
+INPUT_FILE = artifact_path(feature_artifact("represented_data"))
+OUTPUT_FILE = artifact_path(feature_artifact("selected_features"))
 # We will drop the feature with the lowest score to demonstrate selection
 NUM_FEATURES_TO_DROP = 1 
+SCORE_METHOD = "f_classif"   # One of: "f_classif", "chi2", "mutual_info"
 
-def quantitative_selection(df):
+def quantitative_selection(df, fingerprint):
     """
     Quantitative Evaluation using Filter Method (Fisher Score / ANOVA).
     Ref: Lecture 2, Slide 41 (Fisher Score formula) & Slide 40 (Filters)
     
     Calculates a score for each feature based on the ratio of 
     between-class variance to within-class variance.
+    The score table is cached under the input's content fingerprint, so re-runs 
+    that only change NUM_FEATURES_TO_DROP skip the scoring.
     """
     print("\n--- Quantitative Evaluation (Filter Method) ---")
     
-    X = df.drop(columns=['Label'])
-    y = df['Label']
+    scores_df = load_cached_scores(fingerprint, SCORE_METHOD)
+    if scores_df is None:
+        # The ANOVA F-value is mathematically equivalent to the Fisher Score 
+        # concept (Between Var / Within Var) mentioned in Slide 41[cite: 707].
+        scores_df = score_table(df, method=SCORE_METHOD)
+        save_cached_scores(scores_df, fingerprint, SCORE_METHOD)
+    else:
+        print(f"Reusing cached {SCORE_METHOD} scores ({fingerprint[:12]}).")
     
-    # f_classif calculates the ANOVA F-value, which is mathematically 
-    # equivalent to the Fisher Score concept (Between Var / Within Var)
-    # mentioned in Slide 41[cite: 707].
-    selector = SelectKBest(score_func=f_classif, k='all')
-    selector.fit(X, y)
-    
-    # Create a DataFrame to view scores
-    scores_df = pd.DataFrame({
-        'Feature': X.columns,
-        'Score': selector.scores_
-    }).sort_values(by='Score', ascending=False)
+    # Sort to view scores
+    scores_df = scores_df.sort_values(by='Score', ascending=False)
     
     print(scores_df)
     
@@ -53,6 +54,16 @@ def qualitative_selection(df, best_feature, worst_feature):
     """
     print("\n--- Qualitative Evaluation (Visual Strategy) ---")
     
+    if not plotting_enabled():
+        print("Plotting disabled (PLOT_MODE=off).")
+        return
+    
+    # KDE cost grows with N: plot a stratified sample of the two columns only
+    df = stratified_sample(df[['Label', best_feature, worst_feature]])
+    
+    plt = pyplot()
+    import seaborn as sns
+
     plt.figure(figsize=(14, 6))
     
     # Plot 1: The Best Feature (High Discrimination)
@@ -68,26 +79,33 @@ def qualitative_selection(df, best_feature, worst_feature):
     plt.xlim(0, 0.5)  # Limit x-axis to 0.5
     
     plt.tight_layout()
-    plt.show()
+    finish_plot("feature_selection_best_vs_worst")
 
+@instrumented("feature_selection")
 def main():
     input_path = Path(INPUT_FILE)
 
-    df = pd.read_csv(input_path)
+    with span("load_features"):
+        df = load_features(input_path)
+    record_read(input_path, rows=len(df))
     
     # 1. Quantitative Step
-    scores_df, features_to_drop = quantitative_selection(df)
+    with span("score_features"):
+        scores_df, features_to_drop = quantitative_selection(df, feature_fingerprint(input_path))
     
     # 2. Qualitative Step (Visualize the contrast)
     best_feature = scores_df.iloc[0]['Feature']
     worst_feature = scores_df.iloc[-1]['Feature']
-    qualitative_selection(df, best_feature, worst_feature)
+    with span("plots"):
+        qualitative_selection(df, best_feature, worst_feature)
     
     # 3. Drop the selected features
     final_df = df.drop(columns=features_to_drop)
     
     # 4. Save
-    final_df.to_csv(OUTPUT_FILE, index=False)
+    with span("save_features"):
+        save_features(final_df, OUTPUT_FILE)
+    record_write(OUTPUT_FILE, rows=len(final_df))
     print(f"\nSuccessfully saved dataset to {OUTPUT_FILE}")
     print(f"Original Feature Count: {len(df.columns) - 1}")
     print(f"Final Feature Count: {len(final_df.columns) - 1}")
@@ -1,44 +1,69 @@
 import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
-from sklearn.feature_selection import SelectKBest, f_classif
+from plotting import plotting_enabled, stratified_sample, finish_plot, pyplot
 from pathlib import Path
+from feature_scoring import score_table, score_features, top_k_indices, load_cached_scores, save_cached_scores
+from artifacts import artifact_path
+from feature_store import feature_artifact, is_store, FeatureStore, write_store, feature_fingerprint
+from instrumentation import instrumented, span, record_read, record_write
 
 # --- Configuration ---
-INPUT_FILE = "represented_data.csv"
-OUTPUT_FILE = "selected_features.csv"
+INPUT_FILE = artifact_path(feature_artifact("represented_data"))
+OUTPUT_FILE = artifact_path(feature_artifact("selected_features"))
 K_BEST_FEATURES = 200
+SCORE_METHOD = "f_classif"   # One of: "f_classif", "chi2", "mutual_info"
 
-def quantitative_selection(df):
+def load_scores(input_path):
+    """
+    Returns the score table of the input file and the loaded DataFrame.
+
+    Scores are cached next to a content fingerprint of the input, so re-runs that
+    only change K_BEST_FEATURES reuse them. On a cache hit the DataFrame is not
+    loaded (None is returned) and the caller reads only the columns it needs.
+    A store is scored straight from its memory-mapped matrix and never loaded either.
+    """
+    fingerprint = feature_fingerprint(input_path)
+    scores_df = load_cached_scores(fingerprint, SCORE_METHOD)
+    if scores_df is not None:
+        print(f"Reusing cached {SCORE_METHOD} scores for {input_path.name} ({fingerprint[:12]}).")
+        return scores_df, None
+
+    if is_store(input_path):
+        store = FeatureStore(input_path)
+        scores = score_features(store.X, store.labels, method=SCORE_METHOD)
+        scores_df = pd.DataFrame({'Feature': store.columns, 'Score': scores})
+        save_cached_scores(scores_df, fingerprint, SCORE_METHOD)
+        return scores_df, None
+
+    print(f"Loading data from {input_path.name}...")
+    df = pd.read_csv(input_path)
+    
+    # Scores are computed by the streaming engine in feature_scoring, block by 
+    # block, so the feature matrix is never copied as a whole.
+    scores_df = score_table(df, method=SCORE_METHOD)
+    save_cached_scores(scores_df, fingerprint, SCORE_METHOD)
+    return scores_df, df
+
+def quantitative_selection(scores_df):
     """
     Quantitative Evaluation using Filter Method (Fisher Score).
+
+    Returns the names of the selected columns (in their original order) and the
+    score table sorted from best to worst.
     """
     print("\n--- Quantitative Evaluation (Filter Method) ---")
     
-    X = df.drop(columns=['Label'])
-    y = df['Label']
-    
-    print(f"Original Feature Count: {X.shape[1]}")
+    print(f"Original Feature Count: {len(scores_df)}")
     
     # Select Top 200 features based on ANOVA F-value (Fisher Score)
-    selector = SelectKBest(score_func=f_classif, k=K_BEST_FEATURES)
-    selector.fit(X, y)
-    
-    cols_idxs = selector.get_support(indices=True)
-    selected_features_names = X.columns[cols_idxs].tolist()
-    
-    X_selected = X[selected_features_names]
-    final_df = pd.concat([y, X_selected], axis=1)
+    cols_idxs = top_k_indices(scores_df['Score'].to_numpy(), K_BEST_FEATURES)
+    selected_features_names = scores_df['Feature'].iloc[cols_idxs].tolist()
     
     # Report scores
-    scores_df = pd.DataFrame({
-        'Feature': X.columns,
-        'Score': selector.scores_
-    }).sort_values(by='Score', ascending=False)
+    scores_df = scores_df.sort_values(by='Score', ascending=False)
     
     print(f"\nTop 10 Features by Fisher Score:\n{scores_df.head(10)}")
     
-    return final_df, scores_df
+    return selected_features_names, scores_df
 
 def qualitative_selection(df, best_feature_name, worst_feature_name):
     """
@@ -47,6 +72,16 @@ def qualitative_selection(df, best_feature_name, worst_feature_name):
     """
     print("\n--- Qualitative Evaluation (Visual Strategy) ---")
     
+    if not plotting_enabled():
+        print("Plotting disabled (PLOT_MODE=off).")
+        return
+    
+    # KDE cost grows with N: plot a stratified sample of the two columns only
+    df = stratified_sample(df[['Label', best_feature_name, worst_feature_name]])
+    
+    plt = pyplot()
+    import seaborn as sns
+
     plt.figure(figsize=(14, 6))
     
     # Plot 1: The Best Feature
@@ -62,30 +97,55 @@ def qualitative_selection(df, best_feature_name, worst_feature_name):
     plt.xlim(0, 0.4)  # <--- ZOOM HERE
     
     plt.tight_layout()
-    plt.show()
+    finish_plot("feature_selection_tfidf_best_vs_worst")
 
+@instrumented("feature_selection_tfidf")
 def main():
     input_path = Path(INPUT_FILE)
     if not input_path.exists():
         print(f"Error: {INPUT_FILE} not found. Please run feature_representation.py first.")
         return
 
-    print(f"Loading data from {input_path.name}...")
-    df = pd.read_csv(input_path)
+    with span("load_scores"):
+        scores_df, df = load_scores(input_path)
     
     # 1. Quantitative Step
-    final_df, scores_df = quantitative_selection(df)
+    selected_features_names, scores_df = quantitative_selection(scores_df)
     
     # 2. Qualitative Step (Visualize with Zoom)
     best_feat = scores_df.iloc[0]['Feature']
     worst_feat = scores_df.iloc[-1]['Feature']
     
-    # We use the original dataframe for visualization to compare
-    qualitative_selection(df, best_feat, worst_feat)
+    if is_store(input_path):
+        store = FeatureStore(input_path)
+        record_read(input_path, rows=len(store))
+        with span("plots"):
+            qualitative_selection(store.to_frame([best_feat, worst_feat]), best_feat, worst_feat)
+
+        # 3. Save (the selected columns are copied block by block from the memory-mapped input)
+        with span("write_store"):
+            write_store(OUTPUT_FILE, store.X, store.labels, selected_features_names,
+                        column_index=store.column_index(selected_features_names))
+        record_write(OUTPUT_FILE, rows=len(store))
+        print(f"\nSuccessfully saved {len(selected_features_names)} selected features to {OUTPUT_FILE}")
+        return
+
+    # Cached scores: only the columns we plot and save are read from disk
+    if df is None:
+        usecols = set(['Label', worst_feat] + selected_features_names)
+        with span("read_csv"):
+            df = pd.read_csv(input_path, usecols=lambda col: col in usecols)
+    record_read(input_path, rows=len(df))
     
-    # 3. Save
-    final_df.to_csv(OUTPUT_FILE, index=False)
-    print(f"\nSuccessfully saved {len(final_df.columns)-1} selected features to {OUTPUT_FILE}")
+    # We use the original dataframe for visualization to compare
+    with span("plots"):
+        qualitative_selection(df, best_feat, worst_feat)
+    
+    # 3. Save (only the selected columns are written, no intermediate copy)
+    with span("to_csv"):
+        df.to_csv(OUTPUT_FILE, columns=['Label'] + selected_features_names, index=False)
+    record_write(OUTPUT_FILE, rows=len(df))
+    print(f"\nSuccessfully saved {len(selected_features_names)} selected features to {OUTPUT_FILE}")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,165 @@
+import os
+import json
+import shutil
+import hashlib
+import numpy as np
+from pathlib import Path
+from caching import file_fingerprint
+
+# --- Configuration ---
+# Feature tables between extraction and validation are stored as:
+#   <name>.f32/matrix.bin   - the feature values, float32, row-major (rows x columns)
+#   <name>.f32/labels.npy   - the label of every row
+#   <name>.f32/meta.json    - row count, column names, dtype
+# Readers open matrix.bin with np.memmap: loading is instant, nothing is parsed,
+# and worker processes that open the same file share its pages.
+# FEATURE_FORMAT=csv (environment) keeps the previous CSV files.
+FEATURE_FORMAT = os.environ.get("FEATURE_FORMAT", "store")   # "store" or "csv"
+FEATURE_DTYPE = np.float32
+STORE_SUFFIX = ".f32"
+MATRIX_FILE = "matrix.bin"
+LABELS_FILE = "labels.npy"
+META_FILE = "meta.json"
+BLOCK_ROWS = 10000   # Rows converted / written at a time
+
+
+def feature_artifact(name, feature_format=None):
+    """Artifact name of a feature table ('selected_features' -> 'selected_features.f32' or '.csv')."""
+    feature_format = feature_format or FEATURE_FORMAT
+    assert feature_format in ("store", "csv"), f"Unknown FEATURE_FORMAT '{feature_format}'."
+    return f"{name}{STORE_SUFFIX if feature_format == 'store' else '.csv'}"
+
+
+def is_store(path):
+    return Path(path).suffix == STORE_SUFFIX
+
+
+class FeatureStore:
+    """
+    Read-only view of a stored feature table.
+    X is a np.memmap of the matrix (rows are read from disk on access),
+    labels a numpy array and columns the list of feature names.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        meta = json.loads((self.path / META_FILE).read_text(encoding="utf-8"))
+        self.columns = meta["columns"]
+        shape = (meta["rows"], len(self.columns))
+        if meta["rows"] == 0 or not self.columns:
+            self.X = np.empty(shape, dtype=meta["dtype"])   # np.memmap cannot map an empty file
+        else:
+            self.X = np.memmap(self.path / MATRIX_FILE, dtype=meta["dtype"], mode="r", shape=shape)
+        self.labels = np.load(self.path / LABELS_FILE, allow_pickle=False)
+
+    def __len__(self):
+        return self.X.shape[0]
+
+    def column_index(self, names):
+        """Positions of the given feature names."""
+        position = {name: i for i, name in enumerate(self.columns)}
+        return np.array([position[name] for name in names], dtype=np.int64)
+
+    def to_frame(self, columns=None):
+        """DataFrame with 'Label' and the given columns (all by default); copies the selected data."""
+        columns = self.columns if columns is None else list(columns)
+        import pandas as pd
+
+        data = self.X[:, self.column_index(columns)] if columns != self.columns else np.asarray(self.X)
+        df = pd.DataFrame(data, columns=columns)
+        df.insert(0, 'Label', self.labels)
+        return df
+
+
+def iter_blocks(X, block_rows=BLOCK_ROWS, columns=None):
+    """Dense float32 row blocks of a dense array, memmap, sparse matrix or DataFrame (optionally some columns)."""
+    from scipy import sparse
+
+    if sparse.issparse(X):
+        X = sparse.csr_matrix(X)
+    for start in range(0, X.shape[0], block_rows):
+        if hasattr(X, "iloc"):
+            block = X.iloc[start:start + block_rows].to_numpy()
+        else:
+            block = X[start:start + block_rows]
+        if columns is not None:
+            block = block[:, columns]
+        if sparse.issparse(block):
+            block = block.toarray()
+        yield np.asarray(block, dtype=FEATURE_DTYPE)
+
+
+def write_store(path, X, labels, columns, block_rows=BLOCK_ROWS, column_index=None, transform=None):
+    """
+    Writes a feature table. X can be a dense array, a memmap (e.g. another store),
+    a sparse matrix or a DataFrame of the features; it is converted to float32
+    block by block, so a sparse or float64 input is never densified/copied as a whole.
+    column_index optionally keeps only some columns of X (in the given order) and
+    transform is applied to every block before it is written (e.g. a fitted scaler).
+    Any previous content of path is replaced.
+    """
+    path = Path(path)
+    if path.exists():
+        shutil.rmtree(path)
+    path.mkdir(parents=True)
+
+    columns = [str(name) for name in columns]
+    n_rows = X.shape[0]
+    if n_rows and columns:
+        out = np.memmap(path / MATRIX_FILE, dtype=FEATURE_DTYPE, mode="w+", shape=(n_rows, len(columns)))
+        start = 0
+        for block in iter_blocks(X, block_rows, column_index):
+            out[start:start + len(block)] = block if transform is None else transform(block)
+            start += len(block)
+        out.flush()
+        del out
+    else:
+        (path / MATRIX_FILE).touch()
+
+    np.save(path / LABELS_FILE, np.asarray(labels).astype(str))
+    meta = {"rows": n_rows, "columns": columns, "dtype": np.dtype(FEATURE_DTYPE).name}
+    (path / META_FILE).write_text(json.dumps(meta), encoding="utf-8")
+    return path
+
+
+def save_features(df, path):
+    """Writes a 'Label' + features DataFrame as a store or as CSV, depending on the path."""
+    if is_store(path):
+        return write_store(path, df.drop(columns=['Label']), df['Label'].to_numpy(), df.columns.drop('Label'))
+    df.to_csv(path, index=False)
+    return Path(path)
+
+
+def load_features(path, columns=None):
+    """Reads a feature table (store or CSV) as a DataFrame with 'Label' and the given columns."""
+    import pandas as pd
+
+    if is_store(path):
+        return FeatureStore(path).to_frame(columns)
+    usecols = None if columns is None else ['Label'] + list(columns)
+    return pd.read_csv(path, usecols=usecols)[usecols] if usecols else pd.read_csv(path)
+
+
+def feature_arrays(path):
+    """
+    (X, labels, columns) of a feature table. For a store X is the memory-mapped
+    float32 matrix itself (no copy); a CSV is parsed into a float64 array.
+    """
+    if is_store(path):
+        store = FeatureStore(path)
+        return store.X, store.labels, store.columns
+    import pandas as pd
+
+    df = pd.read_csv(path)
+    return df.drop(columns=['Label']).to_numpy(), df['Label'].to_numpy(), list(df.columns.drop('Label'))
+
+
+def feature_fingerprint(path):
+    """Content fingerprint of a feature table (every file of a store, or the CSV)."""
+    path = Path(path)
+    if not is_store(path):
+        return file_fingerprint(path)
+    digest = hashlib.sha256()
+    for name in (META_FILE, LABELS_FILE, MATRIX_FILE):
+        digest.update(file_fingerprint(path / name).encode("utf-8"))
+    return digest.hexdigest()
@@ -0,0 +1,230 @@
+import time
+import pickle
+import itertools
+import numpy as np
+import pandas as pd
+from functools import lru_cache
+from pathlib import Path
+from scipy import sparse
+
+# --- Configuration ---
+MODEL_VERSION = 2       # Bump when the saved layout changes
+MODEL_DIR = Path("models") / f"incremental_tfidf_v{MODEL_VERSION}"
+MAX_VOCAB = 50000       # Vocabulary cap: new terms are admitted (most frequent first) until it is reached
+
+# Saved layout (MODEL_DIR):
+#   state.pkl        - vocabulary, document frequency and total count of every term, document count
+#   chunk_<n>.npz    - raw term counts (CSR) and content keys of the documents added by update n
+# A chunk is written once and never rewritten, so saving an update costs the size of the update.
+STATE_FILE = "state.pkl"
+
+# Usage (feature_extraction_tfidf.py, TFIDF_MODE = "incremental"):
+#   model = load_model()                    -> a new, empty model if there is none
+#   model.update_from_frame(df, fields)     -> counts only the articles it has not seen
+#   model.save()                            -> writes the state and the new chunk
+#   matrix, names = model.features(model.rows_of(keys), MAX_FEATURES)
+
+
+@lru_cache(maxsize=None)
+def analyzer():
+    """Tokenizer and stop words of the TfidfVectorizer in feature_extraction_tfidf."""
+    from sklearn.feature_extraction.text import CountVectorizer
+
+    return CountVectorizer(stop_words='english').build_analyzer()
+
+
+def content_keys(texts):
+    """Identity of every document of a frame of cleaned fields: 64-bit hash of its content (vectorized)."""
+    return pd.util.hash_pandas_object(texts.fillna("").astype(str), index=False).to_numpy()
+
+
+class IncrementalTfidf:
+    """
+    TF-IDF model that grows with the corpus instead of being refit from scratch.
+
+    Kept between runs: the vocabulary (in order of admission), the document
+    frequency and total count of every term, the number of documents, and the raw
+    term counts of every document, one CSR chunk per update (never rewritten).
+    An update only tokenizes the new documents and adds to the counters; the idf
+    is recomputed from them (one vector operation) with the smoothing of
+    TfidfVectorizer: ln((1 + n) / (1 + df)) + 1.
+    Exporting features weights the counts of the requested documents with the
+    current idf, as TfidfVectorizer.transform would.
+    Articles removed from the corpus keep counting in the document frequencies
+    until the model is rebuilt (delete MODEL_DIR).
+    """
+
+    def __init__(self, max_vocab=MAX_VOCAB):
+        self.version = MODEL_VERSION
+        self.max_vocab = max_vocab
+        self.terms = []
+        self.term_index = {}
+        self.doc_freq = np.zeros(0, dtype=np.int64)
+        self.term_freq = np.zeros(0)
+        self.n_docs = 0
+        self.chunks = []      # [(counts, keys)], one per update
+        self.n_saved = 0      # Chunks already on disk
+        self.doc_rows = {}
+        self.last_update = {}
+
+    def idf(self):
+        return np.log((1 + self.n_docs) / (1 + self.doc_freq)) + 1
+
+    def _admit(self, token_lists):
+        """Adds the batch's unknown terms, most frequent (by document frequency) first, up to max_vocab."""
+        room = self.max_vocab - len(self.terms) if self.max_vocab else None
+        if room is not None and room <= 0:
+            return 0
+
+        batch_df = {}
+        for tokens in token_lists:
+            for token in set(tokens):
+                if token not in self.term_index:
+                    batch_df[token] = batch_df.get(token, 0) + 1
+        new_terms = sorted(batch_df, key=lambda term: (-batch_df[term], term))[:room]
+
+        for term in new_terms:
+            self.term_index[term] = len(self.terms)
+            self.terms.append(term)
+        n_new = len(new_terms)
+        self.doc_freq = np.concatenate([self.doc_freq, np.zeros(n_new, dtype=np.int64)])
+        self.term_freq = np.concatenate([self.term_freq, np.zeros(n_new)])
+        return n_new
+
+    def count(self, fields, admit=False):
+        """
+        Term counts of a batch of documents given as [(texts, weight)], one entry
+        per field: the fields are counted separately and added with their weights.
+        With admit=True, new terms enter the vocabulary first.
+        """
+        analyze = analyzer()
+        tokenized = [([analyze(text) for text in texts], weight) for texts, weight in fields]
+        n_new = 0
+        if admit:
+            per_document = [list(itertools.chain.from_iterable(document))
+                            for document in zip(*(token_lists for token_lists, _ in tokenized))]
+            n_new = self._admit(per_document)
+
+        n_docs = len(tokenized[0][0]) if tokenized else 0
+        counts = sparse.csr_matrix((n_docs, len(self.terms)))
+        for token_lists, weight in tokenized:
+            indices, indptr = [], [0]
+            for tokens in token_lists:
+                indices.extend(index for index in map(self.term_index.get, tokens) if index is not None)
+                indptr.append(len(indices))
+            field_counts = sparse.csr_matrix((np.ones(len(indices)), indices, indptr), shape=counts.shape)
+            field_counts.sum_duplicates()
+            counts = counts + weight * field_counts
+        return counts.tocsr(), n_new
+
+    def partial_fit(self, fields, keys):
+        """
+        Adds a batch of new documents ([(texts, weight)] per field, and a key per
+        document): updates the counters and appends their counts as a new chunk.
+        """
+        start = time.perf_counter()
+        batch, n_new_terms = self.count(fields, admit=True)
+        batch.eliminate_zeros()
+
+        self.doc_freq += np.bincount(batch.indices, minlength=len(self.terms))
+        self.term_freq += np.asarray(batch.sum(axis=0)).ravel()
+        for row, key in enumerate(keys, start=self.n_docs):
+            self.doc_rows[key] = row
+        self.n_docs += batch.shape[0]
+        self.chunks.append((batch, np.asarray(keys, dtype=np.uint64)))
+
+        self.last_update = {
+            "new_documents": batch.shape[0],
+            "new_terms": n_new_terms,
+            "seconds": time.perf_counter() - start,
+        }
+        return self
+
+    def update_from_frame(self, df, fields):
+        """
+        partial_fit on the rows of df ([(column, weight)] fields) that the model has not seen.
+        Returns the content key of every row of df.
+        """
+        columns = [column for column, _ in fields]
+        texts = df[columns].fillna("").astype(str)
+        keys = content_keys(texts)
+
+        # First occurrence of every key the model does not know
+        _, first = np.unique(keys, return_index=True)
+        first = np.sort(first)
+        positions = [position for position in first if keys[position] not in self.doc_rows]
+        if positions:
+            self.partial_fit([(texts[column].iloc[positions].tolist(), weight) for column, weight in fields],
+                             keys[positions])
+        else:
+            self.last_update = {"new_documents": 0, "new_terms": 0, "seconds": 0.0}
+        return keys
+
+    def rows_of(self, keys):
+        return np.array([self.doc_rows[key] for key in keys], dtype=np.int64)
+
+    def counts(self):
+        """Raw term counts of all documents (chunks stacked, padded to the current vocabulary)."""
+        width = len(self.terms)
+        blocks = [sparse.csr_matrix((counts.data, counts.indices, counts.indptr), shape=(counts.shape[0], width))
+                  for counts, _ in self.chunks]
+        return sparse.vstack(blocks, format="csr") if blocks else sparse.csr_matrix((0, width))
+
+    def features(self, rows, max_features):
+        """
+        TF-IDF features of the given documents restricted to the max_features most
+        frequent terms, as TfidfVectorizer(max_features=...) would produce them:
+        columns in alphabetical order, rows L2-normalized over the kept columns.
+        Returns (sparse matrix, feature names).
+        """
+        from sklearn.preprocessing import normalize
+
+        names = np.array(self.terms, dtype=object).astype(str)
+        alphabetical = np.argsort(names, kind="stable")
+        alphabetical = alphabetical[self.term_freq[alphabetical] > 0]
+        if len(alphabetical) > max_features:
+            # Same selection expression as TfidfVectorizer, so ties are broken identically
+            alphabetical = alphabetical[np.sort((-self.term_freq[alphabetical]).argsort()[:max_features])]
+
+        matrix = self.counts()[rows][:, alphabetical] @ sparse.diags(self.idf()[alphabetical])
+        return normalize(matrix, norm='l2'), names[alphabetical]
+
+    def save(self, path=MODEL_DIR):
+        """Writes the chunks added since the last save, then the state (counters, vocabulary)."""
+        path = Path(path)
+        path.mkdir(parents=True, exist_ok=True)
+        for number in range(self.n_saved, len(self.chunks)):
+            counts, keys = self.chunks[number]
+            with open(path / f"chunk_{number:05d}.npz", 'wb') as f:
+                np.savez(f, data=counts.data, indices=counts.indices, indptr=counts.indptr,
+                         shape=np.array(counts.shape), keys=keys)
+        self.n_saved = len(self.chunks)
+
+        state = {name: value for name, value in vars(self).items() if name not in ("chunks", "doc_rows")}
+        with open(path / STATE_FILE, 'wb') as f:
+            pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+        return path
+
+
+def load_model(path=MODEL_DIR, max_vocab=MAX_VOCAB):
+    """Loads the saved model, or returns a new empty one. Fails fast on a layout change."""
+    path = Path(path)
+    if not (path / STATE_FILE).exists():
+        return IncrementalTfidf(max_vocab)
+    with open(path / STATE_FILE, 'rb') as f:
+        state = pickle.load(f)
+
+    assert state["version"] == MODEL_VERSION, \
+        f"Incremental TF-IDF model version {state['version']} does not match the code (v{MODEL_VERSION}). Delete {path}."
+    model = IncrementalTfidf(max_vocab)
+    vars(model).update(state)
+    model.max_vocab = max_vocab
+
+    # Chunks beyond n_saved belong to an interrupted save and are ignored
+    for number in range(model.n_saved):
+        with np.load(path / f"chunk_{number:05d}.npz") as data:
+            counts = sparse.csr_matrix((data["data"], data["indices"], data["indptr"]), shape=tuple(data["shape"]))
+            model.chunks.append((counts, data["keys"]))
+    for row, key in enumerate(itertools.chain.from_iterable(keys for _, keys in model.chunks)):
+        model.doc_rows[key] = row
+    return model
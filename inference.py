@@ -0,0 +1,216 @@
+import time
+import pickle
+import datetime
+import numpy as np
+from pathlib import Path
+from pre_processing import clean_text, CLEAN_TEXT_CONFIG
+from caching import file_fingerprint
+from artifacts import artifact_path
+from instrumentation import instrumented, span, record_read, record_write
+
+# --- Configuration ---
+INPUT_FILE = artifact_path("segmented_data.csv")
+BUNDLE_VERSION = 1      # Bump when the bundle layout changes
+BUNDLE_FILE = Path("models") / f"inference_bundle_v{BUNDLE_VERSION}.pkl"
+TEST_SIZE_RATIO = 0.20
+SEED = 42
+PREDICT_BATCH_SIZE = 1000   # Documents per vectorized step inside predict_batch
+
+
+class InferenceBundle:
+    """
+    Everything needed to classify a raw article, frozen at training time:
+    clean_text config -> TF-IDF vocabulary and IDF -> Min-Max scaler ->
+    selected column indices -> classifier.
+    Each stage runs vectorized over a whole batch of documents.
+    """
+
+    def __init__(self, clean_config, vocabulary, idf, selected_columns,
+                 scaler_min, scaler_scale, classifier, metadata):
+        self.version = BUNDLE_VERSION
+        self.clean_config = clean_config
+        self.vocabulary = vocabulary
+        self.idf = idf
+        self.selected_columns = selected_columns
+        self.scaler_min = scaler_min
+        self.scaler_scale = scaler_scale
+        self.classifier = classifier
+        self.metadata = metadata
+        self._counter = None
+
+    @property
+    def classes(self):
+        return self.classifier.classes_
+
+    def _count_vectorizer(self):
+        # Same tokenization as the TfidfVectorizer of feature_extraction_tfidf,
+        # restricted to the frozen vocabulary
+        if self._counter is None:
+            from sklearn.feature_extraction.text import CountVectorizer
+
+            self._counter = CountVectorizer(vocabulary=self.vocabulary)
+        return self._counter
+
+    def transform(self, cleaned_texts):
+        """
+        Turns cleaned texts into the classifier's input matrix.
+        TF-IDF is computed on the sparse matrix; only the selected columns are densified.
+        """
+        from scipy import sparse
+        from sklearn.preprocessing import normalize
+
+        counts = self._count_vectorizer().transform(cleaned_texts)
+        tfidf = normalize(counts @ sparse.diags(self.idf), norm='l2')
+        selected = tfidf[:, self.selected_columns].toarray()
+        return selected * self.scaler_scale + self.scaler_min
+
+    def predict_batch(self, texts, cleaned=False):
+        """
+        Predicts the section of every text in the batch.
+        Raw texts are cleaned with the training-time clean_text first
+        (pass cleaned=True for texts that are already pre-processed).
+        """
+        predictions = []
+        for start in range(0, len(texts), PREDICT_BATCH_SIZE):
+            batch = texts[start:start + PREDICT_BATCH_SIZE]
+            if not cleaned:
+                batch = [clean_text(str(text)) for text in batch]
+            predictions.append(self.classifier.predict(self.transform(batch)))
+
+        if not predictions:
+            return np.array([], dtype=object)
+        return np.concatenate(predictions)
+
+    def save(self, path=BUNDLE_FILE):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._counter = None
+        with open(path, 'wb') as f:
+            pickle.dump(self, f, protocol=pickle.HIGHEST_PROTOCOL)
+        return path
+
+
+def load_bundle(path=BUNDLE_FILE):
+    """
+    Loads a saved bundle. Fails fast if it was built with a different bundle
+    layout or a different clean_text version than the current code.
+    """
+    with open(path, 'rb') as f:
+        bundle = pickle.load(f)
+
+    assert bundle.version == BUNDLE_VERSION, \
+        f"Bundle version {bundle.version} does not match the code (v{BUNDLE_VERSION}). Rebuild it."
+    assert bundle.clean_config["version"] == CLEAN_TEXT_CONFIG["version"], \
+        "The bundle was trained with another clean_text version. Rebuild it."
+    return bundle
+
+
+def fit_bundle(texts, labels, metadata=None):
+    """
+    Fits every stage on cleaned texts and their labels, in the same way as the
+    TF-IDF scripts (feature_extraction_tfidf -> feature_representation_tfidf ->
+    feature_selection_tfidf -> Validation), but without densifying the full matrix.
+    """
+    import sklearn
+    from scipy import sparse
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    from sklearn.linear_model import LogisticRegression
+    from feature_extraction_tfidf import MAX_FEATURES
+    from feature_selection_tfidf import K_BEST_FEATURES, SCORE_METHOD
+    from feature_scoring import score_features, top_k_indices
+
+    # 1. TF-IDF (same settings as feature_extraction_tfidf)
+    tfidf = TfidfVectorizer(max_features=MAX_FEATURES, stop_words='english')
+    X = tfidf.fit_transform(texts)
+
+    # 2. Min-Max scaling parameters, computed on the sparse matrix
+    col_min = X.min(axis=0).toarray().ravel()
+    col_range = X.max(axis=0).toarray().ravel() - col_min
+    scale = 1.0 / np.where(col_range == 0, 1.0, col_range)
+    scaler_min = -col_min * scale
+
+    # 3. Feature selection on the scaled features
+    X_scaled = X @ sparse.diags(scale)
+    if np.any(scaler_min):
+        X_scaled = X_scaled.toarray() + scaler_min
+    scores = score_features(X_scaled, labels, method=SCORE_METHOD)
+    selected_columns = top_k_indices(scores, K_BEST_FEATURES)
+
+    # 4. Classifier
+    X_train = X[:, selected_columns].toarray() * scale[selected_columns] + scaler_min[selected_columns]
+    classifier = LogisticRegression(max_iter=1000, random_state=SEED)
+    classifier.fit(X_train, labels)
+
+    metadata = dict(metadata or {})
+    metadata.update({
+        "created_at": datetime.datetime.now().isoformat(timespec="seconds"),
+        "sklearn_version": sklearn.__version__,
+        "training_rows": len(texts),
+    })
+
+    return InferenceBundle(
+        clean_config=dict(CLEAN_TEXT_CONFIG),
+        vocabulary=tfidf.vocabulary_,
+        idf=tfidf.idf_,
+        selected_columns=selected_columns,
+        scaler_min=scaler_min[selected_columns],
+        scaler_scale=scale[selected_columns],
+        classifier=classifier,
+        metadata=metadata,
+    )
+
+
+def measure_throughput(bundle, texts, cleaned=False):
+    """Runs predict_batch over texts and returns documents per second."""
+    start = time.perf_counter()
+    bundle.predict_batch(texts, cleaned=cleaned)
+    elapsed = time.perf_counter() - start
+    return len(texts) / elapsed if elapsed > 0 else float("inf")
+
+
+@instrumented("inference")
+def main():
+    import pandas as pd
+    from sklearn.model_selection import train_test_split
+    from sklearn.metrics import accuracy_score
+    from segmentation import document_texts
+
+    input_path = Path(INPUT_FILE)
+    if not input_path.exists():
+        print(f"Error: {INPUT_FILE} not found. Please run segmentation.py first.")
+        return
+
+    with span("read_csv"):
+        df = pd.read_csv(input_path)
+    record_read(input_path, rows=len(df))
+    texts = document_texts(df)
+    labels = df['Label'].to_numpy()
+
+    # 1. Train on 80%, keep 20% to report the bundle's accuracy
+    train_texts, test_texts, y_train, y_test = train_test_split(
+        texts, labels, test_size=TEST_SIZE_RATIO, random_state=SEED, stratify=labels
+    )
+    print(f"Training inference bundle on {len(train_texts)} articles...")
+    with span("fit_bundle"):
+        bundle = fit_bundle(train_texts, y_train, metadata={
+            "training_data": input_path.name,
+            "training_data_fingerprint": file_fingerprint(input_path),
+        })
+
+    # 2. Evaluate (the segmented text is already cleaned)
+    accuracy = accuracy_score(y_test, bundle.predict_batch(test_texts, cleaned=True))
+    bundle.metadata["holdout_accuracy"] = accuracy
+    print(f"Holdout Accuracy: {accuracy:.4f}")
+
+    # 3. Save
+    out_path = bundle.save()
+    record_write(out_path)
+    print(f"Successfully saved inference bundle v{BUNDLE_VERSION} to {out_path}")
+
+    # 4. Throughput of the full path (including clean_text) on one core
+    with span("predict_batch"):
+        docs_per_s = measure_throughput(load_bundle(out_path), test_texts)
+    print(f"predict_batch throughput: {docs_per_s:,.0f} documents/s")
+
+if __name__ == "__main__":
+    main()
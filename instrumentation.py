@@ -0,0 +1,217 @@
+import os
+import io
+import json
+import time
+import pstats
+import cProfile
+import functools
+import threading
+import tracemalloc
+from contextlib import contextmanager
+from pathlib import Path
+
+try:
+    import resource   # Unix only
+except ImportError:
+    resource = None
+
+# --- Configuration ---
+# Every stage's main() reports to this layer. All settings come from the environment,
+# so a production run can be profiled without editing code, e.g.
+#   PROFILE_STAGES=pre_processing PROFILE_TOOLS=cprofile,tracemalloc python pre_processing.py
+# INSTRUMENT       - "on" writes <INSTRUMENT_DIR>/<stage>.json and .trace.json, "off" disables; the
+#                    default is "on" only when INSTRUMENT_DIR or PROFILE_STAGES is set, so a stage
+#                    run by hand writes nothing
+# INSTRUMENT_DIR   - where the reports go (the pipeline and the benchmark use <run dir>/instrumentation)
+# INSTRUMENT_STAGE - report name, overrides the module's own stage name (set by the pipeline)
+# PROFILE_STAGES   - comma-separated stage names to profile, or "all"
+# PROFILE_TOOLS    - "cprofile" and/or "tracemalloc"
+PROFILE_STAGES = set(filter(None, os.environ.get("PROFILE_STAGES", "").split(",")))
+INSTRUMENT = os.environ.get("INSTRUMENT", "on" if os.environ.get("INSTRUMENT_DIR") or PROFILE_STAGES else "off")
+INSTRUMENT_DIR = Path(os.environ.get("INSTRUMENT_DIR", "instrumentation"))
+PROFILE_TOOLS = set(filter(None, os.environ.get("PROFILE_TOOLS", "cprofile").split(",")))
+PROFILE_TOP_N = 30   # Functions / allocation sites kept in the JSON report
+
+assert INSTRUMENT in ("on", "off"), f"Unknown INSTRUMENT '{INSTRUMENT}'."
+assert PROFILE_TOOLS <= {"cprofile", "tracemalloc"}, f"Unknown PROFILE_TOOLS {PROFILE_TOOLS}."
+
+_current = None   # The StageReport of the running stage (one stage per process)
+
+
+def peak_rss_mb():
+    """Peak resident memory of this process so far, or None where unavailable."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return peak / (2 ** 20 if os.uname().sysname == "Darwin" else 1024)
+
+
+def path_size(path):
+    """Size in bytes of a file, or of every file under a directory."""
+    path = Path(path)
+    if path.is_file():
+        return path.stat().st_size
+    if path.is_dir():
+        return sum(p.stat().st_size for p in path.rglob("*") if p.is_file())
+    return 0
+
+
+class StageReport:
+    """
+    Measurements of one stage run: wall/CPU time, peak memory, rows and bytes
+    in and out, and named spans (e.g. clean_text, fit_transform, to_csv).
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.start_wall = time.perf_counter()
+        self.start_cpu = time.process_time()
+        self.reads = []
+        self.writes = []
+        self.events = []   # Chrome trace "complete" events
+
+    def _timestamp_us(self, t):
+        return round((t - self.start_wall) * 1e6, 1)
+
+    @contextmanager
+    def span(self, name):
+        wall, cpu = time.perf_counter(), time.process_time()
+        try:
+            yield
+        finally:
+            end = time.perf_counter()
+            self.events.append({
+                "name": name, "ph": "X", "pid": os.getpid(), "tid": threading.get_ident(),
+                "ts": self._timestamp_us(wall), "dur": round((end - wall) * 1e6, 1),
+                "args": {"cpu_s": round(time.process_time() - cpu, 6)},
+            })
+
+    def record_read(self, path, rows=None):
+        self.reads.append({"path": str(path), "bytes": path_size(path), "rows": rows})
+
+    def record_write(self, path, rows=None):
+        self.writes.append({"path": str(path), "bytes": path_size(path), "rows": rows})
+
+    def summary(self, status):
+        spans = {}
+        for event in self.events:
+            span = spans.setdefault(event["name"], {"calls": 0, "wall_s": 0.0, "cpu_s": 0.0})
+            span["calls"] += 1
+            span["wall_s"] += event["dur"] / 1e6
+            span["cpu_s"] += event["args"]["cpu_s"]
+
+        return {
+            "stage": self.name,
+            "status": status,
+            "wall_s": round(time.perf_counter() - self.start_wall, 6),
+            "cpu_s": round(time.process_time() - self.start_cpu, 6),
+            "peak_rss_mb": peak_rss_mb(),
+            "rows_in": sum(r["rows"] for r in self.reads if r["rows"] is not None),
+            "rows_out": sum(w["rows"] for w in self.writes if w["rows"] is not None),
+            "bytes_read": sum(r["bytes"] for r in self.reads),
+            "bytes_written": sum(w["bytes"] for w in self.writes),
+            "reads": self.reads,
+            "writes": self.writes,
+            "spans": {name: {k: round(v, 6) if isinstance(v, float) else v for k, v in span.items()}
+                      for name, span in spans.items()},
+        }
+
+    def trace(self, wall_s):
+        """Chrome trace (chrome://tracing, Perfetto) of the stage and its spans."""
+        stage_event = {"name": self.name, "ph": "X", "pid": os.getpid(), "tid": threading.get_ident(),
+                       "ts": 0, "dur": round(wall_s * 1e6, 1)}
+        return {"traceEvents": [stage_event] + self.events, "displayTimeUnit": "ms"}
+
+
+@contextmanager
+def span(name):
+    """Times a named step of the running stage. A no-op outside an instrumented stage."""
+    if _current is None:
+        yield
+        return
+    with _current.span(name):
+        yield
+
+
+def record_read(path, rows=None):
+    """Records an input file (or directory) of the running stage."""
+    if _current is not None:
+        _current.record_read(path, rows)
+
+
+def record_write(path, rows=None):
+    """Records an output file of the running stage. Call it after the file is written."""
+    if _current is not None:
+        _current.record_write(path, rows)
+
+
+def profile_summary(profiler):
+    stats = pstats.Stats(profiler, stream=io.StringIO())
+    rows = []
+    for (filename, line, function), (_, calls, tottime, cumtime, _) in stats.stats.items():
+        rows.append({"function": f"{Path(filename).name}:{line}({function})",
+                     "calls": calls, "tottime_s": round(tottime, 6), "cumtime_s": round(cumtime, 6)})
+    return sorted(rows, key=lambda r: r["cumtime_s"], reverse=True)[:PROFILE_TOP_N]
+
+
+def tracemalloc_summary(snapshot):
+    peak = tracemalloc.get_traced_memory()[1]
+    top = snapshot.statistics("lineno")[:PROFILE_TOP_N]
+    return {
+        "peak_traced_mb": round(peak / 2 ** 20, 3),
+        "top_allocations": [{"site": str(stat.traceback), "size_mb": round(stat.size / 2 ** 20, 3),
+                             "count": stat.count} for stat in top],
+    }
+
+
+def write_reports(report, summary, profiler=None):
+    INSTRUMENT_DIR.mkdir(parents=True, exist_ok=True)
+    base = INSTRUMENT_DIR / report.name
+    if profiler is not None:
+        profiler.dump_stats(f"{base}.prof")   # For snakeviz / pstats
+    Path(f"{base}.json").write_text(json.dumps(summary, indent=1), encoding="utf-8")
+    Path(f"{base}.trace.json").write_text(json.dumps(report.trace(summary["wall_s"])), encoding="utf-8")
+
+
+def instrumented(stage_name):
+    """
+    Decorator for a stage's main(): measures the whole run, collects the spans and
+    read/write records made inside it, and writes the JSON report and Chrome trace.
+    cProfile / tracemalloc are switched on only for the stages listed in PROFILE_STAGES.
+    """
+    def decorator(main):
+        @functools.wraps(main)
+        def wrapper(*args, **kwargs):
+            global _current
+            if INSTRUMENT == "off" or _current is not None:
+                return main(*args, **kwargs)
+
+            name = os.environ.get("INSTRUMENT_STAGE") or stage_name
+            profiled = "all" in PROFILE_STAGES or name in PROFILE_STAGES or stage_name in PROFILE_STAGES
+            profiler = cProfile.Profile() if profiled and "cprofile" in PROFILE_TOOLS else None
+            tracing = profiled and "tracemalloc" in PROFILE_TOOLS
+
+            _current = report = StageReport(name)
+            status = "failed"
+            if tracing:
+                tracemalloc.start()
+            if profiler is not None:
+                profiler.enable()
+            try:
+                result = main(*args, **kwargs)
+                status = "ok"
+                return result
+            finally:
+                if profiler is not None:
+                    profiler.disable()
+                summary = report.summary(status)
+                if profiler is not None:
+                    summary["profile"] = profile_summary(profiler)
+                if tracing:
+                    summary["tracemalloc"] = tracemalloc_summary(tracemalloc.take_snapshot())
+                    tracemalloc.stop()
+                _current = None
+                write_reports(report, summary, profiler)
+        return wrapper
+    return decorator
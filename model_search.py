@@ -0,0 +1,234 @@
+import os
+import json
+import time
+import tempfile
+import itertools
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from caching import cache_path
+from artifacts import artifact_path
+from feature_store import feature_artifact, feature_arrays, feature_fingerprint
+from instrumentation import instrumented, span, record_read, record_write
+
+# --- Configuration ---
+INPUT_FILE = artifact_path(feature_artifact("selected_features"))
+OUTPUT_FILE = artifact_path("model_search_results.csv")
+TEST_SIZE_RATIO = 0.20  # Fixed validation set shared by every configuration
+SEED = 42
+# Worker processes evaluating configurations in parallel, within the CPU share the
+# pipeline gives the stage (PIPELINE_STAGE_CPUS, as in Validation)
+N_JOBS = int(os.environ.get("PIPELINE_STAGE_CPUS") or os.cpu_count() or 1)
+HALVING_FACTOR = 3      # Successive halving: keep the best 1/HALVING_FACTOR each round
+MIN_TRAIN_SAMPLES = 200 # Training budget of the first round
+TIME_BUDGET_S = 600     # No new round is started after this many seconds
+CACHE_NAMESPACE = "model_search"
+
+# The search space: model family -> hyperparameter grid
+MODEL_GRID = {
+    "logistic_regression": {"C": [0.1, 1.0, 10.0]},
+    "linear_svm": {"C": [0.1, 1.0, 10.0]},
+    "sgd": {"loss": ["hinge", "log_loss", "modified_huber"], "alpha": [1e-5, 1e-4, 1e-3]},
+    "multinomial_nb": {"alpha": [0.01, 0.1, 1.0]},
+}
+
+
+def expand_grid(grid=MODEL_GRID):
+    """Expands the grid into a list of {"model": name, "params": {...}} configurations."""
+    configs = []
+    for name, param_grid in grid.items():
+        keys = sorted(param_grid)
+        for values in itertools.product(*(param_grid[key] for key in keys)):
+            configs.append({"model": name, "params": dict(zip(keys, values))})
+    return configs
+
+
+def build_model(config):
+    """Creates the (unfitted) estimator described by a configuration."""
+    from sklearn.linear_model import LogisticRegression, SGDClassifier
+    from sklearn.svm import LinearSVC
+    from sklearn.naive_bayes import MultinomialNB
+
+    name, params = config["model"], config["params"]
+    if name == "logistic_regression":
+        return LogisticRegression(max_iter=1000, random_state=SEED, **params)
+    if name == "linear_svm":
+        return LinearSVC(random_state=SEED, **params)
+    if name == "sgd":
+        return SGDClassifier(random_state=SEED, **params)
+    if name == "multinomial_nb":
+        return MultinomialNB(**params)
+    raise ValueError(f"Unknown model '{name}'.")
+
+
+def config_key(config, budget):
+    """Stable cache key of one evaluation: the model config and its training budget."""
+    return json.dumps({"config": config, "budget": int(budget)}, sort_keys=True)
+
+
+def evaluate_config(task):
+    """
+    Trains one configuration on the first 'budget' training rows and measures
+    validation accuracy and prediction latency. Runs inside a worker process;
+    the arrays are memory-mapped, not pickled.
+    """
+    from sklearn.metrics import accuracy_score
+
+    paths, config, budget = task
+    X_train = np.load(paths["X_train"], mmap_mode='r')
+    y_train = np.load(paths["y_train"], mmap_mode='r')
+    X_val = np.load(paths["X_val"], mmap_mode='r')
+    y_val = np.load(paths["y_val"], mmap_mode='r')
+
+    result = {"config": config, "budget": int(budget)}
+    try:
+        model = build_model(config)
+
+        start = time.perf_counter()
+        model.fit(X_train[:budget], y_train[:budget])
+        result["fit_time_s"] = time.perf_counter() - start
+
+        X_val = np.asarray(X_val)
+        start = time.perf_counter()
+        y_pred = model.predict(X_val)
+        result["latency_ms_per_doc"] = 1000 * (time.perf_counter() - start) / len(X_val)
+
+        result["accuracy"] = accuracy_score(y_val, y_pred)
+    except ValueError as e:
+        # e.g. MultinomialNB on negative features (PCA output)
+        result["error"] = str(e)
+        result["accuracy"] = float("nan")
+
+    return result
+
+
+def load_cache(fingerprint):
+    """Returns the cached evaluations of this feature file ({key: result})."""
+    path = cache_path(CACHE_NAMESPACE, fingerprint, ".json")
+    if not path.exists():
+        return {}
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def save_cache(fingerprint, cache):
+    path = cache_path(CACHE_NAMESPACE, fingerprint, ".json")
+    path.write_text(json.dumps(cache, indent=1), encoding="utf-8")
+
+
+def successive_halving(paths, configs, n_train, cache, n_jobs=N_JOBS, time_budget_s=TIME_BUDGET_S):
+    """
+    Successive halving: every round evaluates the surviving configurations on a
+    training budget HALVING_FACTOR times larger than the previous round, and keeps
+    only the best 1/HALVING_FACTOR. Unpromising configurations are thus dropped
+    after training on a small sample. Cached evaluations are never recomputed.
+    Returns the list of every evaluation made (or reused).
+    """
+    start = time.perf_counter()
+    budget = min(MIN_TRAIN_SAMPLES, n_train)
+    survivors = configs
+    history = []
+
+    # At most one worker per configuration of the first (largest) round
+    with ProcessPoolExecutor(max_workers=max(1, min(n_jobs, len(configs)))) as executor:
+        while True:
+            todo = [c for c in survivors if config_key(c, budget) not in cache]
+            print(f"Round: {len(survivors)} config(s) on {budget} training samples "
+                  f"({len(survivors) - len(todo)} cached)...")
+
+            for result in executor.map(evaluate_config, [(paths, c, budget) for c in todo]):
+                cache[config_key(result["config"], budget)] = result
+
+            results = [cache[config_key(c, budget)] for c in survivors]
+            history.extend(results)
+
+            if budget >= n_train or len(survivors) == 1:
+                break
+            if time.perf_counter() - start > time_budget_s:
+                print(f"Time budget of {time_budget_s}s reached, stopping the search.")
+                break
+
+            # Keep the best 1/HALVING_FACTOR (failed configs rank last)
+            ranked = sorted(results, key=lambda r: np.nan_to_num(r["accuracy"], nan=-1.0), reverse=True)
+            n_keep = max(1, len(ranked) // HALVING_FACTOR)
+            survivors = [r["config"] for r in ranked[:n_keep]]
+            budget = min(budget * HALVING_FACTOR, n_train)
+
+    return history
+
+
+def pareto_front(results_df):
+    """Rows not beaten by another row on both accuracy and latency."""
+    import pandas as pd
+
+    front = []
+    best_accuracy = -np.inf
+    for _, row in results_df.sort_values("latency_ms_per_doc").iterrows():
+        if row["accuracy"] > best_accuracy:
+            front.append(row)
+            best_accuracy = row["accuracy"]
+    return pd.DataFrame(front)
+
+
+@instrumented("model_search")
+def main():
+    import pandas as pd
+    from sklearn.model_selection import train_test_split
+    from sklearn.preprocessing import LabelEncoder
+    from Validation import share_arrays
+
+    input_path = Path(INPUT_FILE)
+    if not input_path.exists():
+        print(f"Error: {INPUT_FILE} not found. Please run feature_selection.py first.")
+        return
+
+    fingerprint = feature_fingerprint(input_path)
+    cache = load_cache(fingerprint)
+
+    # 1. Load and split once (the same validation set for every configuration)
+    with span("load_features"):
+        X, labels, _ = feature_arrays(input_path)
+    record_read(input_path, rows=len(labels))
+    y = LabelEncoder().fit_transform(labels)
+
+    X_train, X_val, y_train, y_val = train_test_split(
+        X, y, test_size=TEST_SIZE_RATIO, random_state=SEED, stratify=y
+    )
+    configs = expand_grid()
+    print(f"Searching {len(configs)} configurations on {len(X_train)} training samples...")
+
+    # 2. Successive halving on memory-mapped arrays
+    with tempfile.TemporaryDirectory() as work_dir:
+        train_paths = share_arrays(Path(work_dir), X_train, y_train)
+        val_dir = Path(work_dir) / "val"
+        val_dir.mkdir()
+        val_paths = share_arrays(val_dir, X_val, y_val)
+        paths = {"X_train": train_paths[0], "y_train": train_paths[1],
+                 "X_val": val_paths[0], "y_val": val_paths[1]}
+
+        with span("successive_halving"):
+            history = successive_halving(paths, configs, len(X_train), cache)
+
+    save_cache(fingerprint, cache)
+
+    # 3. Report: evaluations on the largest budget each config reached
+    results_df = pd.DataFrame([
+        {"Model": r["config"]["model"], "Params": json.dumps(r["config"]["params"]),
+         "budget": r["budget"], "accuracy": r["accuracy"],
+         "latency_ms_per_doc": r.get("latency_ms_per_doc", np.nan), "fit_time_s": r.get("fit_time_s", np.nan)}
+        for r in history
+    ])
+    results_df = (results_df.sort_values("budget")
+                  .drop_duplicates(subset=["Model", "Params"], keep="last")
+                  .sort_values(["budget", "accuracy"], ascending=False))
+
+    print("\n Search Results ")
+    print(results_df.to_string(index=False))
+    print("\n Accuracy / Latency Trade-off (Pareto front) ")
+    print(pareto_front(results_df.dropna(subset=["accuracy"])).to_string(index=False))
+
+    results_df.to_csv(OUTPUT_FILE, index=False)
+    record_write(OUTPUT_FILE, rows=len(results_df))
+    print(f"\nSuccessfully saved search results to {OUTPUT_FILE}")
+
+if __name__ == "__main__":
+    main()
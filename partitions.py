@@ -0,0 +1,101 @@
+import shutil
+import pandas as pd
+from pathlib import Path
+
+# --- Configuration ---
+# Partitioned layout of a table with 'Label' and 'Date' (YYYY-MM-DD) columns:
+#   <root>/section=<Label>/month=<YYYY-MM>/part-0.csv
+# Readers list the directories and open only the partitions a section/date
+# predicate can match, so a time window never loads the whole corpus.
+PART_FILE = "part-0.csv"
+UNKNOWN_MONTH = "unknown"   # Rows without a publication date
+
+
+def month_of(dates):
+    """'YYYY-MM' of every 'YYYY-MM-DD' date (UNKNOWN_MONTH where missing)."""
+    months = dates.fillna("").astype(str).str[:7]
+    return months.where(months.str.len() == 7, UNKNOWN_MONTH)
+
+
+def partition_dir(root, section, month):
+    return Path(root) / f"section={section}" / f"month={month}"
+
+
+def write_partitioned(df, root, label_col='Label', date_col='Date'):
+    """
+    Writes df partitioned by section and publication month. The previous content
+    of root is replaced, so no stale partition survives. Returns the number of partitions.
+    """
+    root = Path(root)
+    if root.exists():
+        shutil.rmtree(root)
+    root.mkdir(parents=True)
+
+    n_partitions = 0
+    for (section, month), part in df.groupby([df[label_col], month_of(df[date_col])], sort=True):
+        out_dir = partition_dir(root, section, month)
+        out_dir.mkdir(parents=True, exist_ok=True)
+        part.to_csv(out_dir / PART_FILE, index=False)
+        n_partitions += 1
+    return n_partitions
+
+
+def list_partitions(root):
+    """Returns [(section, month, path)] of every partition, without opening any file."""
+    partitions = []
+    for section_dir in sorted(Path(root).glob("section=*")):
+        for month_dir in sorted(section_dir.glob("month=*")):
+            path = month_dir / PART_FILE
+            if path.exists():
+                partitions.append((section_dir.name.split("=", 1)[1], month_dir.name.split("=", 1)[1], path))
+    return partitions
+
+
+def prune(partitions, sections=None, date_from=None, date_to=None):
+    """
+    Keeps the partitions that can hold rows matching the predicate: the section is
+    selected and the month overlaps [date_from, date_to] (inclusive, YYYY-MM-DD).
+    Undated partitions only match when there is no date predicate.
+    """
+    kept = []
+    for section, month, path in partitions:
+        if sections and section not in sections:
+            continue
+        if date_from or date_to:
+            if month == UNKNOWN_MONTH:
+                continue
+            if date_from and month < date_from[:7]:
+                continue
+            if date_to and month > date_to[:7]:
+                continue
+        kept.append((section, month, path))
+    return kept
+
+
+def read_partitioned(root, sections=None, date_from=None, date_to=None, columns=None, date_col='Date'):
+    """
+    Reads only the partitions selected by prune(), then applies the exact date
+    bounds to the rows (a month partition may straddle the bounds).
+    """
+    selected = prune(list_partitions(root), sections, date_from, date_to)
+    usecols = None if columns is None else list(dict.fromkeys(list(columns) + [date_col]))
+    frames = [pd.read_csv(path, usecols=usecols) for _, _, path in selected]
+    if not frames:
+        return pd.DataFrame(columns=usecols)
+
+    df = pd.concat(frames, ignore_index=True)
+    dates = df[date_col].astype(str)
+    if date_from:
+        df = df[dates >= date_from]
+        dates = dates[df.index]
+    if date_to:
+        df = df[dates <= date_to]
+    return df.reset_index(drop=True)
+
+
+def partition_sizes(root, sections=None, date_from=None, date_to=None):
+    """Bytes per month over the selected partitions (a cheap proxy for row counts)."""
+    sizes = {}
+    for _, month, path in prune(list_partitions(root), sections, date_from, date_to):
+        sizes[month] = sizes.get(month, 0) + path.stat().st_size
+    return dict(sorted(sizes.items()))
@@ -0,0 +1,337 @@
+import os
+import sys
+import ast
+import json
+import time
+import hashlib
+import argparse
+import subprocess
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from pathlib import Path
+from caching import path_fingerprint, file_fingerprint, cache_path
+from artifacts import resolve_artifact, load_manifest, write_manifest, RUN_DIR_ENV, BRANCH_ENV
+from feature_store import feature_artifact
+from instrumentation import path_size
+
+# --- Configuration ---
+BRANCHES = ["kb", "tfidf"]   # Feature paths to run
+MAX_PARALLEL = 2             # Stages running at the same time
+STAGE_CPUS_ENV = "PIPELINE_STAGE_CPUS"   # CPUs a stage may use for its own workers (cpu_count // MAX_PARALLEL)
+RUN_ROOT = Path("artifacts") # Every run writes to artifacts/<run id>/{shared,kb,tfidf}/
+RUN_ID = "default"
+RAW_INPUTS = {"data"}        # Inputs that live outside the run directory
+STAMP_NAMESPACE = "pipeline"
+CODE_DIR = Path(__file__).resolve().parent   # Where the stage modules live
+
+# Shared stages: raw corpus -> segmented text
+SHARED_STAGES = [
+    {"name": "sensing", "module": "sensing",
+     "inputs": ["data"], "outputs": ["sensed_data.csv", "sensed_partitions"], "params": {}},
+    {"name": "pre_processing", "module": "pre_processing",
+     "inputs": ["sensed_data.csv"], "outputs": ["preprocessed_data.csv", "preprocessed_partitions", "token_ids.npz"],
+     "params": {}},
+    {"name": "segmentation", "module": "segmentation",
+     "inputs": ["preprocessed_data.csv", "token_ids.npz"],
+     "outputs": ["segmented_data.csv", "segmented_ids.npz", "segmented_rows.npy", "segment_spec.json"],
+     "params": {}},
+]
+
+# Per-branch stages: feature path -> selection -> PCA / Validation
+BRANCH_MODULES = {
+    "kb": {"extraction": "feature_extraction", "representation": "feature_representation",
+           "selection": "feature_selection", "reduction": "Dimensionality_Reduction",
+           "features": "features_kb", "selection_params": {"NUM_FEATURES_TO_DROP": 1}},
+    "tfidf": {"extraction": "feature_extraction_tfidf", "representation": "feature_representation_tfidf",
+              "selection": "feature_selection_tfidf", "reduction": "DIM_tfidf",
+              "features": "features_tfidf", "selection_params": {"K_BEST_FEATURES": 200}},
+}
+
+
+def branch_stages(branch):
+    """
+    Builds the stage list of one feature branch (KB or TF-IDF).
+    Feature tables are named after FEATURE_FORMAT (feature stores or CSV files).
+    """
+    modules = BRANCH_MODULES[branch]
+    features = feature_artifact(modules["features"])
+    represented = feature_artifact("represented_data")
+    selected = feature_artifact("selected_features")
+    return [
+        {"name": f"feature_extraction_{branch}", "module": modules["extraction"], "branch": branch,
+         "inputs": ["segmented_data.csv", "segmented_ids.npz", "segment_spec.json"],
+         "outputs": [features], "params": {}},
+        {"name": f"feature_representation_{branch}", "module": modules["representation"], "branch": branch,
+         "inputs": [features], "outputs": [represented], "params": {}},
+        {"name": f"feature_selection_{branch}", "module": modules["selection"], "branch": branch,
+         "inputs": [represented], "outputs": [selected],
+         "params": modules["selection_params"]},
+        {"name": f"pca_{branch}", "module": modules["reduction"], "branch": branch,
+         "inputs": [selected], "outputs": ["pca_data.csv"], "params": {}},
+        {"name": f"validation_{branch}", "module": "Validation", "branch": branch,
+         "inputs": [selected, "preprocessed_partitions", "segmented_rows.npy", "segmented_data.csv", "segment_spec.json"],
+         "outputs": [], "params": {}},
+    ]
+
+
+def build_dag(branches=BRANCHES, run_dir=None):
+    """
+    Returns the stages and, for every stage, the names of the stages it depends on.
+    Artifact names are resolved to their run- and branch-namespaced paths
+    (see artifacts.py), so each branch reads the outputs of its own upstream stages.
+    """
+    stages = [dict(stage, branch=None) for stage in SHARED_STAGES]
+    for branch in branches:
+        stages.extend(branch_stages(branch))
+
+    def resolve(name, branch):
+        return name if name in RAW_INPUTS else resolve_artifact(name, run_dir, branch)
+
+    for stage in stages:
+        stage["inputs"] = [resolve(name, stage["branch"]) for name in stage["inputs"]]
+        stage["outputs"] = [resolve(name, stage["branch"]) for name in stage["outputs"]]
+
+    producers = {}
+    for stage in stages:
+        for output in stage["outputs"]:
+            assert output not in producers, f"'{output}' is written by both {producers[output]} and {stage['name']}."
+            producers[output] = stage["name"]
+
+    dependencies = {
+        stage["name"]: {producers[path] for path in stage["inputs"] if path in producers}
+        for stage in stages
+    }
+
+    return stages, dependencies
+
+
+def module_sources(module, seen=None):
+    """
+    Source files of a stage module and of every project module it imports
+    (e.g. Dim.py -> reduction.py -> plotting.py), found by parsing the imports.
+    """
+    seen = set() if seen is None else seen
+    path = CODE_DIR / f"{module}.py"
+    if module in seen or not path.exists():
+        return seen
+    seen.add(module)
+
+    for node in ast.walk(ast.parse(path.read_text(encoding="utf-8"))):
+        if isinstance(node, ast.Import):
+            names = [alias.name for alias in node.names]
+        elif isinstance(node, ast.ImportFrom) and node.module:
+            names = [node.module]
+        else:
+            continue
+        for name in names:
+            module_sources(name.split(".")[0], seen)
+    return seen
+
+
+def artifact_fingerprint(path):
+    """
+    Content fingerprint of an artifact. Directory artifacts (feature stores, partitions)
+    are rewritten on every run, so their files are hashed rather than listed; only the
+    raw corpus keeps the cheap listing fingerprint.
+    """
+    return path_fingerprint(path, content=path not in RAW_INPUTS)
+
+
+def stage_fingerprint(stage):
+    """
+    Fingerprint of everything that determines a stage's outputs:
+    its input artifacts, its parameters and the source code it runs.
+    """
+    digest = hashlib.sha256()
+    digest.update(json.dumps({"module": stage["module"], "params": stage["params"]}, sort_keys=True).encode("utf-8"))
+    for module in sorted(module_sources(stage["module"])):
+        digest.update(file_fingerprint(CODE_DIR / f"{module}.py").encode("utf-8"))
+    for path in stage["inputs"]:
+        digest.update(f"{path}={artifact_fingerprint(path)}".encode("utf-8"))
+    return digest.hexdigest()
+
+
+def is_up_to_date(stage, fingerprint, run_id):
+    """
+    A stage is skipped when its recorded fingerprint matches and every output still
+    has the content it produced.
+    """
+    stamp_file = cache_path(f"{STAMP_NAMESPACE}/{run_id}", stage["name"], ".json")
+    if not stamp_file.exists():
+        return False
+    stamp = json.loads(stamp_file.read_text(encoding="utf-8"))
+    if stamp.get("fingerprint") != fingerprint:
+        return False
+    return all(artifact_fingerprint(path) == stamp["outputs"].get(path) for path in stage["outputs"])
+
+
+def write_stamp(stage, fingerprint, elapsed, run_id):
+    stamp = {
+        "fingerprint": fingerprint,
+        "outputs": {path: artifact_fingerprint(path) for path in stage["outputs"]},
+        "elapsed_s": round(elapsed, 3),
+        "finished_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+    }
+    cache_path(f"{STAMP_NAMESPACE}/{run_id}", stage["name"], ".json").write_text(json.dumps(stamp, indent=1), encoding="utf-8")
+
+
+def stage_command(stage):
+    """Runs the stage module's main() in a fresh interpreter with its parameter overrides."""
+    overrides = "".join(f"{stage['module']}.{key} = {value!r}; " for key, value in stage["params"].items())
+    return [sys.executable, "-c", f"import {stage['module']}; {overrides}{stage['module']}.main()"]
+
+
+def stage_env(stage, run_dir, max_parallel=MAX_PARALLEL):
+    """
+    Environment of a stage process: its artifact namespace, headless plotting,
+    instrumentation and its share of the CPUs (stages running side by side must
+    not each start a worker per core).
+    """
+    env = dict(os.environ)
+    env[RUN_DIR_ENV] = str(run_dir)
+    env[BRANCH_ENV] = stage["branch"] or ""
+    env["INSTRUMENT_STAGE"] = stage["name"]
+    env.setdefault("INSTRUMENT_DIR", str(Path(run_dir) / "instrumentation"))
+    env.setdefault("PLOT_MODE", "off")   # Unattended run: never block on a plot window
+    env.setdefault("PLOT_DIR", str(Path(run_dir) / (stage["branch"] or "shared") / "plots"))
+    env.setdefault(STAGE_CPUS_ENV, str(max(1, (os.cpu_count() or 1) // max_parallel)))
+    return env
+
+
+def run_stage(stage, run_dir, run_id, force=False, max_parallel=MAX_PARALLEL):
+    """
+    Runs one stage unless its inputs, parameters and code are unchanged.
+    The stage finds its artifacts through the PIPELINE_RUN_DIR / PIPELINE_BRANCH
+    variables. Output is written to <run_dir>/logs/<stage>.log (stages may run in parallel).
+    Returns "skipped", "done" or "failed".
+    """
+    fingerprint = stage_fingerprint(stage)
+    if not force and is_up_to_date(stage, fingerprint, run_id):
+        return "skipped"
+
+    log_dir = Path(run_dir) / "logs"
+    log_dir.mkdir(parents=True, exist_ok=True)
+    for path in stage["outputs"]:
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+
+    start = time.perf_counter()
+    with open(log_dir / f"{stage['name']}.log", "w", encoding="utf-8") as log:
+        result = subprocess.run(stage_command(stage), stdout=log, stderr=subprocess.STDOUT, env=stage_env(stage, run_dir, max_parallel))
+    elapsed = time.perf_counter() - start
+
+    # A stage that did not produce its outputs failed, even with exit code 0
+    if result.returncode != 0 or not all(Path(path).exists() for path in stage["outputs"]):
+        return "failed"
+
+    write_stamp(stage, fingerprint, elapsed, run_id)
+    return "done"
+
+
+def conflicts(stage, running):
+    """
+    True if the stage cannot start next to the running ones: it writes a file
+    another running stage reads or writes, or it reads a file being written.
+    """
+    for other in running:
+        if set(stage["outputs"]) & (set(other["outputs"]) | set(other["inputs"])):
+            return True
+        if set(stage["inputs"]) & set(other["outputs"]):
+            return True
+    return False
+
+
+def update_manifest(run_dir, run_id, branches, stages, status):
+    """
+    Records in <run_dir>/manifest.json which stage and branch produced every
+    artifact, with its content fingerprint and size.
+    """
+    manifest = load_manifest(run_dir)
+    manifest["run_id"] = run_id
+    manifest["branches"] = sorted(set(manifest.get("branches", [])) | set(branches))
+
+    for stage in stages:
+        manifest["stages"][stage["name"]] = {"status": status.get(stage["name"]), "branch": stage["branch"]}
+        if status.get(stage["name"]) not in ("done", "skipped"):
+            continue
+        for path in stage["outputs"]:
+            manifest["artifacts"][Path(path).relative_to(run_dir).as_posix()] = {
+                "stage": stage["name"],
+                "branch": stage["branch"] or "shared",
+                "fingerprint": artifact_fingerprint(path),
+                "bytes": path_size(path),   # Directory artifacts (stores, partitions): every file under them
+            }
+
+    return write_manifest(run_dir, manifest)
+
+
+def run_pipeline(branches=BRANCHES, max_parallel=MAX_PARALLEL, force=False, run_id=RUN_ID):
+    """
+    Runs the DAG: every stage starts as soon as its dependencies are finished,
+    up to max_parallel at a time. Stages whose fingerprint has not changed are skipped.
+    Branches write to separate namespaces, so the KB and TF-IDF paths run
+    concurrently and stay cached side by side.
+    Returns {stage name: status}.
+    """
+    run_dir = RUN_ROOT / run_id
+    stages, dependencies = build_dag(branches, run_dir)
+    by_name = {stage["name"]: stage for stage in stages}
+
+    status = {}
+    pending = [stage["name"] for stage in stages]
+    running = {}
+
+    with ThreadPoolExecutor(max_workers=max_parallel) as executor:
+        while pending or running:
+            # Drop stages whose dependencies failed
+            for name in list(pending):
+                if any(status.get(dep) in ("failed", "blocked") for dep in dependencies[name]):
+                    status[name] = "blocked"
+                    pending.remove(name)
+
+            # Start every ready stage that does not conflict with the running ones
+            for name in list(pending):
+                if len(running) >= max_parallel:
+                    break
+                ready = all(status.get(dep) in ("done", "skipped") for dep in dependencies[name])
+                if ready and not conflicts(by_name[name], [by_name[n] for n in running.values()]):
+                    print(f"-> {name}")
+                    running[executor.submit(run_stage, by_name[name], run_dir, run_id, force, max_parallel)] = name
+                    pending.remove(name)
+
+            if not running:
+                break
+
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                name = running.pop(future)
+                status[name] = future.result()
+                print(f"   {name}: {status[name]}")
+
+    for name in pending:
+        status.setdefault(name, "blocked")
+
+    manifest_path = update_manifest(run_dir, run_id, branches, stages, status)
+    print(f"Manifest written to {manifest_path}")
+    return status
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the pipeline stages, skipping unchanged ones.")
+    parser.add_argument("--branches", nargs="+", default=BRANCHES, choices=list(BRANCH_MODULES))
+    parser.add_argument("--max-parallel", type=int, default=MAX_PARALLEL)
+    parser.add_argument("--force", action="store_true", help="Re-run every stage")
+    parser.add_argument("--run-id", default=RUN_ID, help=f"Artifacts go to {RUN_ROOT}/<run id>/")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    status = run_pipeline(args.branches, args.max_parallel, args.force, args.run_id)
+
+    print("\n Pipeline Summary ")
+    for name, result in status.items():
+        print(f"{name:32s} {result}")
+    print(f"Total time: {time.perf_counter() - start:.1f}s (logs in {RUN_ROOT / args.run_id / 'logs'})")
+
+    if any(result in ("failed", "blocked") for result in status.values()):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
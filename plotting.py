@@ -0,0 +1,83 @@
+import os
+import numpy as np
+import pandas as pd
+from pathlib import Path
+
+# --- Configuration ---
+# PLOT_MODE controls every visualization stage:
+#   "show" - open an interactive window (default, blocks until closed)
+#   "save" - headless: render with a non-interactive backend and write PNG files
+#   "off"  - skip plotting entirely
+# All three settings can be overridden from the environment for unattended runs,
+# e.g. PLOT_MODE=save PLOT_SAMPLE_CAP=2000 python feature_selection.py
+PLOT_MODE = os.environ.get("PLOT_MODE", "show")
+PLOT_DIR = Path(os.environ.get("PLOT_DIR", "plots"))
+PLOT_SAMPLE_CAP = int(os.environ.get("PLOT_SAMPLE_CAP", "5000"))  # Max points per plot
+SEED = 42
+
+assert PLOT_MODE in ("show", "save", "off"), f"Unknown PLOT_MODE '{PLOT_MODE}'."
+
+
+def pyplot():
+    """
+    Imports matplotlib.pyplot on first use, so modules that may plot do not pay
+    for matplotlib unless they actually draw something. The backend must be
+    chosen before pyplot is imported anywhere: plotting code gets pyplot from here.
+    """
+    import matplotlib
+    if PLOT_MODE != "show":
+        matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    return plt
+
+
+def plotting_enabled():
+    """Returns False when plotting is switched off (PLOT_MODE=off)."""
+    return PLOT_MODE != "off"
+
+
+def stratified_sample_indices(labels, cap=PLOT_SAMPLE_CAP, seed=SEED):
+    """
+    Returns sorted row positions of a stratified random sample of at most ~cap rows.
+    Every class keeps its share of the data (and at least one point), so the
+    plots look the same as on the full data while rendering in constant time.
+    """
+    labels = np.asarray(labels)
+    if len(labels) <= cap:
+        return np.arange(len(labels))
+
+    rng = np.random.default_rng(seed)
+    fraction = cap / len(labels)
+    keep = []
+    for label in pd.unique(labels):
+        idx = np.flatnonzero(labels == label)
+        n = max(1, int(round(len(idx) * fraction)))
+        keep.append(rng.choice(idx, size=min(n, len(idx)), replace=False))
+
+    return np.sort(np.concatenate(keep))
+
+
+def stratified_sample(df, label_col='Label', cap=PLOT_SAMPLE_CAP, seed=SEED):
+    """Stratified subsample of a DataFrame by its label column (see stratified_sample_indices)."""
+    idx = stratified_sample_indices(df[label_col], cap, seed)
+    if len(idx) < len(df):
+        print(f"Plotting a stratified sample of {len(idx)} out of {len(df)} rows.")
+    return df.iloc[idx]
+
+
+def finish_plot(name):
+    """
+    Shows the current figure, or writes it to PLOT_DIR/<name>.png in headless mode.
+    The figure is always closed afterwards so batch runs do not accumulate memory.
+    """
+    plt = pyplot()
+
+    if PLOT_MODE == "save":
+        PLOT_DIR.mkdir(parents=True, exist_ok=True)
+        out_path = PLOT_DIR / f"{name}.png"
+        plt.savefig(out_path, dpi=100)
+        print(f"Plot saved to {out_path}")
+    else:
+        plt.show()
+
+    plt.close('all')
@@ -1,17 +1,40 @@
-import pandas as pd
 import re
-import nltk
-from nltk.corpus import stopwords
-from nltk.stem import WordNetLemmatizer
+from functools import lru_cache
 from pathlib import Path
+from artifacts import artifact_path
+from token_ids import encode_fields, save_token_ids
+from instrumentation import instrumented, span, record_read, record_write
 
 # --- Configuration ---
-INPUT_FILE = "sensed_data.csv"
-OUTPUT_FILE = "preprocessed_data.csv"
+INPUT_FILE = artifact_path("sensed_data.csv")
+OUTPUT_FILE = artifact_path("preprocessed_data.csv")
+OUTPUT_PARTITIONS = artifact_path("preprocessed_partitions")   # Same rows, partitioned by section and month
+WRITE_PARTITIONS = True
+CACHE_CLEAN_TEXT = True   # Reuse the cleaned text of unchanged articles from earlier runs (see clean_cache.py)
+OUTPUT_TOKEN_IDS = artifact_path("token_ids.npz")   # Cleaned title/body as int32 token ids (see token_ids.py)
+WRITE_TOKEN_IDS = True
+
+# Cleaning parameters. They are stored in saved models (inference.py), so a model
+# always cleans new text exactly as its training data was cleaned.
+# Bump CLEAN_TEXT_VERSION whenever clean_text changes its output.
+CLEAN_TEXT_VERSION = 1
+MIN_WORD_LENGTH = 3
+LEMMA_POS = 'v'
+CLEAN_TEXT_CONFIG = {
+    "version": CLEAN_TEXT_VERSION,
+    "lowercase": True,
+    "keep_pattern": "[a-z\\s]",
+    "stop_words": "nltk-english",
+    "min_word_length": MIN_WORD_LENGTH,
+    "lemmatizer": "wordnet",
+    "lemma_pos": LEMMA_POS,
+}
 
 # --- NLTK Setup (Fail Fast & Robustness) ---
 def download_nltk_resources():
     """Ensures necessary NLTK datasets are available."""
+    import nltk
+
     resources = ['punkt', 'wordnet', 'stopwords', 'omw-1.4']
     for res in resources:
         try:
@@ -20,9 +43,25 @@ def download_nltk_resources():
             print(f"Downloading NLTK resource: {res}")
             nltk.download(res, quiet=True)
 
-download_nltk_resources()
-LEMMATIZER = WordNetLemmatizer()
-STOP_WORDS = set(stopwords.words('english'))
+@lru_cache(maxsize=None)
+def nltk_resources():
+    """
+    Loads the lemmatizer and the stop word list on first use (not at import),
+    so importing this module, e.g. for CLEAN_TEXT_CONFIG, does not load NLTK.
+    """
+    from nltk.corpus import stopwords
+    from nltk.stem import WordNetLemmatizer
+
+    download_nltk_resources()
+    return WordNetLemmatizer(), set(stopwords.words('english'))
+
+@lru_cache(maxsize=200_000)
+def lemmatize(word):
+    """
+    WordNet lemmatization is the slowest part of cleaning. The vocabulary is
+    much smaller than the number of tokens, so results are memoized per word.
+    """
+    return nltk_resources()[0].lemmatize(word, pos=LEMMA_POS)
 
 def clean_text(text):
     """
@@ -50,18 +89,26 @@ def clean_text(text):
     
     # 5. Stop Word Removal & Lemmatization
     # Ref: Lecture 2, Slide 87 (Compact size, faster processing)
+    stop_words = nltk_resources()[1]
     processed_words = [
-        LEMMATIZER.lemmatize(word, pos='v') 
+        lemmatize(word) 
         for word in words 
-        if word not in STOP_WORDS and len(word) > 2 # Skip 1-2 letter garbage
+        if word not in stop_words and len(word) >= MIN_WORD_LENGTH # Skip 1-2 letter garbage
     ]
     
     return " ".join(processed_words)
 
+@instrumented("pre_processing")
 def main():
+    import pandas as pd
+    from partitions import write_partitioned
+    from clean_cache import CleanTextCache
+
     # 1. Load Data
 
-    df = pd.read_csv(INPUT_FILE)
+    with span("read_csv"):
+        df = pd.read_csv(INPUT_FILE)
+    record_read(INPUT_FILE, rows=len(df))
     print(f"Loaded {len(df)} rows from {INPUT_FILE}.")
 
     # 2. Handling Missing Values
@@ -88,8 +135,16 @@ def main():
     print("Processing text (Cleaning, Lemmatizing)...")
     
     # We process both Body and Title as both are useful features
-    df['CleanedBody'] = df['BodyText'].apply(clean_text)
-    df['CleanedTitle'] = df['Title'].apply(clean_text)
+    with span("clean_text"):
+        if CACHE_CLEAN_TEXT:
+            # Only new or edited texts are cleaned; the rest comes from the cache
+            with CleanTextCache(CLEAN_TEXT_CONFIG) as cache:
+                df['CleanedBody'] = cache.clean_series(df['BodyText'], clean_text)
+                df['CleanedTitle'] = cache.clean_series(df['Title'], clean_text)
+            print(f"clean_text cache: {cache.hits} hits, {cache.misses} misses ({cache.hit_rate:.1%} hit rate).")
+        else:
+            df['CleanedBody'] = df['BodyText'].apply(clean_text)
+            df['CleanedTitle'] = df['Title'].apply(clean_text)
 
     # 5. Final Sanity Check
     # Remove rows that became empty strings after cleaning (e.g., a body with only numbers)
@@ -99,8 +154,26 @@ def main():
 
     # 6. Save
     # We keep the original Label but use the Cleaned text for the next stages
-    output_columns = ['Label', 'CleanedTitle', 'CleanedBody'] 
-    df[output_columns].to_csv(OUTPUT_FILE, index=False)
+    # The publication date is kept for time-based experiments
+    output_columns = ['Label', 'Date', 'CleanedTitle', 'CleanedBody'] 
+    with span("to_csv"):
+        df[output_columns].to_csv(OUTPUT_FILE, index=False)
+    record_write(OUTPUT_FILE, rows=len(df))
+
+    if WRITE_PARTITIONS:
+        with span("write_partitions"):
+            # 'Article' is the row in OUTPUT_FILE, so a reader can join partition rows back to it
+            n_partitions = write_partitioned(df[output_columns].assign(Article=range(len(df))), OUTPUT_PARTITIONS)
+        record_write(OUTPUT_PARTITIONS, rows=len(df))
+        print(f"Wrote {n_partitions} section/month partitions to {OUTPUT_PARTITIONS}")
+
+    if WRITE_TOKEN_IDS:
+        # Tokenized once here; the later stages count ids instead of splitting strings again
+        with span("encode_token_ids"):
+            vocab, fields = encode_fields({'CleanedTitle': df['CleanedTitle'], 'CleanedBody': df['CleanedBody']})
+            save_token_ids(OUTPUT_TOKEN_IDS, vocab, fields, df['Label'])
+        record_write(OUTPUT_TOKEN_IDS, rows=len(df))
+        print(f"Encoded {len(vocab)} distinct tokens to {OUTPUT_TOKEN_IDS}")
     
     print(f"Success! Pre-processed data saved to {OUTPUT_FILE}")
 
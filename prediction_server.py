@@ -0,0 +1,233 @@
+import os
+import json
+import time
+import asyncio
+import collections
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from inference import load_bundle, BUNDLE_FILE
+
+# --- Configuration ---
+HOST = os.environ.get("PREDICTION_HOST", "127.0.0.1")
+PORT = int(os.environ.get("PREDICTION_PORT", 8080))
+BATCH_WINDOW_MS = 5      # How long the first request of a batch may wait for others
+MAX_BATCH_SIZE = 256     # Documents per micro-batch
+LATENCY_SAMPLES = 10000  # Recent request latencies kept for the percentiles
+MAX_BODY_BYTES = 10 * 1024 * 1024
+
+# Usage:
+#   python prediction_server.py            (PREDICTION_HOST / PREDICTION_PORT override the address)
+#   curl -X POST localhost:8080/predict -d '{"texts": ["Late goal wins the derby"]}'
+#   curl localhost:8080/metrics
+
+
+class ServerStats:
+    """Request latency percentiles and throughput counters."""
+
+    def __init__(self):
+        self.started_at = time.perf_counter()
+        self.latencies_ms = collections.deque(maxlen=LATENCY_SAMPLES)
+        self.requests = 0
+        self.documents = 0
+        self.batches = 0
+        self.batched_documents = 0
+        self.errors = 0
+
+    def record_request(self, latency_ms, n_documents):
+        self.requests += 1
+        self.documents += n_documents
+        self.latencies_ms.append(latency_ms)
+
+    def record_batch(self, n_documents):
+        self.batches += 1
+        self.batched_documents += n_documents
+
+    def snapshot(self):
+        uptime = time.perf_counter() - self.started_at
+        latencies = np.array(self.latencies_ms) if self.latencies_ms else np.zeros(1)
+        return {
+            "uptime_s": round(uptime, 3),
+            "requests": self.requests,
+            "documents": self.documents,
+            "errors": self.errors,
+            "batches": self.batches,
+            "mean_batch_size": round(self.batched_documents / self.batches, 2) if self.batches else 0,
+            "latency_p50_ms": round(float(np.percentile(latencies, 50)), 3),
+            "latency_p99_ms": round(float(np.percentile(latencies, 99)), 3),
+            "throughput_docs_per_s": round(self.documents / uptime, 2) if uptime > 0 else 0,
+        }
+
+
+class MicroBatcher:
+    """
+    Groups concurrent requests into one predict_batch call.
+    The first request of a batch waits at most BATCH_WINDOW_MS for others, so
+    under load the per-call Python overhead is shared by many documents while
+    a lone request only pays the window.
+    """
+
+    def __init__(self, bundle, stats, window_ms=BATCH_WINDOW_MS, max_batch_size=MAX_BATCH_SIZE):
+        self.bundle = bundle
+        self.stats = stats
+        self.window_s = window_ms / 1000
+        self.max_batch_size = max_batch_size
+        self.queue = asyncio.Queue()
+        # One worker thread: the model runs off the event loop, batches run in order
+        self.executor = ThreadPoolExecutor(max_workers=1)
+
+    async def predict(self, texts):
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((texts, future))
+        return await future
+
+    async def _collect(self):
+        loop = asyncio.get_running_loop()
+        batch = [await self.queue.get()]
+        n_documents = len(batch[0][0])
+        deadline = loop.time() + self.window_s
+
+        while n_documents < self.max_batch_size:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                item = await asyncio.wait_for(self.queue.get(), timeout=remaining)
+            except asyncio.TimeoutError:
+                break
+            batch.append(item)
+            n_documents += len(item[0])
+
+        return batch
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect()
+            texts = [text for request_texts, _ in batch for text in request_texts]
+            try:
+                labels = await loop.run_in_executor(self.executor, self.bundle.predict_batch, texts)
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            self.stats.record_batch(len(texts))
+            start = 0
+            for request_texts, future in batch:
+                if not future.done():
+                    future.set_result([str(label) for label in labels[start:start + len(request_texts)]])
+                start += len(request_texts)
+
+
+async def read_request(reader):
+    """
+    Reads one HTTP/1.1 request. Returns (method, path, headers, body),
+    or None when the client closed the connection.
+    """
+    request_line = await reader.readline()
+    if not request_line:
+        return None
+    method, path, _ = request_line.decode('latin-1').split(' ', 2)
+
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b'\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        headers[name.strip().lower()] = value.strip()
+
+    length = int(headers.get('content-length', 0))
+    if length > MAX_BODY_BYTES:
+        raise ValueError("Request body too large.")
+    body = await reader.readexactly(length) if length else b''
+    return method, path, headers, body
+
+
+def write_response(writer, status, payload, keep_alive):
+    reasons = {200: "OK", 400: "Bad Request", 404: "Not Found", 500: "Internal Server Error"}
+    body = json.dumps(payload).encode('utf-8')
+    head = (
+        f"HTTP/1.1 {status} {reasons[status]}\r\n"
+        f"Content-Type: application/json\r\n"
+        f"Content-Length: {len(body)}\r\n"
+        f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+    )
+    writer.write(head.encode('latin-1') + body)
+
+
+class PredictionServer:
+    """HTTP front-end: /predict (POST), /metrics and /health (GET)."""
+
+    def __init__(self, bundle):
+        self.bundle = bundle
+        self.stats = ServerStats()
+        self.batcher = MicroBatcher(bundle, self.stats)
+
+    async def route(self, method, path, body):
+        if method == "GET" and path == "/health":
+            return 200, {"status": "ok", "bundle_version": self.bundle.version, "classes": [str(c) for c in self.bundle.classes]}
+        if method == "GET" and path == "/metrics":
+            return 200, self.stats.snapshot()
+        if method == "POST" and path == "/predict":
+            start = time.perf_counter()
+            request = json.loads(body or b'{}')
+            texts = None
+            if isinstance(request, dict):
+                texts = request.get("texts", [request["text"]] if "text" in request else None)
+            if not isinstance(texts, list) or not texts or not all(isinstance(text, str) for text in texts):
+                return 400, {"error": "Expected JSON {\"texts\": [\"...\", ...]} or {\"text\": \"...\"} with string texts."}
+            labels = await self.batcher.predict(texts)
+            self.stats.record_request(1000 * (time.perf_counter() - start), len(texts))
+            return 200, {"labels": labels}
+        return 404, {"error": f"No route for {method} {path}."}
+
+    async def handle_client(self, reader, writer):
+        try:
+            while True:
+                request = await read_request(reader)
+                if request is None:
+                    break
+                method, path, headers, body = request
+                keep_alive = headers.get('connection', '').lower() != 'close'
+                try:
+                    status, payload = await self.route(method, path, body)
+                except (ValueError, KeyError) as e:
+                    self.stats.errors += 1
+                    status, payload = 400, {"error": str(e)}
+                except Exception as e:
+                    self.stats.errors += 1
+                    status, payload = 500, {"error": str(e)}
+                write_response(writer, status, payload, keep_alive)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host=None, port=None):
+        # Read at call time, so a changed HOST / PORT is honoured
+        host = host or HOST
+        port = port or PORT
+        batcher_task = asyncio.create_task(self.batcher.run())
+        server = await asyncio.start_server(self.handle_client, host, port)
+        print(f"Serving predictions on http://{host}:{port} "
+              f"(batch window {BATCH_WINDOW_MS} ms, max batch {MAX_BATCH_SIZE})")
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            batcher_task.cancel()
+
+
+def main():
+    # Artifacts are loaded once, at startup
+    bundle = load_bundle(BUNDLE_FILE)
+    print(f"Loaded inference bundle v{bundle.version} from {BUNDLE_FILE}")
+    asyncio.run(PredictionServer(bundle).serve())
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,306 @@
+import numpy as np
+import pandas as pd
+from plotting import plotting_enabled, stratified_sample, finish_plot, pyplot
+from pathlib import Path
+from artifacts import artifact_path
+from feature_store import feature_artifact, is_store, FeatureStore, feature_arrays
+from instrumentation import instrumented, span, record_read, record_write
+
+# --- Configuration ---
+INPUT_FILE = artifact_path(feature_artifact("selected_features"))
+OUTPUT_FILE = artifact_path("pca_data.csv")
+N_COMPONENTS = 3        # 2 or 3 for visualization (Lecture 2, Slide 51)
+SOLVER = "auto"         # One of: "auto", "full", "randomized", "truncated_svd"
+WIDE_FEATURE_THRESHOLD = 500   # Above this many features, exact SVD is replaced by randomized SVD
+SEED = 42
+
+# Streaming mode: fit and transform batch by batch with IncrementalPCA
+MODE = "memory"         # "memory" (load everything) or "streaming" (bounded memory)
+BATCH_SIZE = 10000      # Rows per batch in streaming mode
+VERIFY_MAX_ROWS = 20000 # Streaming results are checked against in-memory PCA up to this size
+
+SOLVERS = ("auto", "full", "randomized", "truncated_svd")
+
+
+def choose_solver(X, solver=SOLVER):
+    """
+    Picks the decomposition for the input when solver="auto":
+    - sparse input  -> TruncatedSVD (works on the sparse matrix, no dense centering)
+    - wide input    -> randomized PCA (only the first components are computed)
+    - otherwise     -> exact PCA (full SVD)
+    """
+    from scipy import sparse
+
+    assert solver in SOLVERS, f"Unknown solver '{solver}'. Choose from {SOLVERS}."
+    if solver != "auto":
+        return solver
+    if sparse.issparse(X):
+        return "truncated_svd"
+    if X.shape[1] > WIDE_FEATURE_THRESHOLD:
+        return "randomized"
+    return "full"
+
+
+def reduce_dimensions(X, n_components=N_COMPONENTS, solver=SOLVER):
+    """
+    Projects the samples of X onto their first n_components components.
+    Ref: Lecture 2, Slide 53 ("Project the samples onto the first PCs")
+
+    X can be a dense array or a scipy sparse matrix (e.g. a TF-IDF matrix).
+    Returns the projected samples and the fitted model, whose
+    explained_variance_ratio_ reports how much information was preserved.
+    """
+    from scipy import sparse
+    from sklearn.decomposition import PCA, TruncatedSVD
+
+    solver = choose_solver(X, solver)
+
+    if sparse.issparse(X) and solver != "truncated_svd":
+        raise ValueError(f"Solver '{solver}' needs dense centering; use 'truncated_svd' for sparse input.")
+
+    if solver == "truncated_svd":
+        model = TruncatedSVD(n_components=n_components, algorithm="randomized", random_state=SEED)
+    else:
+        model = PCA(n_components=n_components, svd_solver=solver, random_state=SEED)
+
+    print(f"Reducing {X.shape[1]} features to {n_components} components (solver: {solver})...")
+    X_reduced = model.fit_transform(X)
+
+    # Print Explained Variance Ratio
+    # Ref: Slide 53 (PCA preserves "important information and variations")
+    print(f"Explained Variance Ratio: {model.explained_variance_ratio_}")
+    print(f"Total Information Preserved in {n_components} components: {sum(model.explained_variance_ratio_):.2%}")
+
+    return X_reduced, model
+
+
+def perform_reduction(df, n_components=N_COMPONENTS, solver=SOLVER):
+    """
+    Runs the reduction on a labelled feature table.
+    Returns a DataFrame with the 'Label' column followed by PC1..PCn.
+    """
+    # Fail Fast: Check for data
+    if 'Label' not in df.columns:
+        raise ValueError("Input data missing 'Label' column.")
+
+    feature_cols = [col for col in df.columns if col != 'Label']
+    if len(feature_cols) < n_components:
+        print(f"Warning: Dataset has fewer than {n_components} features. PCA for visualization is trivial.")
+
+    return reduce_table(df[feature_cols].to_numpy(), df['Label'].to_numpy(), n_components, solver)
+
+
+def reduce_table(X, labels, n_components=N_COMPONENTS, solver=SOLVER):
+    """Reduces X (e.g. the memory-mapped matrix of a feature store) into a 'Label' + PC1..PCn DataFrame."""
+    X_reduced, _ = reduce_dimensions(X, n_components, solver)
+
+    pca_df = pd.DataFrame(data=X_reduced, columns=[f'PC{i+1}' for i in range(X_reduced.shape[1])])
+    pca_df.insert(0, 'Label', labels)
+
+    return pca_df
+
+
+def visualize_2d(df):
+    """
+    Creates a 2D Scatter Plot of the Principal Components.
+    Ref: Lecture 2, Slide 54 (Shows a 2D projection example)
+    """
+    plt = pyplot()
+    import seaborn as sns
+
+    plt.figure(figsize=(10, 8))
+
+    sns.scatterplot(data=df, x='PC1', y='PC2', hue='Label', palette='bright', s=100, alpha=0.7)
+
+    plt.title('2D Visualization of Guardian Articles (PCA)')
+    plt.xlabel('Principal Component 1')
+    plt.ylabel('Principal Component 2')
+    plt.legend(title='Category')
+    plt.grid(True, linestyle='--', alpha=0.5)
+
+    finish_plot("pca_2d")
+
+
+def visualize_3d(df):
+    """
+    Creates a 3D Scatter Plot of the Principal Components.
+    Ref: Lecture 2, Slide 51 ("visualize the data in 2 or 3 dimensions")
+    """
+    plt = pyplot()
+    fig = plt.figure(figsize=(10, 8))
+    ax = fig.add_subplot(111, projection='3d')
+
+    # Map labels to colors; cycle through the colors if there are more labels
+    colors = ['r', 'g', 'b', 'orange', 'purple', 'cyan']
+    for i, label in enumerate(df['Label'].unique()):
+        subset = df[df['Label'] == label]
+        ax.scatter(subset['PC1'], subset['PC2'], subset['PC3'],
+                   label=label, c=colors[i % len(colors)], s=50, alpha=0.6)
+
+    ax.set_xlabel('Principal Component 1')
+    ax.set_ylabel('Principal Component 2')
+    ax.set_zlabel('Principal Component 3')
+    ax.set_title('3D Visualization of Guardian Articles (PCA)')
+    ax.legend(title='Category')
+
+    finish_plot("pca_3d")
+
+
+def visualize(df, n_components=N_COMPONENTS):
+    """
+    Plots the projection in 2D or 3D (on a stratified sample, see plotting.py).
+    """
+    if not plotting_enabled():
+        print("Plotting disabled (PLOT_MODE=off).")
+        return
+    if n_components not in (2, 3):
+        print(f"Skipping visualization: {n_components} components cannot be plotted.")
+        return
+
+    df = stratified_sample(df)
+    if n_components == 2:
+        visualize_2d(df)
+    else:
+        visualize_3d(df)
+
+
+def iter_feature_batches(input_file, batch_size=BATCH_SIZE):
+    """
+    Streams (labels, features) batches from the selected-feature table.
+    Only one batch of batch_size rows is held in memory at a time
+    (for a store, a batch is a slice of the memory-mapped matrix).
+    """
+    if is_store(input_file):
+        store = FeatureStore(input_file)
+        for start in range(0, len(store), batch_size):
+            yield store.labels[start:start + batch_size], np.asarray(store.X[start:start + batch_size])
+        return
+
+    for chunk in pd.read_csv(input_file, chunksize=batch_size):
+        yield chunk['Label'].to_numpy(), chunk.drop(columns=['Label']).to_numpy()
+
+
+def fit_incremental(input_file, n_components=N_COMPONENTS, batch_size=BATCH_SIZE):
+    """
+    Pass 1: fits IncrementalPCA over batches of the input file.
+    Memory is bounded by batch_size rows, not by the size of the dataset.
+    """
+    from sklearn.decomposition import IncrementalPCA
+
+    ipca = IncrementalPCA(n_components=n_components)
+    carry = None
+    for _, X in iter_feature_batches(input_file, batch_size):
+        if carry is not None:
+            X = np.vstack([carry, X])
+            carry = None
+        # Too few rows for a partial_fit: keep them for the next batch
+        if len(X) < n_components:
+            carry = X
+            continue
+        ipca.partial_fit(X)
+
+    if carry is not None:
+        if not hasattr(ipca, "components_"):
+            raise ValueError(f"Need at least {n_components} rows to fit {n_components} components.")
+        print(f"Warning: {len(carry)} trailing rows were not used for fitting (fewer than {n_components}).")
+
+    return ipca
+
+
+def streaming_reduction(input_file=INPUT_FILE, output_file=OUTPUT_FILE,
+                        n_components=N_COMPONENTS, batch_size=BATCH_SIZE):
+    """
+    Reduces a feature file larger than RAM in two streaming passes:
+    1. IncrementalPCA.partial_fit on every batch
+    2. transform every batch and append it to the output file
+    Returns the fitted IncrementalPCA and the number of rows projected.
+    """
+    print(f"Streaming reduction of {input_file} in batches of {batch_size} rows...")
+    ipca = fit_incremental(input_file, n_components, batch_size)
+
+    print(f"Explained Variance Ratio: {ipca.explained_variance_ratio_}")
+    print(f"Total Information Preserved in {n_components} components: {sum(ipca.explained_variance_ratio_):.2%}")
+
+    total_rows = 0
+    header = True
+    for labels, X in iter_feature_batches(input_file, batch_size):
+        pca_df = pd.DataFrame(data=ipca.transform(X), columns=[f'PC{i+1}' for i in range(n_components)])
+        pca_df.insert(0, 'Label', labels)
+        pca_df.to_csv(output_file, index=False, mode='w' if header else 'a', header=header)
+        header = False
+        total_rows += len(pca_df)
+
+    print(f"Projected {total_rows} rows to {output_file}")
+    return ipca, total_rows
+
+
+def verify_streaming(input_file, ipca, n_components=N_COMPONENTS, atol=1e-2):
+    """
+    Checks the streaming model against in-memory PCA on a small input.
+    The spanned subspaces are compared through the cosines of their principal
+    angles (all close to 1 when they match, independent of component signs),
+    together with the explained variance ratios. Returns True when both agree.
+    """
+    from sklearn.decomposition import PCA
+
+    X, _, _ = feature_arrays(input_file)
+    pca = PCA(n_components=n_components, svd_solver="full").fit(X)
+
+    cosines = np.linalg.svd(pca.components_ @ ipca.components_.T, compute_uv=False)
+    variance_gap = np.abs(pca.explained_variance_ratio_ - ipca.explained_variance_ratio_)
+    ok = np.all(cosines > 1 - atol) and np.all(variance_gap < atol)
+
+    print(f"Check vs in-memory PCA: subspace cosines = {np.round(cosines, 4)}, "
+          f"max variance ratio gap = {variance_gap.max():.4f} -> {'OK' if ok else 'MISMATCH'}")
+    return ok
+
+
+@instrumented("reduction")
+def main(n_components=N_COMPONENTS, solver=SOLVER, input_file=INPUT_FILE, output_file=OUTPUT_FILE, mode=MODE):
+    input_path = Path(input_file)
+    if not input_path.exists():
+        print(f"Error: {input_file} not found. Please run feature_selection.py first.")
+        return
+
+    if mode == "streaming":
+        with span("streaming_reduction"):
+            ipca, n_rows = streaming_reduction(input_path, output_file, n_components, BATCH_SIZE)
+        record_read(input_path, rows=n_rows)
+        record_write(output_file, rows=n_rows)
+
+        # Small inputs: make sure the streaming result matches exact PCA
+        if n_rows <= VERIFY_MAX_ROWS:
+            with span("verify_streaming"):
+                verify_streaming(input_path, ipca, n_components)
+
+        print("Visualization is skipped in streaming mode (use MODE = \"memory\" to plot).")
+        return
+
+    print(f"Loading data from {input_path.name}...")
+    if is_store(input_path):
+        # The memory-mapped float32 matrix goes to the decomposition as it is
+        X, labels, _ = feature_arrays(input_path)
+        record_read(input_path, rows=len(labels))
+        with span("reduce_dimensions"):
+            pca_df = reduce_table(X, labels, n_components, solver)
+    else:
+        with span("read_csv"):
+            df = pd.read_csv(input_path)
+        record_read(input_path, rows=len(df))
+
+        # 1. Reduce
+        with span("reduce_dimensions"):
+            pca_df = perform_reduction(df, n_components, solver)
+
+    # 2. Visualize
+    with span("plots"):
+        visualize(pca_df, n_components)
+
+    # 3. Save
+    with span("to_csv"):
+        pca_df.to_csv(output_file, index=False)
+    record_write(output_file, rows=len(pca_df))
+    print(f"\nSuccessfully saved reduced data to {output_file}")
+
+if __name__ == "__main__":
+    main()
@@ -1,60 +1,186 @@
+import json
+import numpy as np
 import pandas as pd
 from pathlib import Path
+from artifacts import artifact_path
+from token_ids import load_token_ids, save_token_ids, take_documents, split_passages, lengths
+from instrumentation import instrumented, span, record_read, record_write
 
 # --- Configuration ---
-INPUT_FILE = "preprocessed_data.csv"
-OUTPUT_FILE = "segmented_data.csv"
+INPUT_FILE = artifact_path("preprocessed_data.csv")
+OUTPUT_FILE = artifact_path("segmented_data.csv")
+OUTPUT_SPEC = artifact_path("segment_spec.json")
+INPUT_TOKEN_IDS = artifact_path("token_ids.npz")
+OUTPUT_TOKEN_IDS = artifact_path("segmented_ids.npz")
+OUTPUT_ROWS = artifact_path("segmented_rows.npy")   # Article (row of INPUT_FILE) of every segmented row
+USE_TOKEN_IDS = True   # Also segment the token id arrays of pre_processing (when present)
 
-def segment_data(df):
+# Segmentation mode:
+#   "fields" - the segment is described by a spec (which fields, in which order, with
+#              which weight); the fields are written side by side and the feature
+#              stages iterate over them, no concatenated copy of the corpus is made
+#   "concat" - one 'Segmented_Content' column = CleanedTitle + " " + CleanedBody
+SEGMENTATION_MODE = "fields"
+TITLE_WEIGHT = 1      # Every title token counts TITLE_WEIGHT times in the features (title boost)
+BODY_WEIGHT = 1
+PASSAGE_LENGTH = None # Split long bodies into passages of this many tokens (one row each); None keeps whole articles
+CONTENT_COLUMN = 'Segmented_Content'
+
+def segment_spec():
+    """The segment specification of the current configuration (written to OUTPUT_SPEC)."""
+    return {
+        "fields": [
+            {"column": 'CleanedTitle', "weight": TITLE_WEIGHT},
+            {"column": 'CleanedBody', "weight": BODY_WEIGHT},
+        ],
+        "passage_length": PASSAGE_LENGTH,
+    }
+
+def save_segment_spec(spec, path=OUTPUT_SPEC):
+    Path(path).write_text(json.dumps(spec, indent=1), encoding="utf-8")
+
+def load_segment_spec(path):
+    """Reads a spec written by segmentation; the current configuration if there is none."""
+    path = Path(path)
+    if not path.exists():
+        return segment_spec()
+    return json.loads(path.read_text(encoding="utf-8"))
+
+def document_fields(df, spec=None):
+    """
+    [(column, weight)] making up a document of df: the spec's fields, or the single
+    'Segmented_Content' column of a "concat" segmentation.
+    """
+    if CONTENT_COLUMN in df.columns:
+        return [(CONTENT_COLUMN, 1)]
+    spec = spec or segment_spec()
+    return [(field["column"], field["weight"]) for field in spec["fields"]]
+
+def document_texts(df, spec=None):
+    """
+    One string per document (fields joined by a space), for consumers that take
+    whole texts, e.g. the inference bundle. Built on demand, never stored.
+    """
+    columns = [column for column, _ in document_fields(df, spec)]
+    texts = df[columns[0]].fillna("").astype(str)
+    for column in columns[1:]:
+        texts = texts + " " + df[column].fillna("").astype(str)
+    return texts.tolist()
+
+def split_text_passages(df, spec):
+    """
+    Splits the last field of the spec (the body) into passages of spec['passage_length']
+    tokens, one row per passage; the other fields are repeated on every passage.
+    'Document' holds the row of the article a passage comes from.
+    """
+    body = spec["fields"][-1]["column"]
+    length = spec["passage_length"]
+    passages = df[body].str.split().map(
+        lambda words: [" ".join(words[i:i + length]) for i in range(0, len(words), length)] or [""]
+    )
+    out = df.assign(Document=df.index, **{body: passages}).explode(body)
+    return out.reset_index(drop=True)
+
+def segment_data(df, spec=None, mode=None):
     """
     Performs Segmentation by isolating and combining the relevant textual elements.
-    
+
     Rationale:
-    According to Lecture 2, segmentation involves "Extracting the elements... 
-    out of header, body, title". 
-    Here, we fuse the 'CleanedTitle' and 'CleanedBody' into a single semantic 
-    unit ('Final_Text') for the Feature Extraction stage, ensuring the model 
-    sees the complete context.
+    According to Lecture 2, segmentation involves "Extracting the elements...
+    out of header, body, title".
+    The segment is 'CleanedTitle' followed by 'CleanedBody' (see segment_spec),
+    so the model sees the complete context. In "fields" mode the fields stay
+    separate columns; in "concat" mode they are fused into 'Segmented_Content'.
+    The input frame is not modified.
     """
+    spec = spec or segment_spec()
+    mode = mode or SEGMENTATION_MODE
+    columns = [field["column"] for field in spec["fields"]]
+
     # Fail Fast: Ensure required columns exist from the pre-processing stage
-    required_cols = ['CleanedTitle', 'CleanedBody', 'Label']
+    required_cols = columns + ['Label']
     for col in required_cols:
         assert col in df.columns, f"Missing column '{col}'. Run pre_processing.py first."
 
-    # Fill NaNs with empty strings to prevent concatenation errors
-    df['CleanedTitle'] = df['CleanedTitle'].fillna("")
-    df['CleanedBody'] = df['CleanedBody'].fillna("")
+    # Empty strings instead of NaNs (a new frame: the caller's df is left as it is)
+    fields = df[columns].fillna("")
 
-    # --- The Segmentation Logic ---
-    # We isolate the "content" from the "structure". 
-    # We treat Title + Body as one continuous text segment.
-    df['Segmented_Content'] = df['CleanedTitle'] + " " + df['CleanedBody']
-                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                    
     # Fail Fast: Check for empty segments
-    # If both title and body were empty/scrubbed, we have nothing to learn from.
-    df = df[df['Segmented_Content'].str.strip().astype(bool)]
-    
+    # If every field is empty/scrubbed, we have nothing to learn from.
+    has_content = fields.apply(lambda column: column.str.strip().astype(bool)).any(axis=1)
+
     # Select ONLY the columns needed for the next step (Feature Extraction)
     # We strictly exclude metadata or intermediate columns to prevent Data Leakage.
-    output_df = df[['Label', 'Segmented_Content']]
-    
+    if mode == "concat":
+        # --- The Segmentation Logic ---
+        # We treat Title + Body as one continuous text segment.
+        content = fields[columns[0]]
+        for column in columns[1:]:
+            content = content + " " + fields[column]
+        return pd.DataFrame({'Label': df['Label'], CONTENT_COLUMN: content})[has_content]
+
+    output_df = pd.concat([df['Label'], fields], axis=1)[has_content]
+    if spec.get("passage_length"):
+        output_df = split_text_passages(output_df, spec)
     return output_df
 
+def segment_token_ids(fields, labels, spec=None):
+    """
+    segment_data on the token id arrays of pre_processing: documents without any
+    token are dropped and, with a passage length, the last field is cut into
+    passages (the id array itself is not copied for that).
+    Returns ({column: (ids, offsets)}, labels).
+    """
+    spec = spec or segment_spec()
+    columns = [field["column"] for field in spec["fields"]]
+    has_content = sum(lengths(fields[column][1]) for column in columns) > 0
+    kept = {column: take_documents(*fields[column], has_content) for column in columns}
+    labels = labels[has_content]
+
+    if spec.get("passage_length"):
+        body = columns[-1]
+        ids, offsets = kept[body]
+        offsets, document = split_passages(offsets, spec["passage_length"])
+        kept = {column: take_documents(*kept[column], document) for column in columns[:-1]}
+        kept[body] = (ids, offsets)
+        labels = labels[document]
+    return kept, labels
+
+@instrumented("segmentation")
 def main():
     input_path = Path(INPUT_FILE)
+    spec = segment_spec()
 
     print(f"Loading data from {input_path.name}...")
-    df = pd.read_csv(input_path)
-    
+    with span("read_csv"):
+        df = pd.read_csv(input_path)
+    record_read(input_path, rows=len(df))
+
     # Apply Segmentation
-    segmented_df = segment_data(df)
-    
+    with span("segment_data"):
+        segmented_df = segment_data(df, spec)
+
     # Save
-    segmented_df.to_csv(OUTPUT_FILE, index=False, encoding='utf-8')
-    
+    with span("to_csv"):
+        segmented_df.to_csv(OUTPUT_FILE, index=False, encoding='utf-8')
+    record_write(OUTPUT_FILE, rows=len(segmented_df))
+    save_segment_spec(spec)
+    articles = segmented_df['Document'] if 'Document' in segmented_df.columns else segmented_df.index
+    with open(OUTPUT_ROWS, 'wb') as f:
+        np.save(f, np.asarray(articles, dtype=np.int64))
+
+    ids_path = Path(INPUT_TOKEN_IDS)
+    if USE_TOKEN_IDS and ids_path.exists():
+        with span("segment_token_ids"):
+            vocab, fields, labels = load_token_ids(ids_path)
+            segmented, labels = segment_token_ids(fields, labels, spec)
+            save_token_ids(OUTPUT_TOKEN_IDS, vocab, segmented, labels)
+        record_read(ids_path, rows=len(df))
+        record_write(OUTPUT_TOKEN_IDS, rows=len(labels))
+
     print(f"\nSuccessfully created {OUTPUT_FILE} with {len(segmented_df)} rows.")
-    print("Columns: 'Label', 'Segmented_Content'")
+    print(f"Columns: {list(segmented_df.columns)} (mode: {SEGMENTATION_MODE})")
     print("Ready for Feature Extraction.")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -1,82 +1,67 @@
 
 import pandas as pd
 from pathlib import Path
+from artifacts import artifact_path
+from corpus_index import open_index, update_index, skipped_articles, query_articles, load_bodies, INDEX_FILE
+from partitions import write_partitioned
+from instrumentation import instrumented, span, record_read, record_write
 
 # Constants
 DATA_DIR = Path("data")
-OUTPUT_FILE = "sensed_data.csv"
-# Separator used to distinguish the header from the body in TXT files
-HEADER_SEPARATOR = "-" * 60 
-
-
-def extract_data_from_file(file_path):
-    """
-    Opens a TXT file, separates the header from the body, and extracts the fields.
-    """
-    try:
-        content = file_path.read_text(encoding="utf-8")
-        
-        # Separate the article body from the header
-        parts = content.split(HEADER_SEPARATOR + '\n', 1)
-        if len(parts) < 2:
-            print(f"Skipping file {file_path}: Header separator not found.")
-            return None
-
-        header_str = parts[0].strip()
-        body_text = parts[1].strip()
-        
-        # Extract data from the header
-        header_lines = header_str.split('\n')
-        
-        # By Author
-        byline = header_lines[1].replace('By ', '').strip() if len(header_lines) > 1 else 'Unknown Author'
-        
-        # URL
-        url = header_lines[2].strip() if len(header_lines) > 2 else 'N/A'
-        
-        # Title 
-        title = header_lines[4].strip() if len(header_lines) > 4 else 'Untitled'
-
-        # Note: The Label is derived from the directory name itself
-        article_label = file_path.parent.name
-        
-        return {
-            "Label": article_label,
-            "Title": title,
-            "Byline": byline,
-            "URL": url,
-            "BodyText": body_text
-        }
-        
-    except Exception as e:
-        print(f"Error reading {file_path}: {e}")
-        return None
+OUTPUT_FILE = artifact_path("sensed_data.csv")
+OUTPUT_PARTITIONS = artifact_path("sensed_partitions")   # Same rows, partitioned by section and month
+WRITE_PARTITIONS = True
+# Article selection, answered by the corpus index (None = everything)
+SECTIONS = None        # e.g. ["sport", "news"]
+DATE_FROM = None       # e.g. "2024-03-01" (inclusive)
+DATE_TO = None         # e.g. "2024-03-31" (inclusive)
 
 
+@instrumented("sensing")
 def main():
-    all_data = []
-    
-    # Loop over all first-level directories within DATA_DIR
-    for section_dir in DATA_DIR.iterdir():
-        if section_dir.is_dir():
-            print(f"Processing directory: {section_dir.name}")
-            
-            # Loop over all TXT files inside the directory
-            for file_path in section_dir.glob("*.txt"):
-                article_data = extract_data_from_file(file_path)
-                if article_data:
-                    all_data.append(article_data)
+    # 1. Bring the metadata index up to date (only new or modified files are read)
+    with span("update_index"):
+        conn = open_index(INDEX_FILE)
+        added, updated, removed = update_index(conn, DATA_DIR)
+        skipped = skipped_articles(conn)
+    print(f"Corpus index: {added} added, {updated} updated, {removed} removed.")
+    for path in skipped:
+        print(f"Skipping file {path}: not a well-formed article (header separator not found or unreadable).")
 
-    if not all_data:
+    # 2. Select the articles from the index, then read only their bodies
+    with span("query_index"):
+        rows = query_articles(conn, SECTIONS, DATE_FROM, DATE_TO)
+    conn.close()
+
+    if rows.empty:
         print("No articles were successfully processed.")
         return
 
-    # Create the DataFrame
-    df = pd.DataFrame(all_data)
+    with span("read_bodies"):
+        bodies = load_bodies(rows, DATA_DIR)
+    record_read(DATA_DIR, rows=len(rows))
+
+    # Create the DataFrame (the Label is the section directory name)
+    df = pd.DataFrame({
+        "Label": rows["section"],
+        "Date": rows["date"],
+        "Title": rows["title"],
+        "Byline": rows["byline"],
+        "URL": rows["url"],
+        "BodyText": bodies,
+    })
     
     # Save the data to a CSV file
     output_path = Path(OUTPUT_FILE)
-    df.to_csv(output_path, index=False, encoding='utf-8')
+    with span("to_csv"):
+        df.to_csv(output_path, index=False, encoding='utf-8')
+    record_write(output_path, rows=len(df))
+
+    if WRITE_PARTITIONS:
+        with span("write_partitions"):
+            n_partitions = write_partitioned(df, OUTPUT_PARTITIONS)
+        record_write(OUTPUT_PARTITIONS, rows=len(df))
+        print(f"Wrote {n_partitions} section/month partitions to {OUTPUT_PARTITIONS}")
     
     print(f"\nSuccessfully created {output_path.name} with {len(df)} rows.")
 
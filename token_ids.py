@@ -0,0 +1,101 @@
+import numpy as np
+
+# Ragged, array-backed layout of tokenized text:
+#   vocab   - the distinct tokens, sorted (token id = position in vocab)
+#   ids     - int32 token ids of all documents, one after the other
+#   offsets - int64, document i is ids[offsets[i]:offsets[i + 1]]
+# A field is stored as "<field>_ids" / "<field>_offsets" in an .npz file, together
+# with the vocabulary and the labels. Stages that count tokens work on these arrays
+# directly instead of re-splitting strings.
+ID_DTYPE = np.int32
+OFFSET_DTYPE = np.int64
+
+
+def encode_fields(fields):
+    """
+    Tokenizes (whitespace split) every field of {name: iterable of cleaned texts}
+    with one shared vocabulary. Returns (vocab, {name: (ids, offsets)}), with the
+    vocabulary sorted so that token ids follow alphabetical order.
+    """
+    index = {}
+    encoded = {}
+    for name, texts in fields.items():
+        ids, lengths = [], []
+        for text in texts:
+            tokens = text.split() if isinstance(text, str) else []
+            ids.extend(index.setdefault(token, len(index)) for token in tokens)
+            lengths.append(len(tokens))
+        offsets = np.zeros(len(lengths) + 1, dtype=OFFSET_DTYPE)
+        np.cumsum(lengths, out=offsets[1:])
+        encoded[name] = (np.asarray(ids, dtype=ID_DTYPE), offsets)
+
+    # Renumber in alphabetical order
+    tokens = np.array(list(index), dtype=object)
+    order = np.argsort(tokens.astype(str), kind="stable")
+    new_id = np.empty(len(order), dtype=ID_DTYPE)
+    new_id[order] = np.arange(len(order), dtype=ID_DTYPE)
+    vocab = tokens[order]
+    return vocab, {name: (new_id[ids], offsets) for name, (ids, offsets) in encoded.items()}
+
+
+def save_token_ids(path, vocab, fields, labels):
+    """Writes the vocabulary, the labels and every field's ids/offsets to one .npz file."""
+    arrays = {
+        # One newline-joined UTF-8 buffer instead of a fixed-width string array
+        "vocab": np.frombuffer("\n".join(vocab).encode("utf-8"), dtype=np.uint8),
+        "labels": np.asarray(labels, dtype=str),
+    }
+    for name, (ids, offsets) in fields.items():
+        arrays[f"{name}_ids"] = ids
+        arrays[f"{name}_offsets"] = offsets
+    with open(path, "wb") as f:
+        np.savez(f, **arrays)
+
+
+def load_token_ids(path):
+    """
+    Reads an .npz written by save_token_ids. Returns (vocab, {field: (ids, offsets)}, labels).
+    """
+    with np.load(path) as data:
+        buffer = data["vocab"].tobytes().decode("utf-8")
+        vocab = np.array(buffer.split("\n") if buffer else [], dtype=object)
+        fields = {key[:-4]: (data[key], data[f"{key[:-4]}_offsets"]) for key in data.files if key.endswith("_ids")}
+        return vocab, fields, data["labels"]
+
+
+def lengths(offsets):
+    """Number of tokens of every document."""
+    return np.diff(offsets)
+
+
+def doc_index(offsets):
+    """Document number of every token (for np.bincount over documents)."""
+    return np.repeat(np.arange(len(offsets) - 1), lengths(offsets))
+
+
+def split_passages(offsets, length):
+    """
+    Cuts every document into passages of at most `length` tokens. Passages are
+    consecutive slices, so the ids array is unchanged: returns the passage offsets
+    and the document of every passage. An empty document keeps one empty passage.
+    """
+    doc_lengths = lengths(offsets)
+    n_passages = np.maximum(1, -(-doc_lengths // length))
+    document = np.repeat(np.arange(len(doc_lengths)), n_passages)
+    first = np.cumsum(n_passages) - n_passages
+    k = np.arange(len(document)) - np.repeat(first, n_passages)   # Passage number inside its document
+
+    new_offsets = np.empty(len(document) + 1, dtype=OFFSET_DTYPE)
+    new_offsets[:-1] = offsets[:-1][document] + k * length
+    new_offsets[-1] = offsets[-1]
+    return new_offsets, document
+
+
+def take_documents(ids, offsets, rows):
+    """Keeps the documents selected by a boolean mask or an index array."""
+    rows = np.arange(len(offsets) - 1)[rows]
+    doc_lengths = lengths(offsets)[rows]
+    new_offsets = np.zeros(len(rows) + 1, dtype=OFFSET_DTYPE)
+    np.cumsum(doc_lengths, out=new_offsets[1:])
+    positions = np.repeat(offsets[:-1][rows] - new_offsets[:-1], doc_lengths) + np.arange(new_offsets[-1])
+    return ids[positions], new_offsets